@@ -6,7 +6,7 @@ from prefect.exceptions import ObjectNotFound
 
 from hermes.flows.forecastseries_scheduler import (DEPLOYMENT_NAME,
                                                    delete_deployment_schedule)
-from hermes.repositories.data import InjectionPlanRepository
+from hermes.repositories.data import BlobRepository, InjectionPlanRepository
 from hermes.repositories.database import DatabaseSession
 from hermes.repositories.project import (ForecastRepository,
                                          ForecastSeriesRepository,
@@ -182,9 +182,11 @@ def delete_forecastseries(forecastseries_oid: UUID):
         ForecastSeriesRepository.delete(session, forecastseries_oid)
 
         # injectionplans belonging to modelruns aren't automatically
-        # deleted by the cascade
-        for ip in injectionplans:
-            InjectionPlanRepository.delete(session, ip)
+        # deleted by the cascade, plans shared with forecasts of other
+        # forecastseries are kept.
+        InjectionPlanRepository.delete_unreferenced(session, injectionplans)
+
+        BlobRepository.delete_unreferenced(session)
 
 
 def create_modelconfig(name, model_config):
@@ -333,6 +335,7 @@ def delete_injectionplan(injectionplan_oid: UUID):
 
     with DatabaseSession() as session:
         InjectionPlanRepository.delete(session, injectionplan_oid)
+        BlobRepository.delete_unreferenced(session)
 
 
 def delete_forecast(forecast_oid: UUID):
@@ -343,7 +346,9 @@ def delete_forecast(forecast_oid: UUID):
 
         ForecastRepository.delete(session, forecast_oid)
 
-        for ip in injectionplans:
-            InjectionPlanRepository.delete(session, ip)
+        # plans are shared with other forecasts using the same plan
+        InjectionPlanRepository.delete_unreferenced(session, injectionplans)
+
+        BlobRepository.delete_unreferenced(session)
 
     return f"Forecast {forecast_oid} deleted."
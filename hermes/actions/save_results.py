@@ -1,22 +1,33 @@
+import contextvars
+from concurrent.futures import (ALL_COMPLETED, FIRST_COMPLETED, Future,
+                                ThreadPoolExecutor, wait)
+from functools import partial
+from typing import Any, Callable
 from uuid import UUID
 
+import numpy as np
 from seismostats import ForecastCatalog, ForecastGRRateGrid
-from shapely.geometry import box
 
-from hermes.repositories.results import (EventForecastRepository,
+from hermes.config import get_settings
+from hermes.repositories.results import (EventForecastCompactRepository,
+                                         EventForecastRepository,
                                          GridCellRepository,
                                          GRParametersRepository,
                                          ModelResultRepository,
+                                         ModelRunRepository,
                                          TimeStepRepository)
+from hermes.repositories.storage import get_result_store
 from hermes.schemas import GridCell, TimeStep
-from hermes.schemas.base import EResultType
+from hermes.schemas.base import ECatalogLayout, EResultType
 
 
 def save_forecast_catalog_to_repositories(
         session,
         forecastseries_oid: UUID,
         modelrun_oid: UUID,
-        forecast_catalog: ForecastCatalog) -> None:
+        forecast_catalog: ForecastCatalog,
+        commit: bool = True,
+        catalog_layout: ECatalogLayout = ECatalogLayout.DEFAULT) -> None:
 
     # create the timestep and gridcell objects
     timestep = TimeStep(starttime=forecast_catalog.starttime,
@@ -28,54 +39,293 @@ def save_forecast_catalog_to_repositories(
                          depth_max=forecast_catalog.depth_max)
 
     # save the timestep and gridcell objects to the database
-    timestep = TimeStepRepository.get_or_create(session, timestep)
-    griddcell = GridCellRepository.get_or_create(session, griddcell)
+    timestep = TimeStepRepository.get_or_create(
+        session, timestep, commit=False)
+    griddcell = GridCellRepository.get_or_create(
+        session, griddcell, commit=False)
+
+    # number of events per catalog, stored as summary on the ModelResult
+    event_count = np.zeros(forecast_catalog.n_catalogs, dtype=int)
+    if not forecast_catalog.empty:
+        catalog_id = forecast_catalog['catalog_id'].to_numpy()
+        if catalog_id.max() >= forecast_catalog.n_catalogs:
+            raise ValueError('The catalog_id of an event is larger than '
+                             'the number of catalogs.')
+        event_count = np.bincount(catalog_id, minlength=len(event_count))
+
+    storage_uri = None
+    if get_settings().RESULTS_STORAGE == 'parquet' \
+            and not forecast_catalog.empty:
+        store = get_result_store()
+        modelrun = ModelRunRepository.get_by_id(session, modelrun_oid)
+        storage_uri = store.catalog_uri(forecastseries_oid,
+                                        modelrun.forecast_oid,
+                                        modelrun_oid,
+                                        timestep.oid)
 
     # create n_catalogs number of ModelResults
     ids = ModelResultRepository.batch_create(
         session,
+        forecastseries_oid,
         forecast_catalog.n_catalogs,
         EResultType.CATALOG,
         timestep.oid,
         griddcell.oid,
-        modelrun_oid
+        modelrun_oid,
+        storage_uri=storage_uri,
+        event_count=event_count,
+        commit=False
     )
 
-    EventForecastRepository.create_from_forecast_catalog(
-        session, forecast_catalog, ids)
+    if storage_uri:
+        store.write_catalog(session, storage_uri, forecast_catalog, ids)
+    elif catalog_layout == ECatalogLayout.COMPACT:
+        EventForecastCompactRepository.create_from_forecast_catalog(
+            session, forecastseries_oid, forecast_catalog, ids, commit=False)
+    else:
+        EventForecastRepository.create_from_forecast_catalog(
+            session, forecastseries_oid, forecast_catalog, ids, commit=False)
+
+    if commit:
+        session.commit()
 
 
 def save_forecast_grrategrid_to_repositories(
         session,
         forecastseries_oid: UUID,
         modelrun_oid: UUID,
-        forecast_grrategrid: ForecastGRRateGrid) -> None:
+        forecast_grrategrid: ForecastGRRateGrid,
+        commit: bool = True) -> None:
 
     timestep = TimeStep(starttime=forecast_grrategrid.starttime,
                         endtime=forecast_grrategrid.endtime,
                         forecastseries_oid=forecastseries_oid)
-    timestep = TimeStepRepository.get_or_create(session, timestep)
-
-    cells = forecast_grrategrid.groupby(['longitude_min', 'longitude_max',
-                                         'latitude_min', 'latitude_max',
-                                         'depth_min', 'depth_max'])
-
-    for cell, data in cells:
-        gridcell = GridCell(geom=box(cell[0], cell[2], cell[1], cell[3]),
-                            forecastseries_oid=forecastseries_oid,
-                            depth_min=cell[4],
-                            depth_max=cell[5])
-
-        gridcell = GridCellRepository.get_or_create(session, gridcell)
-
-        ids = ModelResultRepository.batch_create(
-            session,
-            len(data),
-            EResultType.GRID,
-            timestep.oid,
-            gridcell.oid,
-            modelrun_oid
-        )
-
-        GRParametersRepository.create_from_forecast_grrategrid(
-            session, data, ids)
+    timestep = TimeStepRepository.get_or_create(
+        session, timestep, commit=False)
+
+    cell_columns = ['longitude_min', 'longitude_max',
+                    'latitude_min', 'latitude_max',
+                    'depth_min', 'depth_max']
+
+    # index of the cell for each row, numbered in order of appearance
+    cell_index = forecast_grrategrid.groupby(
+        cell_columns, sort=False, dropna=False).ngroup().to_numpy()
+    cells = forecast_grrategrid[cell_columns].drop_duplicates()
+
+    gridcell_oids = GridCellRepository.bulk_get_or_create(
+        session, forecastseries_oid, cells, commit=False)
+
+    # one ModelResult per row, realizations numbered per cell
+    sizes = np.bincount(cell_index, minlength=len(cells))
+    offsets = np.cumsum(sizes) - sizes
+    grid_id = forecast_grrategrid['grid_id'].to_numpy()
+
+    if np.any(grid_id >= sizes[cell_index]):
+        raise ValueError('The grid_id of a cell is larger than the number '
+                         'of rows of that cell in the rategrid.')
+
+    ids = ModelResultRepository.batch_create(
+        session,
+        forecastseries_oid,
+        len(forecast_grrategrid),
+        EResultType.GRID,
+        timestep.oid,
+        np.repeat(gridcell_oids, sizes),
+        modelrun_oid,
+        realization_id=np.arange(len(forecast_grrategrid))
+        - np.repeat(offsets, sizes),
+        commit=False
+    )
+
+    # point the grid_id of each row to its ModelResult
+    GRParametersRepository.create_from_forecast_grrategrid(
+        session,
+        forecastseries_oid,
+        forecast_grrategrid.assign(grid_id=offsets[cell_index] + grid_id),
+        ids,
+        commit=False)
+
+    if commit:
+        session.commit()
+
+
+class ResultsUnitOfWork:
+    """
+    Collects the results of a model run and writes them to the
+    database in a single transaction.
+
+    Results are added with `add_catalog` and `add_grrategrid`. They are
+    sent to the database on `flush` and made persistent with one commit
+    on `commit`. If writing any of the results fails, the whole
+    transaction is rolled back and nothing of the model run is stored.
+
+    Can be used as a context manager, committing on a successful exit
+    and rolling back if an exception is raised.
+
+    Catalogs are stored in the table of the given `catalog_layout`.
+
+    If `chunk_size` is given, the pending results are flushed as soon as
+    that many have been added, so that only a few results are held in
+    memory at the same time. They are still committed together.
+    """
+
+    def __init__(self,
+                 session,
+                 forecastseries_oid: UUID,
+                 modelrun_oid: UUID,
+                 chunk_size: int | None = None,
+                 catalog_layout: ECatalogLayout = ECatalogLayout.DEFAULT) \
+            -> None:
+        self.session = session
+        self.forecastseries_oid = forecastseries_oid
+        self.modelrun_oid = modelrun_oid
+        self.chunk_size = chunk_size
+        self.catalog_layout = catalog_layout
+
+        self._pending: list[tuple[Callable, Any]] = []
+
+    def __enter__(self) -> 'ResultsUnitOfWork':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add_catalog(self, forecast_catalog: ForecastCatalog) -> None:
+        self._add(partial(save_forecast_catalog_to_repositories,
+                          catalog_layout=self.catalog_layout),
+                  forecast_catalog)
+
+    def add_grrategrid(self, forecast_grrategrid: ForecastGRRateGrid) \
+            -> None:
+        self._add(save_forecast_grrategrid_to_repositories,
+                  forecast_grrategrid)
+
+    def _add(self, save: Callable, result: Any) -> None:
+        self._pending.append((save, result))
+        if self.chunk_size and len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the pending results to the database without committing.
+        """
+        try:
+            while self._pending:
+                save, result = self._pending.pop(0)
+                save(self.session,
+                     self.forecastseries_oid,
+                     self.modelrun_oid,
+                     result,
+                     commit=False)
+        except BaseException:
+            self.rollback()
+            raise
+
+    def commit(self) -> None:
+        """
+        Write the pending results and commit the transaction.
+        """
+        self.flush()
+        self.session.commit()
+
+    def rollback(self) -> None:
+        self._pending.clear()
+        self.session.rollback()
+
+
+class ParallelResultsUnitOfWork(ResultsUnitOfWork):
+    """
+    Writes the results of a model run in parallel, each result in its
+    own transaction on its own session created with `session_factory`.
+
+    At most `max_workers` results are written at the same time, adding
+    a result blocks until a writer is free. `commit` returns once every
+    writer has committed.
+
+    Because the results are committed one by one, the results which
+    were already committed are deleted again if writing any result
+    fails. `session` is only used for this cleanup. Unlike with a
+    single transaction, the results written so far stay behind if the
+    process dies or the cleanup fails, until they are deleted together
+    with the failed model run by `ModelRunRepository.fail_unfinished`.
+    Parallel writers trade this atomicity for throughput.
+    """
+
+    def __init__(self,
+                 session,
+                 session_factory: Callable,
+                 forecastseries_oid: UUID,
+                 modelrun_oid: UUID,
+                 max_workers: int,
+                 catalog_layout: ECatalogLayout = ECatalogLayout.DEFAULT) \
+            -> None:
+        super().__init__(session,
+                         forecastseries_oid,
+                         modelrun_oid,
+                         catalog_layout=catalog_layout)
+        self.session_factory = session_factory
+        self.max_workers = max_workers
+
+        self._executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix='results-writer')
+        self._running: set[Future] = set()
+        self._rolled_back = False
+
+    def __len__(self) -> int:
+        return len(self._running)
+
+    def _add(self, save: Callable, result: Any) -> None:
+        if len(self._running) >= self.max_workers:
+            self._wait(FIRST_COMPLETED)
+        # run in a copy of the current context, eg. to keep the
+        # prefect logger
+        self._running.add(self._executor.submit(
+            contextvars.copy_context().run, self._write, save, result))
+
+    def _write(self, save: Callable, result: Any) -> None:
+        with self.session_factory() as session:
+            save(session,
+                 self.forecastseries_oid,
+                 self.modelrun_oid,
+                 result,
+                 commit=True)
+
+    def _wait(self, return_when: str) -> None:
+        done, self._running = wait(self._running, return_when=return_when)
+        for future in done:
+            if future.exception() is not None:
+                self.rollback()
+                raise future.exception()
+
+    def flush(self) -> None:
+        """
+        Wait until all results have been written and committed.
+        """
+        self._wait(ALL_COMPLETED)
+
+    def commit(self) -> None:
+        self.flush()
+        self._executor.shutdown()
+
+    def rollback(self) -> None:
+        # also called by __exit__ after a failed write was rolled back
+        if self._rolled_back:
+            return
+        self._rolled_back = True
+
+        for future in self._running:
+            future.cancel()
+        wait(self._running)
+        self._running.clear()
+        self._executor.shutdown()
+
+        self.session.rollback()
+        ModelResultRepository.delete_by_modelrun(
+            self.session, self.forecastseries_oid, self.modelrun_oid)
+        get_result_store().delete_modelrun(self.modelrun_oid)
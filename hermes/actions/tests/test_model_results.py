@@ -1,12 +1,17 @@
 import os
 import pickle
+import threading
 from unittest.mock import MagicMock, patch
+from uuid import uuid4
 
+import numpy as np
 import pandas as pd
+import pytest
 from seismostats import ForecastCatalog
 from shapely import from_wkt
 
 from hermes.actions.save_results import (
+    ParallelResultsUnitOfWork, ResultsUnitOfWork,
     save_forecast_catalog_to_repositories,
     save_forecast_grrategrid_to_repositories)
 
@@ -36,16 +41,27 @@ def test_save_forecast_catalog_to_repositories(mock_seismic_event_repo,
         'POLYGON ((45.7 5.85, 47.9 5.85, 47.9 10.6, 45.7 10.6, 45.7 5.85))')
     catalog.depth_min = 0
     catalog.depth_max = 100
+    catalog['catalog_id'] = np.arange(len(catalog)) % 10
+    catalog.n_catalogs = 10
 
-    save_forecast_catalog_to_repositories(MagicMock(), None, None, catalog)
+    forecastseries_oid = uuid4()
+    save_forecast_catalog_to_repositories(
+        MagicMock(), forecastseries_oid, None, catalog)
 
-    # TODO: Add assertions
+    assert mock_model_result_repo.call_args[0][1] == forecastseries_oid
+    assert mock_model_result_repo.call_args[0][2] == 10
+    assert mock_model_result_repo.call_args.kwargs['event_count'].sum() \
+        == len(catalog)
+    assert mock_model_result_repo.call_args.kwargs['storage_uri'] is None
+    assert mock_seismic_event_repo.call_count == 1
 
 
 @patch('hermes.actions.save_results.TimeStepRepository.get_or_create',
        autospec=True)
-@patch('hermes.actions.save_results.GridCellRepository.get_or_create',
-       autospec=True)
+@patch('hermes.actions.save_results.GridCellRepository.bulk_get_or_create',
+       autospec=True,
+       side_effect=lambda session, fs_oid, cells, commit: np.array(
+           [uuid4() for _ in range(len(cells))], dtype=object))
 @patch('hermes.actions.save_results.ModelResultRepository.batch_create',
        autospec=True)
 @patch('hermes.actions.save_results.GRParametersRepository.'
@@ -74,4 +90,117 @@ def test_save_grrategrid_to_repositories(mock_grparameters_repo,
 
     save_forecast_grrategrid_to_repositories(MagicMock(), None, None, rategrid)
 
-    # TODO: Add assertions
+    # all ModelResults of the grid are created with one call
+    assert mock_model_result_repo.call_count == 1
+    assert mock_model_result_repo.call_args[0][2] == len(rategrid)
+    # all GridCells of the grid are resolved with one call
+    assert mock_grid_cell_repo.call_count == 1
+    assert len(mock_grid_cell_repo.call_args[0][2]) == \
+        2 * len(rategrid2.drop_duplicates(
+            ['longitude_min', 'longitude_max', 'latitude_min',
+             'latitude_max', 'depth_min', 'depth_max']))
+    # every ModelResult points to its own GridCell
+    gridcell_oids = mock_model_result_repo.call_args[0][5]
+    assert len(gridcell_oids) == len(rategrid)
+    assert len(set(gridcell_oids)) == \
+        mock_grid_cell_repo.call_args[0][2].shape[0]
+    assert mock_grparameters_repo.call_count == 1
+
+
+@patch('hermes.actions.save_results.save_forecast_grrategrid_to_repositories',
+       autospec=True)
+@patch('hermes.actions.save_results.save_forecast_catalog_to_repositories',
+       autospec=True)
+def test_results_unit_of_work(mock_save_catalog, mock_save_grid):
+    session = MagicMock()
+
+    with ResultsUnitOfWork(session, None, None) as uow:
+        uow.add_catalog('catalog1')
+        uow.add_catalog('catalog2')
+        uow.add_grrategrid('grid')
+
+    assert mock_save_catalog.call_count == 2
+    assert mock_save_grid.call_count == 1
+    assert all(c.kwargs['commit'] is False
+               for c in mock_save_catalog.call_args_list)
+    session.commit.assert_called_once()
+    session.rollback.assert_not_called()
+
+    session = MagicMock()
+    mock_save_catalog.side_effect = ValueError('failed')
+
+    with pytest.raises(ValueError):
+        with ResultsUnitOfWork(session, None, None) as uow:
+            uow.add_catalog('catalog1')
+
+    session.commit.assert_not_called()
+    session.rollback.assert_called()
+
+
+@patch('hermes.actions.save_results.save_forecast_catalog_to_repositories',
+       autospec=True)
+def test_results_unit_of_work_chunk_size(mock_save_catalog):
+    session = MagicMock()
+
+    with ResultsUnitOfWork(session, None, None, chunk_size=2) as uow:
+        uow.add_catalog('catalog1')
+        assert len(uow) == 1
+        uow.add_catalog('catalog2')
+        # written as soon as the chunk is full, but not committed
+        assert len(uow) == 0
+        assert mock_save_catalog.call_count == 2
+        session.commit.assert_not_called()
+        uow.add_catalog('catalog3')
+
+    assert mock_save_catalog.call_count == 3
+    session.commit.assert_called_once()
+
+
+@patch('hermes.actions.save_results.get_result_store', autospec=True)
+@patch('hermes.actions.save_results.ModelResultRepository.delete_by_modelrun',
+       autospec=True)
+@patch('hermes.actions.save_results.save_forecast_catalog_to_repositories',
+       autospec=True)
+def test_parallel_results_unit_of_work(mock_save_catalog,
+                                       mock_delete,
+                                       mock_store):
+    session = MagicMock()
+    session_factory = MagicMock()
+    threads = set()
+    mock_save_catalog.side_effect = \
+        lambda *args, **kwargs: threads.add(threading.get_ident())
+
+    with ParallelResultsUnitOfWork(session, session_factory,
+                                   None, None, max_workers=2) as uow:
+        for i in range(5):
+            uow.add_catalog(f'catalog{i}')
+        assert len(uow) <= 2
+
+    # every result is committed by its writer on its own session
+    assert mock_save_catalog.call_count == 5
+    assert session_factory.call_count == 5
+    assert all(c.kwargs['commit'] is True
+               for c in mock_save_catalog.call_args_list)
+    assert threading.get_ident() not in threads
+    mock_delete.assert_not_called()
+
+    def fail(session, fs_oid, modelrun_oid, result, **kwargs):
+        if result == 'catalog1':
+            raise ValueError('failed')
+
+    mock_save_catalog.side_effect = fail
+    forecastseries_oid = uuid4()
+    modelrun_oid = uuid4()
+
+    with pytest.raises(ValueError, match='failed'):
+        with ParallelResultsUnitOfWork(session, session_factory,
+                                       forecastseries_oid, modelrun_oid,
+                                       max_workers=2) as uow:
+            for i in range(3):
+                uow.add_catalog(f'catalog{i}')
+
+    # the results which were committed are deleted again, only once
+    mock_delete.assert_called_once_with(session, forecastseries_oid,
+                                        modelrun_oid)
+    mock_store.return_value.delete_modelrun.assert_called_once_with(
+        modelrun_oid)
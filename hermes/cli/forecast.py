@@ -7,7 +7,7 @@ from rich.console import Console
 from typing_extensions import Annotated
 
 from hermes.actions.crud_models import delete_forecast, read_forecastseries_oid
-from hermes.cli.utils import console_table
+from hermes.cli.utils import console_table, local_mode
 from hermes.flows.forecast_handler import forecast_runner
 from hermes.repositories.database import DatabaseSession
 from hermes.repositories.project import (ForecastRepository,
@@ -55,15 +55,21 @@ def run(
     local: Annotated[
         bool,
         typer.Option(
-            help="Flag to run the Forecast in local mode.")] = False
+            help="Flag to run the Forecast in local mode.")] = False,
+    parallel: Annotated[
+        int | None,
+        typer.Option(
+            help="Number of processes running the ModelRuns in local "
+            "mode, 0 for one per CPU. Defaults to "
+            "LOCAL_PARALLEL_WORKERS.")] = None
 ):
 
     try:
         forecastseries_oid = read_forecastseries_oid(forecastseries)
 
-        mode = 'local' if local else 'deploy'
         if local:
-            forecast_runner(forecastseries_oid, start, end, mode)
+            mode, parallel = local_mode(parallel)
+            forecast_runner(forecastseries_oid, start, end, mode, parallel)
         else:
 
             with DatabaseSession() as session:
@@ -75,7 +81,7 @@ def run(
                 parameters={'forecastseries_oid': forecastseries_oid,
                             'starttime': start,
                             'endtime': end,
-                            'mode': mode},
+                            'mode': 'deploy'},
                 timeout=0
             )
 
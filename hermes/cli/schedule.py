@@ -6,7 +6,7 @@ from rich.console import Console
 from typing_extensions import Annotated
 
 from hermes.actions.crud_models import read_forecastseries_oid
-from hermes.cli.utils import console_table, console_tree
+from hermes.cli.utils import console_table, console_tree, local_mode
 from hermes.flows.forecastseries_scheduler import ForecastSeriesScheduler
 from hermes.repositories.database import DatabaseSession
 from hermes.repositories.project import ForecastSeriesRepository
@@ -162,14 +162,22 @@ def catchup(
     local: Annotated[
         bool,
         typer.Option(
-            help="Flag to run the Forecast in local mode.")] = False
+            help="Flag to run the Forecast in local mode.")] = False,
+    parallel: Annotated[
+        int | None,
+        typer.Option(
+            help="Number of processes running the ModelRuns in local "
+            "mode, 0 for one per CPU. Defaults to "
+            "LOCAL_PARALLEL_WORKERS.")] = None
 ):
-    mode = 'local' if local else 'deploy'
+    mode = 'deploy'
+    if local:
+        mode, parallel = local_mode(parallel)
 
     try:
         forecastseries_oid = read_forecastseries_oid(forecastseries)
         scheduler = ForecastSeriesScheduler(forecastseries_oid)
-        scheduler.run_past_forecasts(mode)
+        scheduler.run_past_forecasts(mode, parallel)
     except BaseException as e:
         console.print(str(e))
         raise typer.Exit(code=1)
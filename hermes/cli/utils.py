@@ -4,6 +4,8 @@ from pydantic import BaseModel
 from rich.table import Table
 from rich.tree import Tree
 
+from hermes.config import get_settings
+
 
 def console_table(
         models: list[BaseModel], attributes: list[str]) -> None:
@@ -61,3 +63,15 @@ def console_tree(model: BaseModel, show_none: bool = True) -> None:
         add_branch(tree, field, value)
 
     return tree
+
+
+def local_mode(parallel: int | None) -> tuple[str, int]:
+    """
+    Returns the mode and number of processes to run the ModelRuns of a
+    Forecast locally with, by default LOCAL_PARALLEL_WORKERS processes.
+
+    :param parallel: Number of processes, 0 for one per CPU.
+    """
+    if parallel is None:
+        parallel = get_settings().LOCAL_PARALLEL_WORKERS
+    return ('local' if parallel == 1 else 'local-parallel'), parallel
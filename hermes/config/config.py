@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from sqlalchemy.engine import URL
@@ -16,6 +17,70 @@ class Settings(BaseSettings):
     POSTGRES_POOL_SIZE: int = 5
     POSTGRES_MAX_OVERFLOW: int = 10
 
+    # Maximum number of GridCell and TimeStep oids which are cached
+    # per process to avoid looking them up for every model run.
+    IDENTITY_CACHE_SIZE: int = 100_000
+
+    # Number of results (eg. catalogs of one timestep) of a model run
+    # which are buffered before they are written to the database.
+    RESULTS_CHUNK_SIZE: int = 1
+
+    # Number of results of a model run which are written in parallel,
+    # each on its own connection, at most POSTGRES_POOL_SIZE. With more
+    # than one writer, the results are committed one by one.
+    RESULTS_WRITERS: int = 1
+
+    # Number of model runs whose results can wait to be written while
+    # the next model runs, in local mode. 0 writes the results before
+    # the next model runs.
+    RESULTS_WRITE_BEHIND: int = 0
+
+    # Number of processes running the model runs of a forecast in
+    # local mode, 0 for one per CPU and 1 to run them one after another
+    # in the process of the forecast.
+    LOCAL_PARALLEL_WORKERS: int = 1
+
+    # Where the events of forecast catalogs are stored, either in the
+    # 'database' or as 'parquet' files below RESULTS_PARQUET_PATH.
+    RESULTS_STORAGE: Literal['database', 'parquet'] = 'database'
+    RESULTS_PARQUET_PATH: str = 'results'
+
+    # Maximum number of concurrent requests per host and number of
+    # requests started per second and host (0 for no limit), when data
+    # is downloaded in parts, eg. the seismic catalog from a FDSNWS.
+    DOWNLOAD_CONCURRENCY: int = 4
+    DOWNLOAD_RATE_LIMIT: float = 2
+    # Number of retries of a failed request of a part.
+    DOWNLOAD_RETRIES: int = 3
+
+    # Duration in days of the time slices in which hydraulics are
+    # requested from a HYDWS. Kept short, as a day of samples at 1 s
+    # resolution is already a large response per section.
+    HYDRAULICS_CHUNK_SIZE: float = 1
+
+    # Directory of the on-disk cache of FDSNWS and HYDWS responses,
+    # shared by all processes, or empty to disable the cache. Its size
+    # is limited to HTTP_CACHE_SIZE bytes. Responses to time windows
+    # which ended more than HTTP_CACHE_IMMUTABLE_AFTER days ago never
+    # expire, all others after HTTP_CACHE_TTL seconds.
+    HTTP_CACHE_PATH: str = ''
+    HTTP_CACHE_SIZE: int = 1_000_000_000
+    HTTP_CACHE_TTL: int = 300
+    HTTP_CACHE_IMMUTABLE_AFTER: float = 7
+
+    # Store the observed events once per forecastseries, fetching only
+    # the events since the last forecast, and give each forecast a
+    # snapshot of the store instead of a copy of the events.
+    SEISMICITY_OBSERVATION_STORE: bool = False
+
+    # Seconds before the end of the stored events which are fetched
+    # again for every forecast, to pick up revised and deleted events.
+    SEISMICITY_REVISION_LOOKBACK: int = 86400
+
+    # Compression of stored payloads like QuakeML and hydJSON, one of
+    # 'zstd', 'gzip' or 'identity'. Only affects newly stored payloads.
+    BLOB_COMPRESSION: Literal['zstd', 'gzip', 'identity'] = 'zstd'
+
     # Timezone of the DATA, eg. if 'UTC', all datetime which are passed
     # via CLI and configuration files will be converted from the operators
     # system timezone to UTC before querying data and running forecasts.
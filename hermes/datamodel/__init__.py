@@ -1,5 +1,6 @@
 # flake8: noqa
 from hermes.datamodel.base import ORMBase
+from hermes.datamodel.blobs import BlobTable
 from hermes.datamodel.data_tables import (EventObservationTable,
                                           InjectionObservationTable,
                                           InjectionPlanTable,
@@ -9,7 +10,9 @@ from hermes.datamodel.data_tables import (EventObservationTable,
 from hermes.datamodel.project_tables import (ForecastSeriesTable,
                                              ForecastTable, ModelConfigTable,
                                              ProjectTable, TagTable)
-from hermes.datamodel.result_tables import (EventForecastTable, GridCellTable,
-                                            GRParametersTable,
+from hermes.datamodel.result_tables import (EventForecastCompactTable,
+                                            EventForecastTable,
+                                            EventForecastUncertaintyTable,
+                                            GridCellTable, GRParametersTable,
                                             ModelResultTable, ModelRunTable,
                                             TimeStepTable)
@@ -1,3 +1,4 @@
+import re
 from logging.config import fileConfig
 
 from alembic_utils.replaceable_entity import register_entities
@@ -7,6 +8,7 @@ from alembic import context
 from hermes.config import get_settings
 from hermes.datamodel.alembic.functions import dummy
 from hermes.datamodel.base import ORMBase
+from hermes.datamodel.result_tables import PARTITIONED_TABLES
 
 EXCLUDE_TABLES = [
     'spatial_ref_sys',
@@ -24,6 +26,10 @@ EXCLUDE_TYPES = ['grant_table', 'function', 'view',
 
 INCLUDE_NAMESPACES = ['hermes']
 
+# partitions of the result tables, created per forecastseries
+PARTITION_NAME = re.compile(
+    rf"^({'|'.join(PARTITIONED_TABLES)})_[0-9a-f]{{32}}$")
+
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -49,6 +55,7 @@ def include_name(name, type_, parent_names):
     our migrations.
     """
     if (type_ == 'table' and name in EXCLUDE_TABLES) or \
+        (type_ == 'table' and PARTITION_NAME.match(name)) or \
         (type_ != 'table' and name in EXCLUDE_NAMES) or \
         (type_ in EXCLUDE_TYPES
             and not any([ns in name for ns in INCLUDE_NAMESPACES])):
@@ -0,0 +1,94 @@
+"""store payloads as compressed blobs
+
+Revision ID: 5f0a8d2c91e3
+Revises: 3c9e1f7a2b64
+Create Date: 2026-10-18 19:06:33.718245
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+from hermes.utils.compression import decompress
+
+# revision identifiers, used by Alembic.
+revision: str = '5f0a8d2c91e3'
+down_revision: Union[str, None] = '3c9e1f7a2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# payload columns moved to the blob table
+COLUMNS = [('seismicityobservation', 'data'),
+           ('injectionobservation', 'data'),
+           ('injectionplan', 'data'),
+           ('injectionplan', 'template')]
+
+NOT_NULL = [('injectionobservation', 'data')]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'blob',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('encoding', sa.String(length=10), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('data', postgresql.BYTEA(), nullable=False),
+        sa.Column('oid', sa.UUID(), nullable=False),
+        sa.PrimaryKeyConstraint('oid', name=op.f('pk_blob')),
+        sa.UniqueConstraint('hash', name=op.f('uq_blob_hash')))
+
+    for table, column in COLUMNS:
+        op.add_column(table, sa.Column(f'{column}_hash', sa.String(length=64),
+                                       nullable=True))
+
+        # the existing payloads are kept uncompressed
+        op.execute(
+            f"INSERT INTO blob (oid, hash, encoding, size, data) "
+            f"SELECT DISTINCT ON (hash) gen_random_uuid(), hash, "
+            f"'identity', octet_length({column}), {column} "
+            f"FROM (SELECT encode(sha256({column}), 'hex') AS hash, "
+            f"{column} FROM {table} WHERE {column} IS NOT NULL) p "
+            f"ON CONFLICT (hash) DO NOTHING")
+        op.execute(
+            f"UPDATE {table} SET {column}_hash = "
+            f"encode(sha256({column}), 'hex') WHERE {column} IS NOT NULL")
+
+        op.create_index(op.f(f'ix_{table}_{column}_hash'),
+                        table, [f'{column}_hash'])
+        op.create_foreign_key(op.f(f'fk_{table}_{column}_hash_blob'),
+                              table, 'blob', [f'{column}_hash'], ['hash'])
+        op.drop_column(table, column)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    for table, column in COLUMNS:
+        op.add_column(table, sa.Column(column, postgresql.BYTEA(),
+                                       nullable=True))
+        op.execute(
+            f"UPDATE {table} t SET {column} = b.data FROM blob b "
+            f"WHERE b.hash = t.{column}_hash AND b.encoding = 'identity'")
+
+        compressed = bind.execute(sa.text(
+            f"SELECT b.hash, b.encoding, b.data FROM blob b "
+            f"WHERE b.encoding <> 'identity' AND EXISTS ("
+            f"SELECT 1 FROM {table} t WHERE t.{column}_hash = b.hash)"))
+        for hash, encoding, data in compressed.all():
+            bind.execute(
+                sa.text(f'UPDATE {table} SET {column} = :content '
+                        f'WHERE {column}_hash = :hash'),
+                {'content': decompress(data, encoding), 'hash': hash})
+
+        if (table, column) in NOT_NULL:
+            op.alter_column(table, column, existing_type=postgresql.BYTEA(),
+                            nullable=False)
+
+        op.drop_constraint(op.f(f'fk_{table}_{column}_hash_blob'),
+                           table, type_='foreignkey')
+        op.drop_index(op.f(f'ix_{table}_{column}_hash'), table_name=table)
+        op.drop_column(table, f'{column}_hash')
+
+    op.drop_table('blob')
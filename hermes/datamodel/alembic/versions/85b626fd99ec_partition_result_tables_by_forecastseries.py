@@ -0,0 +1,279 @@
+"""partition result tables by forecastseries
+
+Revision ID: 85b626fd99ec
+Revises: 1848c444a664
+Create Date: 2026-10-18 16:27:05.913482
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from geoalchemy2 import Geometry
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '85b626fd99ec'
+down_revision: Union[str, None] = '1848c444a664'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# referenced tables first
+TABLES = ['modelresult', 'eventforecast', 'grparameters',
+          'eventforecastcompact', 'eventforecastuncertainty']
+
+UNCERTAINTIES = ['uncertainty', 'loweruncertainty',
+                 'upperuncertainty', 'confidencelevel']
+
+# how to find the forecastseries of the existing rows of each table
+FORECASTSERIES = {
+    'modelresult': (
+        'COALESCE(f.forecastseries_oid, ts.forecastseries_oid)',
+        'LEFT JOIN modelrun r ON r.oid = o.modelrun_oid '
+        'LEFT JOIN forecast f ON f.oid = r.forecast_oid '
+        'LEFT JOIN timestep ts ON ts.oid = o.timestep_oid'),
+    'eventforecast': (
+        'p.forecastseries_oid',
+        'JOIN modelresult p ON p.oid = o.modelresult_oid'),
+    'grparameters': (
+        'p.forecastseries_oid',
+        'JOIN modelresult p ON p.oid = o.modelresult_oid'),
+    'eventforecastcompact': (
+        'p.forecastseries_oid',
+        'JOIN modelresult p ON p.oid = o.modelresult_oid'),
+    'eventforecastuncertainty': (
+        'p.forecastseries_oid',
+        'JOIN eventforecastcompact p ON p.oid = o.oid'),
+}
+
+
+def _quantity(name: str, value_type=sa.Float(), value: bool = True) \
+        -> list[sa.Column]:
+    columns = [sa.Column(f'{name}_value', value_type, nullable=True)] \
+        if value else []
+    return columns + [sa.Column(f'{name}_{u}', sa.Float(), nullable=True)
+                      for u in UNCERTAINTIES]
+
+
+def _create_tables(partitioned: bool) -> None:
+    kwargs = {'postgresql_partition_by': 'LIST (forecastseries_oid)'} \
+        if partitioned else {}
+    key = ['forecastseries_oid'] if partitioned else []
+
+    def forecastseries_oid() -> list[sa.Column]:
+        return [sa.Column('forecastseries_oid', sa.UUID(), nullable=False)] \
+            if partitioned else []
+
+    def parent_fk(table: str, column: str, parent: str) \
+            -> sa.ForeignKeyConstraint:
+        return sa.ForeignKeyConstraint(
+            [column] + key, [f'{parent}.oid'] + [f'{parent}.{k}' for k in key],
+            name=op.f(f'fk_{table}_{column}_{parent}'),
+            ondelete='CASCADE')
+
+    op.create_table(
+        'modelresult',
+        sa.Column('oid', sa.UUID(), nullable=False),
+        *forecastseries_oid(),
+        sa.Column('modelrun_oid', sa.UUID(), nullable=True),
+        sa.Column('realization_id', sa.Integer(), nullable=True),
+        sa.Column('result_type', sa.String(length=25), nullable=False),
+        sa.Column('timestep_oid', sa.UUID(), nullable=True),
+        sa.Column('gridcell_oid', sa.UUID(), nullable=True),
+        sa.Column('storage_uri', sa.String(), nullable=True),
+        sa.Column('event_count', sa.Integer(), nullable=True),
+        sa.Column('creationinfo_author', sa.String(), nullable=True),
+        sa.Column('creationinfo_agencyid', sa.String(), nullable=True),
+        sa.Column('creationinfo_creationtime',
+                  postgresql.TIMESTAMP(precision=0), nullable=True),
+        sa.Column('creationinfo_version', sa.String(), nullable=True),
+        *([sa.ForeignKeyConstraint(
+            ['forecastseries_oid'], ['forecastseries.oid'],
+            name=op.f('fk_modelresult_forecastseries_oid_forecastseries'),
+            ondelete='CASCADE')] if partitioned else []),
+        sa.ForeignKeyConstraint(
+            ['modelrun_oid'], ['modelrun.oid'],
+            name=op.f('fk_modelresult_modelrun_oid_modelrun'),
+            ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(
+            ['timestep_oid'], ['timestep.oid'],
+            name=op.f('fk_modelresult_timestep_oid_timestep'),
+            ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(
+            ['gridcell_oid'], ['gridcell.oid'],
+            name=op.f('fk_modelresult_gridcell_oid_gridcell'),
+            ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint(*key, 'oid', name=op.f('pk_modelresult')),
+        **kwargs)
+    op.create_index('idx_modelresult_oid', 'modelresult', ['oid'])
+    op.create_index(op.f('ix_modelresult_modelrun_oid'),
+                    'modelresult', ['modelrun_oid'])
+
+    op.create_table(
+        'eventforecast',
+        sa.Column('oid', sa.UUID(), nullable=False),
+        *forecastseries_oid(),
+        *_quantity('time', postgresql.TIMESTAMP()),
+        *_quantity('latitude'),
+        *_quantity('longitude'),
+        *_quantity('depth'),
+        *_quantity('magnitude'),
+        sa.Column('magnitude_type', sa.String(), nullable=True),
+        sa.Column('coordinates',
+                  Geometry(geometry_type='POINT', srid=4326,
+                           spatial_index=False),
+                  nullable=True),
+        sa.Column('modelresult_oid', sa.UUID(), nullable=True),
+        parent_fk('eventforecast', 'modelresult_oid', 'modelresult'),
+        sa.PrimaryKeyConstraint(*key, 'oid', name=op.f('pk_eventforecast')),
+        **kwargs)
+    op.create_index('idx_eventforecast_coordinates', 'eventforecast',
+                    ['coordinates'], postgresql_using='gist')
+    op.create_index(op.f('ix_eventforecast_modelresult_oid'),
+                    'eventforecast', ['modelresult_oid'])
+
+    op.create_table(
+        'grparameters',
+        sa.Column('oid', sa.UUID(), nullable=False),
+        *forecastseries_oid(),
+        *_quantity('number_events'),
+        *_quantity('a'),
+        *_quantity('b'),
+        *_quantity('mc'),
+        *_quantity('alpha'),
+        sa.Column('modelresult_oid', sa.UUID(), nullable=True),
+        parent_fk('grparameters', 'modelresult_oid', 'modelresult'),
+        sa.PrimaryKeyConstraint(*key, 'oid', name=op.f('pk_grparameters')),
+        **kwargs)
+    op.create_index(op.f('ix_grparameters_modelresult_oid'),
+                    'grparameters', ['modelresult_oid'])
+
+    op.create_table(
+        'eventforecastcompact',
+        sa.Column('oid', sa.BigInteger(), sa.Identity(always=False),
+                  nullable=False),
+        *forecastseries_oid(),
+        sa.Column('time_value', postgresql.TIMESTAMP(), nullable=True),
+        sa.Column('latitude_value', sa.REAL(), nullable=True),
+        sa.Column('longitude_value', sa.REAL(), nullable=True),
+        sa.Column('depth_value', sa.REAL(), nullable=True),
+        sa.Column('magnitude_value', sa.REAL(), nullable=True),
+        sa.Column('magnitude_type', sa.String(), nullable=True),
+        sa.Column('modelresult_oid', sa.UUID(), nullable=True),
+        parent_fk('eventforecastcompact', 'modelresult_oid', 'modelresult'),
+        sa.PrimaryKeyConstraint('oid', *key,
+                                name=op.f('pk_eventforecastcompact')),
+        **kwargs)
+    op.create_index(op.f('ix_eventforecastcompact_modelresult_oid'),
+                    'eventforecastcompact', ['modelresult_oid'])
+
+    op.create_table(
+        'eventforecastuncertainty',
+        sa.Column('oid', sa.BigInteger(), nullable=False),
+        *forecastseries_oid(),
+        *_quantity('time', value=False),
+        *_quantity('latitude', value=False),
+        *_quantity('longitude', value=False),
+        *_quantity('depth', value=False),
+        *_quantity('magnitude', value=False),
+        parent_fk('eventforecastuncertainty', 'oid', 'eventforecastcompact'),
+        sa.PrimaryKeyConstraint('oid', *key,
+                                name=op.f('pk_eventforecastuncertainty')),
+        **kwargs)
+
+
+def _rename_tables() -> None:
+    """
+    Rename the result tables to `<table>_old` and drop their constraints
+    and indexes, whose names are reused by the new tables.
+    """
+    bind = op.get_bind()
+    for table in TABLES:
+        op.rename_table(table, f'{table}_old')
+
+    # foreign keys first, they depend on the primary keys
+    for contype in ['f', 'p', 'u']:
+        for table in TABLES:
+            names = bind.execute(sa.text(
+                'SELECT conname FROM pg_constraint '
+                'WHERE conrelid = CAST(:table AS regclass) '
+                'AND contype = :contype'),
+                {'table': f'{table}_old', 'contype': contype}).scalars()
+            for name in names.all():
+                op.drop_constraint(name, f'{table}_old')
+
+    for table in TABLES:
+        names = bind.execute(sa.text(
+            'SELECT indexname FROM pg_indexes WHERE tablename = :table'),
+            {'table': f'{table}_old'}).scalars()
+        for name in names.all():
+            op.drop_index(name, table_name=f'{table}_old')
+
+
+def _copy_rows(table: str, partitioned: bool) -> None:
+    bind = op.get_bind()
+    columns = [c['name'] for c in sa.inspect(bind).get_columns(f'{table}_old')
+               if c['name'] != 'forecastseries_oid']
+    target = ', '.join(columns)
+    source = ', '.join(f'o.{c}' for c in columns)
+
+    if partitioned:
+        # rows which can't be attributed to a forecastseries are
+        # unreachable and not copied.
+        expression, joins = FORECASTSERIES[table]
+        op.execute(
+            f'INSERT INTO {table} ({target}, forecastseries_oid) '
+            f'SELECT {source}, {expression} FROM {table}_old o {joins} '
+            f'WHERE {expression} IS NOT NULL')
+    else:
+        op.execute(f'INSERT INTO {table} ({target}) '
+                   f'SELECT {source} FROM {table}_old o')
+
+    if table == 'eventforecastcompact':
+        op.execute(
+            "SELECT setval(pg_get_serial_sequence('eventforecastcompact', "
+            "'oid'), COALESCE(MAX(oid), 0) + 1, false) "
+            "FROM eventforecastcompact")
+
+
+def _drop_old_tables() -> None:
+    for table in reversed(TABLES):
+        op.drop_table(f'{table}_old')
+
+
+def upgrade() -> None:
+    _rename_tables()
+    _create_tables(partitioned=True)
+
+    # one partition per existing forecastseries
+    op.execute("""
+        DO $$
+        DECLARE
+            fs uuid;
+            t text;
+        BEGIN
+            FOR fs IN SELECT oid FROM forecastseries LOOP
+                FOREACH t IN ARRAY ARRAY['modelresult', 'eventforecast',
+                    'grparameters', 'eventforecastcompact',
+                    'eventforecastuncertainty']
+                LOOP
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF %I FOR VALUES IN (%L)',
+                        t || '_' || replace(fs::text, '-', ''), t, fs);
+                END LOOP;
+            END LOOP;
+        END $$;
+    """)
+
+    for table in TABLES:
+        _copy_rows(table, partitioned=True)
+    _drop_old_tables()
+
+
+def downgrade() -> None:
+    _rename_tables()
+    _create_tables(partitioned=False)
+    for table in TABLES:
+        _copy_rows(table, partitioned=False)
+    # drops the partitions as well
+    _drop_old_tables()
@@ -0,0 +1,32 @@
+"""add injectionplan cache key
+
+Revision ID: c2f7e4a91d36
+Revises: 5f0a8d2c91e3
+Create Date: 2026-10-18 22:07:35.318204
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2f7e4a91d36'
+down_revision: Union[str, None] = '5f0a8d2c91e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # existing plans aren't reused
+    op.add_column('injectionplan', sa.Column('cache_key',
+                                             sa.String(length=64),
+                                             nullable=True))
+    op.create_unique_constraint(op.f('uq_injectionplan_cache_key'),
+                                'injectionplan', ['cache_key'])
+
+
+def downgrade() -> None:
+    op.drop_constraint(op.f('uq_injectionplan_cache_key'),
+                       'injectionplan', type_='unique')
+    op.drop_column('injectionplan', 'cache_key')
@@ -0,0 +1,44 @@
+"""store injectionplan steps
+
+Revision ID: e3a8d15b7f42
+Revises: c2f7e4a91d36
+Create Date: 2026-10-18 23:12:48.913520
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a8d15b7f42'
+down_revision: Union[str, None] = 'c2f7e4a91d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('injectionplan', sa.Column('steps_hash',
+                                             sa.String(length=64),
+                                             nullable=True))
+    op.create_index(op.f('ix_injectionplan_steps_hash'),
+                    'injectionplan', ['steps_hash'])
+    op.create_foreign_key(op.f('fk_injectionplan_steps_hash_blob'),
+                          'injectionplan', 'blob', ['steps_hash'], ['hash'])
+
+
+def downgrade() -> None:
+    # plans stored only as steps would lose their samples
+    compact = op.get_bind().execute(sa.text(
+        'SELECT COUNT(*) FROM injectionplan '
+        'WHERE steps_hash IS NOT NULL AND data_hash IS NULL')).scalar()
+    if compact:
+        raise RuntimeError(f'{compact} injection plans are only stored as '
+                           'steps, delete them before downgrading.')
+
+    op.drop_constraint(op.f('fk_injectionplan_steps_hash_blob'),
+                       'injectionplan', type_='foreignkey')
+    op.drop_index(op.f('ix_injectionplan_steps_hash'),
+                  table_name='injectionplan')
+    op.drop_column('injectionplan', 'steps_hash')
+    # the steps blobs are removed by BlobRepository.delete_unreferenced
@@ -139,7 +139,8 @@ def QuantityMixin(name: str,
                   quantity_type: str,
                   column_prefix: str | None = None,
                   optional: bool = True,
-                  index: bool = False):
+                  index: bool = False,
+                  value: bool = True):
     """
     Mixin factory for common `Quantity` types from QuakeML.
 
@@ -160,6 +161,8 @@ def QuantityMixin(name: str,
                         `name` with an appended underscore `_` is used.
                         Capital Letters are converted to lowercase.
         optional:       Flag making the `value` field optional.
+        value:          Flag adding the `value` field, if `False` only
+                        the uncertainty fields are provided.
 
     The usage of `QuantityMixin` is illustrated below:
 
@@ -221,14 +224,17 @@ def QuantityMixin(name: str,
     def _confidence_level(cls):
         return Column('%sconfidencelevel' % column_prefix, Float)
 
-    _func_map = (('value',
-                  create_value(quantity_type, column_prefix, optional)),
-                 ('uncertainty', _uncertainty),
+    _func_map = (('uncertainty', _uncertainty),
                  ('loweruncertainty', _lower_uncertainty),
                  ('upperuncertainty', _upper_uncertainty),
                  ('confidencelevel', _confidence_level),
                  )
 
+    if value:
+        _func_map = (('value',
+                      create_value(quantity_type, column_prefix, optional)),
+                     *_func_map)
+
     def __dict__(func_map, attr_prefix):
 
         return {'{}{}'.format(attr_prefix, attr_name): attr
@@ -243,6 +249,9 @@ IntegerQuantityMixin = functools.partial(QuantityMixin,
                                          quantity_type='int')
 TimeQuantityMixin = functools.partial(QuantityMixin,
                                       quantity_type='time')
+UncertaintyMixin = functools.partial(QuantityMixin,
+                                     quantity_type='float',
+                                     value=False)
 ObservationEpochMixin = EpochMixin(name='observation',
                                    column_prefix='observation',
                                    epoch_type='open')
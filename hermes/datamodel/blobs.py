@@ -0,0 +1,115 @@
+import uuid
+
+from sqlalchemy import (BigInteger, Column, ForeignKey, LargeBinary, String,
+                        event, select)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.declarative import declared_attr
+from sqlalchemy.orm import Session, relationship
+
+from hermes.config import get_settings
+from hermes.datamodel.base import ORMBase
+from hermes.utils.compression import compress, content_hash, decompress
+
+# instance attributes holding the uncompressed contents, by hash
+_PENDING = '_blobs_pending'
+_CACHE = '_blobs_cache'
+
+
+class BlobTable(ORMBase):
+    """
+    Compressed, content addressed payloads, eg. QuakeML or hydJSON.
+    """
+    hash = Column(String(64), nullable=False, unique=True)
+    encoding = Column(String(10), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+
+
+def BlobMixin(name: str) -> type[object]:
+    """
+    Mixin factory for an attribute whose content is stored in the
+    `blob` table.
+
+    Every distinct content is stored once, compressed with
+    `BLOB_COMPRESSION`, and referenced by its hash in the column
+    `<name>_hash`. The attribute `name` reads and assigns the
+    uncompressed content, the blob is inserted on flush.
+
+    Args:
+        name: Name of the attribute.
+
+    Returns:
+        A mixin class with the attributes `name`, `<name>_hash` and
+        `<name>_blob`.
+    """
+    hash_name = f'{name}_hash'
+    blob_name = f'{name}_blob'
+
+    @declared_attr
+    def _hash(cls):
+        return Column(String(64), ForeignKey('blob.hash'), index=True)
+
+    @declared_attr
+    def _blob(cls):
+        return relationship('BlobTable',
+                            foreign_keys=f'{cls.__name__}.{hash_name}',
+                            viewonly=True,
+                            lazy='joined')
+
+    def _get(self) -> bytes | None:
+        hash = getattr(self, hash_name)
+        if hash is None:
+            return None
+        cache = self.__dict__.setdefault(_CACHE, {})
+        if hash not in cache:
+            blob = getattr(self, blob_name)
+            cache[hash] = decompress(blob.data, blob.encoding)
+        return cache[hash]
+
+    def _set(self, content: bytes | str | None) -> None:
+        if content is None:
+            setattr(self, hash_name, None)
+            return
+        if isinstance(content, str):
+            content = content.encode()
+        hash = content_hash(content)
+        setattr(self, hash_name, hash)
+        self.__dict__.setdefault(_CACHE, {})[hash] = content
+        self.__dict__.setdefault(_PENDING, {})[hash] = content
+
+    return type(f'{name.capitalize()}BlobMixin', (object,),
+                {hash_name: _hash,
+                 blob_name: _blob,
+                 name: property(_get, _set)})
+
+
+@event.listens_for(Session, 'before_flush')
+def _insert_pending_blobs(session: Session, flush_context, instances) -> None:
+    pending = {}
+    for instance in [*session.new, *session.dirty]:
+        pending.update(instance.__dict__.pop(_PENDING, {}))
+    if not pending:
+        return
+
+    # identical contents are only compressed and stored once. Existing
+    # blobs are locked, so they can't be deleted before the references
+    # to them are committed.
+    existing = session.execute(
+        select(BlobTable.hash)
+        .where(BlobTable.hash.in_(pending.keys()))
+        .with_for_update(key_share=True)).scalars().all()
+    for hash in existing:
+        del pending[hash]
+    if not pending:
+        return
+
+    encoding = get_settings().BLOB_COMPRESSION
+    session.execute(
+        insert(BlobTable)
+        .values([{'oid': uuid.uuid4(),
+                  'hash': hash,
+                  'encoding': encoding,
+                  'size': len(content),
+                  'data': compress(content, encoding)}
+                 for hash, content in pending.items()])
+        .on_conflict_do_nothing(index_elements=['hash']))
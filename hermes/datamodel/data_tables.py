@@ -1,17 +1,27 @@
 
 from geoalchemy2 import Geometry
-from sqlalchemy import (Column, ForeignKey, Index, Integer, LargeBinary,
-                        String, Table, UniqueConstraint)
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (Column, ForeignKey, Index, Integer, String, Table,
+                        UniqueConstraint, text)
+from sqlalchemy.dialects.postgresql import TIMESTAMP, UUID
 from sqlalchemy.orm import relationship
 
 from hermes.datamodel.base import ORMBase, RealQuantityMixin, TimeQuantityMixin
+from hermes.datamodel.blobs import BlobMixin
 
 
-class InjectionPlanTable(ORMBase):
+class InjectionPlanTable(BlobMixin('data'),
+                         BlobMixin('template'),
+                         BlobMixin('steps'),
+                         ORMBase):
+    # generated plans are stored compactly as steps (breakpoints of the
+    # plan, see hermes.io.injectionplans.expand_steps) instead of data,
+    # and only expanded to their samples when needed.
     name = Column(String, nullable=False)
-    data = Column(LargeBinary)
-    template = Column(LargeBinary)
+
+    # identifies plans generated from the same template, time window
+    # and observation, which are shared by the forecasts instead of
+    # being generated again.
+    cache_key = Column(String(64), unique=True)
 
     forecastseries_oid = Column(UUID, ForeignKey('forecastseries.oid',
                                                  ondelete="CASCADE"),
@@ -26,8 +36,7 @@ class InjectionPlanTable(ORMBase):
     )
 
 
-class InjectionObservationTable(ORMBase):
-    data = Column(LargeBinary, nullable=False)
+class InjectionObservationTable(BlobMixin('data'), ORMBase):
 
     forecast_oid = Column(UUID, ForeignKey('forecast.oid',
                                            ondelete="CASCADE"),
@@ -36,8 +45,17 @@ class InjectionObservationTable(ORMBase):
                             back_populates='injectionobservation')
 
 
-class SeismicityObservationTable(ORMBase):
-    data = Column(LargeBinary, nullable=False)
+class SeismicityObservationTable(BlobMixin('data'), ORMBase):
+    # data is either the QuakeML of the observation, or None for a
+    # snapshot of the observed events of the forecastseries between
+    # starttime and endtime, as they were known at snapshot_time.
+
+    forecastseries_oid = Column(UUID, ForeignKey('forecastseries.oid',
+                                                 ondelete="CASCADE"),
+                                index=True)
+    starttime = Column(TIMESTAMP(precision=0))
+    endtime = Column(TIMESTAMP(precision=0))
+    snapshot_time = Column(TIMESTAMP)
 
     forecast_oid = Column(UUID, ForeignKey('forecast.oid',
                                            ondelete="CASCADE"),
@@ -68,9 +86,21 @@ class EventObservationTable(TimeQuantityMixin('time'),
     usedstationcount = Column(Integer)
     coordinates = Column(Geometry('POINT', srid=4326))
 
+    # versioned events of the observation store of a forecastseries,
+    # a version is valid from valid_from until valid_to (exclusive).
+    forecastseries_oid = Column(UUID, ForeignKey('forecastseries.oid',
+                                                 ondelete="CASCADE"),
+                                index=True)
+    public_id = Column(String)
+    valid_from = Column(TIMESTAMP)
+    valid_to = Column(TIMESTAMP)
+
     __table_args__ = (
         Index('idx_eventobservation_time_value', 'time_value',
               postgresql_using='brin'),
+        Index('idx_eventobservation_current', 'forecastseries_oid',
+              'public_id', unique=True,
+              postgresql_where=text('valid_to IS NULL')),
     )
 
 
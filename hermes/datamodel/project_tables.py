@@ -126,6 +126,8 @@ class ModelConfigTable(ORMBase, NameMixin):
     description = Column(String)
     enabled = Column(Boolean, default=True)
     result_type = Column(String(15), nullable=False)
+    catalog_layout = Column(String(15), nullable=False,
+                            default='DEFAULT', server_default='DEFAULT')
 
     # The model should be called by sfm_module.sfm_function(*args)
     sfm_module = Column(String)
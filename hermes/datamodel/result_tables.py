@@ -1,14 +1,32 @@
 from geoalchemy2 import Geometry
 from geoalchemy2.shape import from_shape, to_shape
-from sqlalchemy import (Column, Float, ForeignKey, Index, Integer, String,
+from sqlalchemy import (BigInteger, Column, Float, ForeignKey,
+                        ForeignKeyConstraint, Identity, Index, Integer, String,
                         UniqueConstraint, delete, event, select)
-from sqlalchemy.dialects.postgresql import TIMESTAMP, UUID
+from sqlalchemy.dialects.postgresql import REAL, TIMESTAMP, UUID
 from sqlalchemy.orm import relationship
 
 from hermes.datamodel.base import (CreationInfoMixin, ORMBase,
-                                   RealQuantityMixin, TimeQuantityMixin)
+                                   RealQuantityMixin, TimeQuantityMixin,
+                                   UncertaintyMixin)
 from hermes.datamodel.data_tables import InjectionPlanTable
 
+# The result tables are partitioned by forecastseries, a partition per
+# forecastseries is created with it and dropped instead of deleting its
+# results row by row. Ordered such that referenced tables come first.
+PARTITIONED_TABLES = ['modelresult', 'eventforecast', 'grparameters',
+                      'eventforecastcompact', 'eventforecastuncertainty']
+
+PARTITION_BY = {'postgresql_partition_by': 'LIST (forecastseries_oid)'}
+
+
+def modelresult_foreign_key() -> ForeignKeyConstraint:
+    # unique keys of a partitioned table must contain the partition key
+    return ForeignKeyConstraint(
+        ['modelresult_oid', 'forecastseries_oid'],
+        ['modelresult.oid', 'modelresult.forecastseries_oid'],
+        ondelete='CASCADE')
+
 
 class TimeStepTable(ORMBase):
     starttime = Column(TIMESTAMP(precision=0), nullable=False)
@@ -61,6 +79,11 @@ event.listen(GridCellTable, 'before_update', set_unique_geom)
 
 class ModelResultTable(CreationInfoMixin, ORMBase):
 
+    forecastseries_oid = Column(UUID,
+                                ForeignKey('forecastseries.oid',
+                                           ondelete='CASCADE'),
+                                primary_key=True)
+
     modelrun_oid = Column(UUID,
                           ForeignKey('modelrun.oid', ondelete='CASCADE'),
                           index=True)
@@ -82,6 +105,10 @@ class ModelResultTable(CreationInfoMixin, ORMBase):
     gridcell = relationship('GridCellTable',
                             back_populates='modelresults')
 
+    # location of the results if they are not stored in the database
+    storage_uri = Column(String)
+    event_count = Column(Integer)
+
     eventforecasts = relationship('EventForecastTable',
                                   back_populates='modelresult',
                                   cascade='all, delete-orphan',
@@ -94,6 +121,7 @@ class ModelResultTable(CreationInfoMixin, ORMBase):
 
     __table_args__ = (
         Index('idx_modelresult_oid', 'oid'),
+        PARTITION_BY
     )
 
 
@@ -106,15 +134,61 @@ class EventForecastTable(TimeQuantityMixin('time'),
     magnitude_type = Column(String)
     coordinates = Column(Geometry('POINT', srid=4326))
 
-    modelresult_oid = Column(UUID,
-                             ForeignKey('modelresult.oid',
-                                        ondelete='CASCADE'),
-                             index=True)
+    forecastseries_oid = Column(UUID, primary_key=True)
+    modelresult_oid = Column(UUID, index=True)
 
     modelresult = relationship(
         'ModelResultTable',
         back_populates='eventforecasts')
 
+    __table_args__ = (
+        modelresult_foreign_key(),
+        PARTITION_BY
+    )
+
+
+class EventForecastCompactTable(ORMBase):
+    """
+    Compact layout of EventForecastTable, storing only the values of the
+    quantities with single precision where possible. Uncertainties are
+    stored in EventForecastUncertaintyTable if a model provides them.
+    """
+    oid = Column(BigInteger, Identity(), primary_key=True)
+
+    time_value = Column(TIMESTAMP)
+    latitude_value = Column(REAL)
+    longitude_value = Column(REAL)
+    depth_value = Column(REAL)
+    magnitude_value = Column(REAL)
+    magnitude_type = Column(String)
+
+    forecastseries_oid = Column(UUID, primary_key=True)
+    modelresult_oid = Column(UUID, index=True)
+
+    __table_args__ = (
+        modelresult_foreign_key(),
+        PARTITION_BY
+    )
+
+
+class EventForecastUncertaintyTable(UncertaintyMixin('time'),
+                                    UncertaintyMixin('latitude'),
+                                    UncertaintyMixin('longitude'),
+                                    UncertaintyMixin('depth'),
+                                    UncertaintyMixin('magnitude'),
+                                    ORMBase):
+    oid = Column(BigInteger, primary_key=True)
+    forecastseries_oid = Column(UUID, primary_key=True)
+
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ['oid', 'forecastseries_oid'],
+            ['eventforecastcompact.oid',
+             'eventforecastcompact.forecastseries_oid'],
+            ondelete='CASCADE'),
+        PARTITION_BY
+    )
+
 
 class ModelRunTable(ORMBase):
 
@@ -154,6 +228,13 @@ def delete_orphaned_injectionplans(mapper, connection, target):
     # Check if the modelrun had an injectionplan
     if target.injectionplan_oid is None:
         return
+    # Wait for forecasts which found the plan to commit their ModelRuns
+    locked = connection.execute(
+        select(InjectionPlanTable.oid)
+        .where(InjectionPlanTable.oid == target.injectionplan_oid)
+        .with_for_update()).first()
+    if locked is None:
+        return
     # Check if there are any remaining references
     stmt = select(ModelRunTable) \
         .filter_by(injectionplan_oid=target.injectionplan_oid)
@@ -171,8 +252,13 @@ class GRParametersTable(RealQuantityMixin('number_events'),
                         RealQuantityMixin('mc'),
                         RealQuantityMixin('alpha'),
                         ORMBase):
-    modelresult_oid = Column(UUID, ForeignKey(
-        'modelresult.oid', ondelete='CASCADE'), index=True)
+    forecastseries_oid = Column(UUID, primary_key=True)
+    modelresult_oid = Column(UUID, index=True)
     modelresult = relationship(
         'ModelResultTable',
         back_populates='grparameters')
+
+    __table_args__ = (
+        modelresult_foreign_key(),
+        PARTITION_BY
+    )
@@ -2,31 +2,39 @@ import asyncio
 import json
 import logging
 from datetime import datetime, timedelta
-from time import sleep
 from typing import Literal
 from uuid import UUID
 
+from hydws.parser import BoreholeHydraulics
 from prefect import flow, get_run_logger, runtime, task
-from prefect.client.orchestration import get_client
 from prefect.deployments import run_deployment
+from sqlalchemy.orm import Session
 
+from hermes.config import get_settings
 from hermes.flows.modelrun_builder import ModelRunBuilder
 from hermes.flows.modelrun_handler import default_model_runner
+from hermes.flows.modelrun_pool import run_modelruns_parallel
 from hermes.io.hydraulics import HydraulicsDataSource
-from hermes.io.injectionplans import InjectionPlanBuilder
+from hermes.io.injectionplans import (InjectionPlanBuilder,
+                                      build_injectionplans, plan_cache_key)
 from hermes.io.seismicity import SeismicityDataSource
-from hermes.repositories.data import (InjectionObservationRepository,
+from hermes.repositories.data import (EventObservationRepository,
+                                      InjectionObservationRepository,
                                       InjectionPlanRepository,
                                       SeismicityObservationRepository)
 from hermes.repositories.database import DatabaseSession
 from hermes.repositories.project import (ForecastRepository,
                                          ForecastSeriesRepository)
+from hermes.repositories.results import ModelRunRepository
+from hermes.repositories.types import DuplicateError
 from hermes.schemas import Forecast
 from hermes.schemas.base import EInput, EStatus
-from hermes.schemas.data_schemas import InjectionObservation, InjectionPlan
+from hermes.schemas.data_schemas import InjectionPlan, SeismicityObservation
 from hermes.schemas.model_schemas import ModelConfig
 from hermes.schemas.project_schemas import ForecastSeries
-from hermes.utils.prefect import futures_wait
+from hermes.schemas.result_schemas import ModelRun
+from hermes.utils.prefect import final_flow_runs, futures_wait
+from hermes.utils.write_behind import WriteBehind
 
 
 class ForecastHandler:
@@ -51,6 +59,7 @@ class ForecastHandler:
         self.forecast: Forecast = None
         self.catalog_data_source: SeismicityDataSource = None
         self.hydraulic_data_source: HydraulicsDataSource = None
+        self.injection_observation: list[BoreholeHydraulics] | None = None
 
         with DatabaseSession() as session:
             self.forecastseries: ForecastSeries = \
@@ -81,11 +90,7 @@ class ForecastHandler:
             # necessary to raise exceptions from the tasks if any failed
             [task_so.result(), task_io.result()]
 
-            self._create_injectionplan()
-
-            self.builder = ModelRunBuilder(self.forecast,
-                                           self.forecastseries,
-                                           self.modelconfigs)
+            self._create_modelruns()
         except BaseException as e:
             with DatabaseSession() as session:
                 ForecastRepository.update_status(session, self.forecast.oid,
@@ -93,7 +98,16 @@ class ForecastHandler:
             raise e
 
     @task(name='SubmitModelRuns', cache_policy=None)
-    def run(self, mode: Literal['local', 'deploy'] = 'local') -> None:
+    def run(self,
+            mode: Literal['local', 'local-parallel', 'deploy'] = 'local',
+            workers: int | None = None) -> None:
+        """
+        Run the model runs of the forecast.
+
+        In 'local' mode one after another in this process, in
+        'local-parallel' mode in `workers` processes (default
+        `LOCAL_PARALLEL_WORKERS`), in 'deploy' mode as deployments.
+        """
         if not self.builder.runs:
             self.logger.warning('No modelruns to run.')
             with DatabaseSession() as session:
@@ -106,11 +120,11 @@ class ForecastHandler:
                 ForecastRepository.update_status(session, self.forecast.oid,
                                                  EStatus.RUNNING)
             if mode == 'local':
-                for run in self.builder.runs:
-                    default_model_runner(*run)
+                self._run_local()
+            elif mode == 'local-parallel':
+                self._run_local_parallel(workers)
             else:
                 running = []
-                is_final = [False]
 
                 for run in self.builder.runs:
                     running.append(run_deployment(
@@ -120,10 +134,15 @@ class ForecastHandler:
                         timeout=0
                     ))
 
-                while not all(is_final):
-                    is_final = [asyncio.run(check_flow_run_is_final(r.id))
-                                for r in running]
-                    sleep(10)
+                try:
+                    asyncio.run(self._wait_for_modelruns(
+                        [r.id for r in running]))
+                finally:
+                    # runs whose flow run crashed, and the results
+                    # left behind by failed runs
+                    with DatabaseSession() as session:
+                        ModelRunRepository.fail_unfinished(
+                            session, self.forecast.oid)
 
         except BaseException as e:
             with DatabaseSession() as session:
@@ -135,6 +154,47 @@ class ForecastHandler:
             ForecastRepository.update_status(session, self.forecast.oid,
                                              EStatus.COMPLETED)
 
+    async def _wait_for_modelruns(self, flow_run_ids: list[UUID]) -> None:
+        async for flow_run in final_flow_runs(flow_run_ids):
+            self.logger.info(f'ModelRun {flow_run.name} finished: '
+                             f'{flow_run.state.name}.')
+
+    def _run_local_parallel(self, workers: int | None) -> None:
+        if workers is None:
+            workers = get_settings().LOCAL_PARALLEL_WORKERS
+        try:
+            failed = run_modelruns_parallel(
+                self.builder.runs, workers, self.logger)
+        finally:
+            # runs whose worker process crashed
+            with DatabaseSession() as session:
+                ModelRunRepository.fail_unfinished(session, self.forecast.oid)
+        if failed:
+            raise RuntimeError(f'{len(failed)} of {len(self.builder.runs)} '
+                               f'ModelRuns failed: {", ".join(failed)}.')
+
+    def _run_local(self) -> None:
+        write_behind = get_settings().RESULTS_WRITE_BEHIND
+        if not write_behind:
+            for run in self.builder.runs:
+                default_model_runner(*run)
+            return
+
+        # the next model runs while the results of the previous
+        # ones are still being written.
+        try:
+            with WriteBehind(write_behind) as writer:
+                for run in self.builder.runs:
+                    runner = default_model_runner(*run, write_behind=True)
+                    # lazy results were already saved by the model run
+                    if runner.results is not None:
+                        writer.submit(runner.save)
+        except BaseException:
+            # the writes queued after a failed one are skipped
+            with DatabaseSession() as session:
+                ModelRunRepository.fail_unfinished(session, self.forecast.oid)
+            raise
+
     @task(name='CreateForecast', cache_policy=None)
     def _create_forecast(self) -> None:
         """
@@ -161,20 +221,70 @@ class ForecastHandler:
             self.forecast.seismicity_observation = None
             return None
 
+        if get_settings().SEISMICITY_OBSERVATION_STORE:
+            self.forecast.seismicity_observation = \
+                self._snapshot_seismicityobservation()
+            return None
+
         self.catalog_data_source = SeismicityDataSource.from_uri(
             self.forecastseries.fdsnws_url,
             self.observation_starttime,
             self.observation_endtime
         )
 
+        # the events are stored from the parsed catalog, next to the
+        # original QuakeML.
         with DatabaseSession() as session:
             self.forecast.seismicity_observation = \
-                SeismicityObservationRepository.create_from_quakeml(
+                SeismicityObservationRepository.create_from_catalog(
                     session,
-                    self.catalog_data_source.get_quakeml(),
-                    self.forecast.oid
+                    self.catalog_data_source.get_catalog(),
+                    self.forecast.oid,
+                    quakeml=self.catalog_data_source.get_quakeml()
                 )
 
+    def _snapshot_seismicityobservation(self) -> SeismicityObservation:
+        """
+        Fetches the events which are not in the observation store of the
+        forecastseries yet, or may have been revised since, and creates
+        a snapshot of the store for the forecast.
+        """
+        lookback = timedelta(
+            seconds=get_settings().SEISMICITY_REVISION_LOOKBACK)
+        starttime = self.observation_starttime
+        endtime = self.observation_endtime
+
+        with DatabaseSession() as session:
+            coverage = SeismicityObservationRepository.get_store_coverage(
+                session, self.forecastseries.oid)
+
+        # the fetched ranges always extend the stored range, so that it
+        # doesn't have gaps.
+        if coverage is None:
+            ranges = [(starttime, endtime)]
+        else:
+            ranges = []
+            if starttime < coverage[0]:
+                ranges.append((starttime, coverage[0]))
+            if endtime > coverage[1] - lookback:
+                ranges.append(
+                    (max(coverage[0], coverage[1] - lookback), endtime))
+
+        catalogs = [SeismicityDataSource.from_uri(
+            self.forecastseries.fdsnws_url, start, end).get_catalog()
+            for start, end in ranges]
+
+        with DatabaseSession() as session:
+            snapshot_time = EventObservationRepository.lock_store(
+                session, self.forecastseries.oid)
+            for (start, end), catalog in zip(ranges, catalogs):
+                EventObservationRepository.merge_into_store(
+                    session, self.forecastseries.oid, catalog,
+                    start, end, snapshot_time, commit=False)
+            return SeismicityObservationRepository.create_snapshot(
+                session, self.forecast.oid, self.forecastseries.oid,
+                starttime, endtime, snapshot_time)
+
     @task(name='CreateInjectionObservation', cache_policy=None)
     def _create_injectionobservation(self) -> None:
         """
@@ -191,59 +301,102 @@ class ForecastHandler:
             self.observation_endtime
         )
 
-        self.injection_observation = InjectionObservation(
-            forecast_oid=self.forecast.oid,
-            data=self.hydraulic_data_source.get_json()
-        )
+        # kept to build the injection plans without reading them again
+        self.injection_observation = \
+            self.hydraulic_data_source.get_hydraulics()
         with DatabaseSession() as session:
             self.forecast.injection_observation = \
-                InjectionObservationRepository.create(
+                InjectionObservationRepository.create_from_hydraulics(
                     session,
-                    self.injection_observation
+                    self.injection_observation,
+                    self.forecast.oid
                 )
 
-    @task(name='CreateInjectionPlan', cache_policy=None)
-    def _create_injectionplan(self) -> None:
+    @task(name='CreateModelRuns', cache_policy=None)
+    def _create_modelruns(self) -> None:
+        """
+        Gets the injection plans and creates the ModelRuns using them.
+
+        Both happen in one transaction, so that a plan shared with an
+        other forecast can't be deleted together with that forecast
+        before the ModelRuns of this forecast reference it.
+        """
+        with DatabaseSession() as session:
+            self.forecastseries.injection_plans = \
+                self._create_injectionplan(session)
+
+            self.builder = ModelRunBuilder(self.forecast,
+                                           self.forecastseries,
+                                           self.modelconfigs)
+
+            for modelrun_info, modelconfig in self.builder.runs:
+                modelrun_info.modelrun_oid = ModelRunRepository.create(
+                    session,
+                    ModelRun(status=EStatus.SCHEDULED,
+                             modelconfig_oid=modelconfig.oid,
+                             forecast_oid=self.forecast.oid,
+                             injectionplan_oid=modelrun_info
+                             .injection_plan_oid),
+                    commit=False).oid
+            session.commit()
+
+    def _create_injectionplan(self, session: Session) \
+            -> list[InjectionPlan] | None:
         """
-        Gets the injection plan data and stores it to the database.
+        Gets the injection plans of the forecast, reusing identical
+        plans of earlier forecasts and building the missing ones.
+        Nothing is committed, the reused plans stay locked until the
+        transaction ends.
         """
         if self.forecastseries.injectionplan_required == \
                 EInput.NOT_ALLOWED:
-            self.forecastseries.injection_plans = None
             return None
 
-        with DatabaseSession() as session:
-            injection_plans = \
-                InjectionPlanRepository.get_by_forecastseries(
-                    session,
-                    self.forecastseries.oid
-                )
-
-            if not injection_plans:
-                if self.forecastseries.injectionplan_required == \
-                        EInput.OPTIONAL:
-                    self.forecastseries.injection_plans = None
-                    return None
-                else:
-                    raise ValueError('No injection plans found for the '
-                                     'ForecastSeries.')
-
-            for idx, ip in enumerate(injection_plans):
-                ip_builder = InjectionPlanBuilder(
-                    json.loads(ip.template),
-                    json.loads(self.forecast.injection_observation.data))
-                plan = ip_builder.build(self.starttime, self.endtime)
-
-                new_ip = InjectionPlan(
-                    name=ip.name,
-                    data=json.dumps([plan]),
-                    template=ip.template
-                )
+        injection_plans = \
+            InjectionPlanRepository.get_by_forecastseries(
+                session,
+                self.forecastseries.oid
+            )
 
-                injection_plans[idx] = InjectionPlanRepository.create(
-                    session, new_ip)
-
-        self.forecastseries.injection_plans = injection_plans
+        if not injection_plans:
+            if self.forecastseries.injectionplan_required == \
+                    EInput.OPTIONAL:
+                return None
+            else:
+                raise ValueError('No injection plans found for the '
+                                 'ForecastSeries.')
+
+        templates = [json.loads(ip.template) for ip in injection_plans]
+        keys = [plan_cache_key(t, ip.name, self.injection_observation,
+                               self.starttime, self.endtime)
+                for t, ip in zip(templates, injection_plans)]
+
+        # identical plans of earlier forecasts are reused
+        cached = InjectionPlanRepository.get_by_cache_keys(
+            session, keys, lock=True)
+        missing = [i for i, k in enumerate(keys) if k not in cached]
+
+        # the observation is shared by all plans
+        plans = build_injectionplans(
+            [templates[i] for i in missing],
+            self.injection_observation,
+            self.starttime,
+            self.endtime)
+
+        for i, plan in zip(missing, plans):
+            ip = injection_plans[i]
+            try:
+                with session.begin_nested():
+                    cached[keys[i]] = \
+                        InjectionPlanRepository.create_from_steps(
+                            session, [plan], ip.name, template=ip.template,
+                            cache_key=keys[i], commit=False)
+            except DuplicateError:
+                # created by a concurrent forecast in the meantime
+                cached.update(InjectionPlanRepository.get_by_cache_keys(
+                    session, [keys[i]], lock=True))
+
+        return [cached[k] for k in keys]
 
     def _build_injectionplan(self) -> None:
         """
@@ -373,17 +526,10 @@ def generate_flow_run_name():
 def forecast_runner(forecastseries_oid: UUID,
                     starttime: datetime | None = None,
                     endtime: datetime | None = None,
-                    mode: Literal['local', 'deploy'] = 'local') \
+                    mode: Literal['local', 'local-parallel',
+                                  'deploy'] = 'local',
+                    workers: int | None = None) \
         -> ForecastHandler:
     forecasthandler = ForecastHandler(forecastseries_oid, starttime, endtime)
-    forecasthandler.run(mode)
+    forecasthandler.run(mode, workers)
     return forecasthandler
-
-
-async def check_flow_run_is_final(flow_run_id: UUID) -> bool:
-    """
-    Check if a flow run is in a final state.
-    """
-    async with get_client() as client:
-        flow_run = await client.read_flow_run(flow_run_id=flow_run_id)
-        return flow_run.state.is_final()
@@ -213,7 +213,10 @@ class ForecastSeriesScheduler:
 
         self._unset_schedule()
 
-    def run_past_forecasts(self, mode: Literal['local', 'deploy'] = 'local'):
+    def run_past_forecasts(
+            self,
+            mode: Literal['local', 'local-parallel', 'deploy'] = 'local',
+            workers: int | None = None):
         """
         If the forecast has a start time in the past, calculate the past
         forecast start and endtimes.
@@ -231,11 +234,12 @@ class ForecastSeriesScheduler:
 
         past_dates = list(self._build_rrule('past'))
 
-        if mode == 'local':
+        if mode in ('local', 'local-parallel'):
             for d in past_dates:
                 forecast_runner(self.forecastseries.oid,
                                 starttime=d,
-                                mode=mode)
+                                mode=mode,
+                                workers=workers)
         elif mode == 'deploy':
             for d in past_dates:
                 run_deployment(
@@ -2,15 +2,16 @@ import importlib
 import json
 import logging
 from abc import abstractmethod
-from typing import Any
+from typing import Any, Iterable, Iterator, TypeVar
 
 from hermes_model import ModelInput
 from prefect import flow, get_run_logger, task
 from seismostats import ForecastCatalog, ForecastGRRateGrid
 
-from hermes.actions.save_results import (
-    save_forecast_catalog_to_repositories,
-    save_forecast_grrategrid_to_repositories)
+from hermes.actions.save_results import (ParallelResultsUnitOfWork,
+                                         ResultsUnitOfWork)
+from hermes.config import get_settings
+from hermes.io.injectionplans import injectionplan_hydjson
 from hermes.repositories.data import (InjectionObservationRepository,
                                       InjectionPlanRepository,
                                       SeismicityObservationRepository)
@@ -19,6 +20,36 @@ from hermes.repositories.results import ModelRunRepository
 from hermes.schemas.base import EResultType, EStatus
 from hermes.schemas.model_schemas import DBModelRunInfo, ModelConfig
 from hermes.schemas.result_schemas import ModelRun
+from hermes.utils.iterators import prefetch
+
+T = TypeVar('T')
+
+# Model functions can return a list of results, or an iterator (eg. a
+# generator) which yields single results or lists of results.
+ModelResults = T | Iterable[T] | Iterable[list[T]]
+
+
+def iter_results(results: ModelResults[T], result_type: type[T]) \
+        -> Iterator[T]:
+    """
+    Iterate over the single results returned by a model function.
+
+    Args:
+        results: Return value of the model function.
+        result_type: Type of a single result.
+
+    Returns:
+        Iterator over the single results, consuming `results` lazily.
+    """
+    # results are DataFrames, which would iterate over their columns
+    if isinstance(results, result_type):
+        yield results
+        return
+    for item in results:
+        if isinstance(item, result_type):
+            yield item
+        else:
+            yield from item
 
 
 class ModelRunHandlerInterface:
@@ -89,7 +120,7 @@ class ModelRunHandlerInterface:
         raise NotImplementedError
 
     @abstractmethod
-    def _save_catalog(self, results: list[ForecastCatalog]) -> None:
+    def _save_catalog(self, results: ModelResults[ForecastCatalog]) -> None:
         raise NotImplementedError
 
     @abstractmethod
@@ -97,7 +128,8 @@ class ModelRunHandlerInterface:
         raise NotImplementedError
 
     @abstractmethod
-    def _save_grid(self, results: list[ForecastGRRateGrid]) -> None:
+    def _save_grid(self,
+                   results: ModelResults[ForecastGRRateGrid]) -> None:
         raise NotImplementedError
 
 
@@ -108,13 +140,33 @@ class DefaultModelRunHandler(ModelRunHandlerInterface):
         super().__init__(*args, **kwargs)
 
     @task(name='RunModel', cache_policy=None)
-    def run(self) -> None:
+    def run(self, save: bool = True) -> None:
+        """
+        Run the model and save its results.
+
+        If `save` is False, the results are kept and only saved by
+        calling `save`, eg. from a write-behind queue. The ModelRun is
+        only completed once its results are saved. Results returned as
+        iterator are still saved right away, as the model only computes
+        them while they are saved.
+        """
         try:
             model_module = importlib.import_module(self.modelconfig.sfm_module)
             model_function = getattr(
                 model_module, self.modelconfig.sfm_function)
-            results = model_function(self.model_input.model_dump())
-            self.save_results[self.modelconfig.result_type](results)
+            self.results = model_function(self._model_input_dict())
+        except BaseException as e:
+            ModelRunRepository.update_status(
+                self.session, self.modelrun.oid, EStatus.FAILED)
+            raise e
+
+        # compute lazy results inside the flow run of the model
+        if save or isinstance(self.results, Iterator):
+            self.save()
+
+    def save(self) -> None:
+        try:
+            self.save_results[self.modelconfig.result_type](self.results)
         except BaseException as e:
             ModelRunRepository.update_status(
                 self.session, self.modelrun.oid, EStatus.FAILED)
@@ -122,6 +174,8 @@ class DefaultModelRunHandler(ModelRunHandlerInterface):
         else:
             ModelRunRepository.update_status(
                 self.session, self.modelrun.oid, EStatus.COMPLETED)
+        finally:
+            self.results = None
 
     def __del__(self):
         try:
@@ -130,6 +184,10 @@ class DefaultModelRunHandler(ModelRunHandlerInterface):
             pass
 
     def _create_modelrun(self) -> None:
+        if self.modelrun_info.modelrun_oid is not None:
+            return ModelRunRepository.get_by_id(
+                self.session, self.modelrun_info.modelrun_oid)
+
         modelrun = ModelRun(
             status=EStatus.SCHEDULED,
             modelconfig_oid=self.modelconfig.oid,
@@ -152,38 +210,65 @@ class DefaultModelRunHandler(ModelRunHandlerInterface):
             return None
         plan = InjectionPlanRepository.get_by_id(
             self.session, self.modelrun_info.injection_plan_oid)
-        return json.loads(plan.data)
+        return json.loads(injectionplan_hydjson(plan))
+
+    def _model_input_dict(self) -> dict:
+        model_input = self.model_input.model_dump()
+        # models accepting it get the observed events as parsed catalog,
+        # read from the stored events instead of parsing the QuakeML.
+        if 'seismicity_catalog' in ModelInput.model_fields \
+                and self.modelrun_info.seismicity_observation_oid:
+            model_input['seismicity_catalog'] = \
+                SeismicityObservationRepository.get_catalog(
+                    self.session,
+                    self.modelrun_info.seismicity_observation_oid)
+        return model_input
 
     def _fetch_seismicity_observation(self) -> None:
         if not self.modelrun_info.seismicity_observation_oid:
             return None
-        return SeismicityObservationRepository.get_by_id(
-            self.session, self.modelrun_info.seismicity_observation_oid).data
-
-    def _save_catalog(self, results: list[ForecastCatalog]) -> None:
-        for catalog in results:
-            save_forecast_catalog_to_repositories(
+        return SeismicityObservationRepository.get_quakeml(
+            self.session, self.modelrun_info.seismicity_observation_oid)
+
+    def _results_unit_of_work(self) -> ResultsUnitOfWork:
+        settings = get_settings()
+        # every writer needs its own connection
+        writers = min(settings.RESULTS_WRITERS, settings.POSTGRES_POOL_SIZE)
+        if writers > 1:
+            return ParallelResultsUnitOfWork(
                 self.session,
+                DatabaseSession,
                 self.modelrun_info.forecastseries_oid,
                 self.modelrun.oid,
-                catalog)
+                writers,
+                self.modelconfig.catalog_layout)
+        return ResultsUnitOfWork(self.session,
+                                 self.modelrun_info.forecastseries_oid,
+                                 self.modelrun.oid,
+                                 settings.RESULTS_CHUNK_SIZE,
+                                 self.modelconfig.catalog_layout)
+
+    def _save_catalog(self, results: ModelResults[ForecastCatalog]) -> None:
+        with self._results_unit_of_work() as uow:
+            for catalog in prefetch(iter_results(results, ForecastCatalog)):
+                uow.add_catalog(catalog)
 
     def _save_bins(self, results: Any) -> None:
         raise NotImplementedError
 
-    def _save_grid(self, results: list[ForecastGRRateGrid]) -> None:
-        for grid in results:
-            save_forecast_grrategrid_to_repositories(
-                self.session,
-                self.modelrun_info.forecastseries_oid,
-                self.modelrun.oid,
-                grid)
+    def _save_grid(self,
+                   results: ModelResults[ForecastGRRateGrid]) -> None:
+        with self._results_unit_of_work() as uow:
+            for grid in prefetch(iter_results(results, ForecastGRRateGrid)):
+                uow.add_grrategrid(grid)
 
 
 @flow(name='DefaultModelRunner',
       flow_run_name='ModelRun-{modelconfig.name}')
 def default_model_runner(modelrun_info: DBModelRunInfo,
-                         modelconfig: ModelConfig) -> DefaultModelRunHandler:
+                         modelconfig: ModelConfig,
+                         write_behind: bool = False) \
+        -> DefaultModelRunHandler:
     runner = DefaultModelRunHandler(modelrun_info, modelconfig)
-    runner.run()
+    runner.run(save=not write_behind)
     return runner
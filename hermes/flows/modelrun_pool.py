@@ -0,0 +1,112 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from logging.handlers import QueueHandler, QueueListener
+
+from hermes.flows.modelrun_handler import DefaultModelRunHandler
+from hermes.schemas.model_schemas import DBModelRunInfo, ModelConfig
+
+# label of the model run executing in a worker process
+_label = None
+
+
+class _LabelFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.modelrun = _label
+        return True
+
+
+class _ForwardHandler(logging.Handler):
+    """
+    Logs the records of the workers to a logger of the main process,
+    prefixed with the label of their model run.
+    """
+
+    def __init__(self, logger: logging.Logger | logging.LoggerAdapter):
+        super().__init__()
+        self.logger = logger
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.logger.log(record.levelno,
+                        f'[{record.modelrun}] {record.getMessage()}')
+
+
+def _init_worker(queue: multiprocessing.Queue) -> None:
+    handler = QueueHandler(queue)
+    handler.addFilter(_LabelFilter())
+
+    # also the logs of the models themselves
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(logging.INFO)
+
+    # the prefect handlers need a flow run, which the workers don't have
+    logger = logging.getLogger('prefect.hermes')
+    logger.handlers = [handler]
+    logger.propagate = False
+
+
+def _run_modelrun(label: str,
+                  modelrun_info: DBModelRunInfo,
+                  modelconfig: ModelConfig) -> None:
+    global _label
+    _label = label
+    runner = DefaultModelRunHandler(modelrun_info, modelconfig)
+    # the function of the task, without a Prefect flow run
+    DefaultModelRunHandler.run.fn(runner)
+
+
+def run_modelruns_parallel(
+        runs: list[tuple[DBModelRunInfo, ModelConfig]],
+        workers: int,
+        logger: logging.Logger | logging.LoggerAdapter) -> list[str]:
+    """
+    Run model runs in a pool of local processes.
+
+    A failing model run doesn't stop the others, its ModelRun is set to
+    failed by the worker. The logs of the workers are passed to `logger`,
+    prefixed with the label of their model run, `<n>-<modelconfig name>`
+    with n the position of the run in `runs`.
+
+    Args:
+        runs: Model run infos and model configs of the runs.
+        workers: Number of processes, 0 for one per CPU.
+        logger: Logger the logs of the workers are passed to.
+
+    Returns:
+        Labels of the failed model runs.
+    """
+    workers = min(workers or os.cpu_count(), len(runs))
+
+    # new processes don't inherit the connections of the database pool
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    listener = QueueListener(queue, _ForwardHandler(logger))
+    listener.start()
+
+    failed = []
+    try:
+        with ProcessPoolExecutor(workers,
+                                 mp_context=context,
+                                 initializer=_init_worker,
+                                 initargs=(queue,)) as executor:
+            futures = {}
+            for i, (modelrun_info, modelconfig) in enumerate(runs):
+                label = f'{i + 1}-{modelconfig.name}'
+                futures[executor.submit(_run_modelrun, label,
+                                        modelrun_info, modelconfig)] = label
+
+            for future in as_completed(futures):
+                label = futures[future]
+                try:
+                    future.result()
+                except BaseException as e:
+                    logger.error(f'[{label}] ModelRun failed: {e!r}')
+                    failed.append(label)
+                else:
+                    logger.info(f'[{label}] ModelRun completed.')
+    finally:
+        listener.stop()
+
+    return failed
@@ -1,19 +1,28 @@
+import json
 import os
 from datetime import datetime
 from unittest.mock import MagicMock, patch
 
+import pytest
+from hydws.parser import BoreholeHydraulics
 from prefect import flow
+from seismostats import Catalog
 
-from hermes.flows.forecast_handler import (ForecastHandler, InjectionPlan,
-                                           ModelConfig)
-from hermes.schemas import ForecastSeries
+from hermes.flows.forecast_handler import ForecastHandler, ModelConfig
+from hermes.repositories.results import ModelRunRepository
+from hermes.schemas import EStatus, ForecastSeries, InjectionPlan
 
 MODULE_LOCATION = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                                'data')
 with open(os.path.join(MODULE_LOCATION, 'injection.json')) as f:
     INJECTION = f.read()
+HYDRAULICS = [BoreholeHydraulics(bh) for bh in json.loads(INJECTION)]
 with open(os.path.join(MODULE_LOCATION, 'quakeml.xml')) as f:
     SEISMICITY = f.read()
+CATALOG = Catalog.from_quakeml(SEISMICITY,
+                               include_uncertainties=True,
+                               include_ids=True,
+                               include_quality=True)
 
 
 @patch('hermes.flows.forecast_handler.default_model_runner',
@@ -40,7 +49,8 @@ class TestForecastHandler:
                   ):
         forecast_handler_session.return_value.__enter__.return_value = session
         mock_get_catalog().get_quakeml.return_value = SEISMICITY
-        mock_get_injection().get_json.return_value = INJECTION
+        mock_get_catalog().get_catalog.return_value = CATALOG
+        mock_get_injection().get_hydraulics.return_value = HYDRAULICS
 
         forecast_handler = ForecastHandler(
             forecastseries_db.oid,
@@ -52,3 +62,79 @@ class TestForecastHandler:
         assert mock_default_model_runner.call_count == 1
         assert len(forecast_handler.forecastseries.injection_plans) == 1
         assert len(forecast_handler.modelconfigs) == 1
+
+        # the ModelRuns reference the plans as soon as they are found
+        [(modelrun_info, _)] = forecast_handler.builder.runs
+        modelrun = ModelRunRepository.get_by_id(session,
+                                                modelrun_info.modelrun_oid)
+        assert modelrun.status == EStatus.SCHEDULED
+        assert modelrun.injectionplan_oid == \
+            forecast_handler.forecastseries.injection_plans[0].oid
+
+    @flow
+    @patch('hermes.flows.forecast_handler.get_settings')
+    def test_write_behind(self,
+                          # MOCKS
+                          mock_get_settings: MagicMock,
+                          forecast_handler_session: MagicMock,
+                          mock_get_injection: MagicMock,
+                          mock_get_catalog: MagicMock,
+                          mock_default_model_runner: MagicMock,
+                          # FIXTURES
+                          session,
+                          forecastseries_db: ForecastSeries,
+                          modelconfig_db: ModelConfig,
+                          injectionplan_db: InjectionPlan,
+                          prefect
+                          ):
+        forecast_handler_session.return_value.__enter__.return_value = session
+        mock_get_catalog().get_quakeml.return_value = SEISMICITY
+        mock_get_catalog().get_catalog.return_value = CATALOG
+        mock_get_injection().get_hydraulics.return_value = HYDRAULICS
+        mock_get_settings.return_value.RESULTS_WRITE_BEHIND = 2
+
+        forecast_handler = ForecastHandler(
+            forecastseries_db.oid,
+            starttime=datetime(2022, 4, 21, 14, 50, 0),
+            endtime=datetime(2022, 4, 21, 14, 55, 0)
+        )
+        forecast_handler.run()
+
+        assert mock_default_model_runner.call_args.kwargs['write_behind']
+        # the results were saved by the writer before run returned
+        mock_default_model_runner.return_value.save.assert_called_once()
+
+
+@patch('hermes.flows.forecast_handler.get_settings')
+@patch('hermes.flows.forecast_handler.DatabaseSession')
+@patch('hermes.flows.forecast_handler.ModelRunRepository.fail_unfinished')
+@patch('hermes.flows.forecast_handler.default_model_runner')
+def test_run_local_write_failed(mock_runner, mock_fail, mock_session,
+                                mock_settings):
+    mock_settings.return_value.RESULTS_WRITE_BEHIND = 2
+    mock_runner.return_value.save.side_effect = ValueError('write failed')
+    handler = MagicMock()
+    handler.builder.runs = [(MagicMock(), MagicMock())] * 3
+
+    with pytest.raises(ValueError, match='write failed'):
+        ForecastHandler._run_local(handler)
+
+    # the runs whose writes were skipped don't stay scheduled
+    mock_fail.assert_called_once_with(
+        mock_session.return_value.__enter__.return_value,
+        handler.forecast.oid)
+
+
+@patch('hermes.flows.forecast_handler.get_settings')
+@patch('hermes.flows.forecast_handler.default_model_runner')
+def test_run_local_lazy_results(mock_runner, mock_settings):
+    mock_settings.return_value.RESULTS_WRITE_BEHIND = 2
+    # lazy results are saved by the model run itself
+    mock_runner.return_value.results = None
+    handler = MagicMock()
+    handler.builder.runs = [(MagicMock(), MagicMock())] * 2
+
+    ForecastHandler._run_local(handler)
+
+    assert mock_runner.call_count == 2
+    mock_runner.return_value.save.assert_not_called()
@@ -1,11 +1,14 @@
 import os
 from datetime import datetime, timedelta
 from unittest.mock import MagicMock, call, patch
+from uuid import uuid4
 
 import numpy as np
+import pandas as pd
+from seismostats import ForecastCatalog
 from shapely import Polygon
 
-from hermes.flows.modelrun_handler import DefaultModelRunHandler
+from hermes.flows.modelrun_handler import DefaultModelRunHandler, iter_results
 from hermes.schemas import DBModelRunInfo, ModelConfig
 from hermes.schemas.base import EStatus
 
@@ -56,3 +59,98 @@ class TestModelRunner:
         mock_handler_catalog_save.assert_called_with("teststring")
         assert mock_modelrun_repo_update_status.call_args_list[0][0][-1] \
             == EStatus.COMPLETED
+
+    @patch('hermes.flows.modelrun_handler.DefaultModelRunHandler'
+           '._save_catalog', autocast=True)
+    @patch('hermes.flows.modelrun_handler.ModelRunRepository'
+           '.update_status', autocast=True)
+    @patch('hermes.flows.modelrun_handler.ModelRunRepository'
+           '.create', autocast=True)
+    @patch('hermes.flows.tests.test_modelrun_handler.mock_function',
+           autocast=True)
+    def test_run_without_save(self,
+                              # MOCKS
+                              mock_model_call: MagicMock,
+                              mock_modelrun_repo_create: MagicMock,
+                              mock_modelrun_repo_update_status: MagicMock,
+                              mock_handler_catalog_save: MagicMock,
+                              # FIXTURES
+                              modelconfig_db: ModelConfig,
+                              prefect
+                              ):
+
+        modelrun_info = DBModelRunInfo(
+            forecast_start=datetime(2022, 1, 1),
+            forecast_end=datetime(2022, 1, 1) + timedelta(days=30),
+            bounding_polygon=Polygon(
+                np.load(os.path.join(MODULE_LOCATION, 'ch_rect.npy'))),
+            depth_min=0,
+            depth_max=1)
+
+        mock_model_call.return_value = "teststring"
+
+        handler = DefaultModelRunHandler(modelrun_info, modelconfig_db)
+        handler.run(save=False)
+
+        # the ModelRun is only completed once the results are saved
+        mock_handler_catalog_save.assert_not_called()
+        mock_modelrun_repo_update_status.assert_not_called()
+
+        handler.save()
+        mock_handler_catalog_save.assert_called_with("teststring")
+        assert mock_modelrun_repo_update_status.call_args_list[0][0][-1] \
+            == EStatus.COMPLETED
+
+        # the model computes lazy results while they are saved
+        results = iter(["teststring"])
+        mock_model_call.return_value = results
+        mock_modelrun_repo_update_status.reset_mock()
+
+        handler = DefaultModelRunHandler(modelrun_info, modelconfig_db)
+        handler.run(save=False)
+
+        mock_handler_catalog_save.assert_called_with(results)
+        assert handler.results is None
+        assert mock_modelrun_repo_update_status.call_args_list[0][0][-1] \
+            == EStatus.COMPLETED
+
+    @patch('hermes.flows.modelrun_handler.ModelRunRepository'
+           '.get_by_id', autocast=True)
+    @patch('hermes.flows.modelrun_handler.ModelRunRepository'
+           '.create', autocast=True)
+    def test_created_modelrun(self,
+                              # MOCKS
+                              mock_modelrun_repo_create: MagicMock,
+                              mock_modelrun_repo_get: MagicMock,
+                              # FIXTURES
+                              modelconfig_db: ModelConfig,
+                              prefect
+                              ):
+        modelrun_info = DBModelRunInfo(
+            forecast_start=datetime(2022, 1, 1),
+            forecast_end=datetime(2022, 1, 1) + timedelta(days=30),
+            bounding_polygon=Polygon(
+                np.load(os.path.join(MODULE_LOCATION, 'ch_rect.npy'))),
+            depth_min=0,
+            depth_max=1,
+            modelrun_oid=uuid4())
+
+        handler = DefaultModelRunHandler(modelrun_info, modelconfig_db)
+
+        # the ModelRun created by the forecast is used
+        mock_modelrun_repo_create.assert_not_called()
+        assert mock_modelrun_repo_get.call_args[0][-1] == \
+            modelrun_info.modelrun_oid
+        assert handler.modelrun == mock_modelrun_repo_get.return_value
+
+
+def test_iter_results():
+    catalog = ForecastCatalog(pd.DataFrame({'magnitude': [1.0, 2.0]}))
+
+    def generator():
+        yield catalog
+        yield [catalog, catalog]
+
+    assert len(list(iter_results(catalog, ForecastCatalog))) == 1
+    assert len(list(iter_results([catalog] * 2, ForecastCatalog))) == 2
+    assert len(list(iter_results(generator(), ForecastCatalog))) == 3
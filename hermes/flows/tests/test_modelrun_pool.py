@@ -0,0 +1,79 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from hermes.flows import modelrun_pool
+from hermes.flows.forecast_handler import ForecastHandler
+from hermes.schemas.model_schemas import ModelConfig
+
+
+def _run_model(label, modelrun_info, modelconfig):
+    # runs in a worker process instead of the model run handler
+    modelrun_pool._label = label
+    logging.getLogger('hermes.tests.model').info('running %s', label)
+    if modelconfig.name == 'failing':
+        raise ValueError('model failed')
+
+
+def test_forward_logs(monkeypatch):
+    records = queue.Queue()
+    handler = QueueHandler(records)
+    handler.addFilter(modelrun_pool._LabelFilter())
+    logger = logging.getLogger('hermes.tests.modelrun_pool')
+    logger.addHandler(handler)
+    logger.propagate = False
+
+    monkeypatch.setattr(modelrun_pool, '_label', '2-model')
+    logger.warning('model %s', 'message')
+    logger.removeHandler(handler)
+
+    target = MagicMock()
+    listener = QueueListener(records, modelrun_pool._ForwardHandler(target))
+    listener.start()
+    listener.stop()
+
+    target.log.assert_called_once_with(logging.WARNING,
+                                       '[2-model] model message')
+
+
+@patch.object(modelrun_pool, '_run_modelrun', _run_model)
+def test_run_modelruns_parallel():
+    logger = MagicMock()
+    runs = [(None, ModelConfig(name='model')),
+            (None, ModelConfig(name='failing')),
+            (None, ModelConfig(name='model'))]
+
+    failed = modelrun_pool.run_modelruns_parallel(runs, 2, logger)
+
+    # the failing run doesn't stop the others
+    assert failed == ['2-failing']
+    logger.info.assert_any_call('[1-model] ModelRun completed.')
+    logger.info.assert_any_call('[3-model] ModelRun completed.')
+    logger.error.assert_called_once_with(
+        "[2-failing] ModelRun failed: ValueError('model failed')")
+
+    # the logs of the workers are forwarded with their label
+    logger.log.assert_any_call(logging.INFO, '[1-model] running 1-model')
+    logger.log.assert_any_call(logging.INFO,
+                               '[2-failing] running 2-failing')
+
+
+@patch('hermes.flows.forecast_handler.DatabaseSession')
+@patch('hermes.flows.forecast_handler.ModelRunRepository.fail_unfinished')
+@patch('hermes.flows.forecast_handler.run_modelruns_parallel')
+def test_run_local_parallel(mock_run, mock_fail, mock_session):
+    handler = MagicMock()
+    handler.builder.runs = [MagicMock(), MagicMock()]
+
+    mock_run.return_value = []
+    ForecastHandler._run_local_parallel(handler, 4)
+    mock_run.assert_called_once_with(handler.builder.runs, 4, handler.logger)
+    mock_fail.assert_called_once()
+
+    mock_run.return_value = ['2-model']
+    with pytest.raises(RuntimeError, match='1 of 2 ModelRuns failed'):
+        ForecastHandler._run_local_parallel(handler, 4)
+    assert mock_fail.call_count == 2
@@ -0,0 +1,208 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from hermes.config import get_settings
+
+# query parameters giving the end of the requested time window
+ENDTIME_PARAMS = ('endtime', 'end')
+
+# seconds after which the size of the cache is determined again, as
+# other processes write to it too
+SCAN_INTERVAL = 60
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL, so that requests of the same resource have the
+    same key, independent of the order of the query parameters.
+
+    Args:
+        url: URL to normalize.
+
+    Returns:
+        The normalized URL.
+    """
+    parts = urlparse(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunparse(parts._replace(scheme=parts.scheme.lower(),
+                                     netloc=parts.netloc.lower(),
+                                     path=parts.path or '/',
+                                     query=query,
+                                     fragment=''))
+
+
+def _window_end(url: str) -> datetime | None:
+    """
+    End of the time window requested by the URL, as naive UTC datetime.
+    """
+    params = dict(parse_qsl(urlparse(url).query))
+    for name in ENDTIME_PARAMS:
+        if name in params:
+            try:
+                end = datetime.fromisoformat(params[name])
+            except ValueError:
+                return None
+            if end.tzinfo is not None:
+                end = end.astimezone(timezone.utc).replace(tzinfo=None)
+            return end
+    return None
+
+
+class ResponseCache:
+    """
+    Size bounded cache of the texts of HTTP responses on disk, which
+    can be shared between processes.
+
+    Responses to requests of time windows which ended more than
+    `immutable_after` ago are not expected to change anymore and never
+    expire, all other responses expire after `ttl` seconds. If the
+    cache grows larger than `max_size` bytes, the least recently used
+    responses are removed. To not scan the directory on every write,
+    the size is tracked from the written entries and only determined
+    again once it exceeds `max_size` or every `SCAN_INTERVAL` seconds.
+
+    Entries are written to a temporary file and atomically moved into
+    place, concurrent readers see either the complete entry or none.
+
+    Args:
+        path: Directory of the cache.
+        max_size: Maximum size of the cache in bytes.
+        ttl: Seconds after which responses to recent time windows
+            expire.
+        immutable_after: Age of the end of a time window after which
+            its responses never expire.
+    """
+
+    def __init__(self,
+                 path: str | Path,
+                 max_size: int = 1_000_000_000,
+                 ttl: float = 300,
+                 immutable_after: timedelta = timedelta(days=7)) -> None:
+        self.path = Path(path)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.immutable_after = immutable_after
+
+        self._lock = threading.Lock()
+        self._size = None
+        self._scanned = 0.0
+
+    def _file(self, url: str) -> Path:
+        key = hashlib.sha256(normalize_url(url).encode()).hexdigest()
+        return self.path / key[:2] / key
+
+    def _expires(self, url: str) -> float:
+        end = _window_end(url)
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        if end is not None and end < now - self.immutable_after:
+            return float('inf')
+        return time.time() + self.ttl
+
+    def get(self, url: str) -> str | None:
+        """
+        Get the cached response text of a URL.
+
+        Args:
+            url: Requested URL.
+
+        Returns:
+            The response text, or None if the URL is not cached or its
+            response expired.
+        """
+        file = self._file(url)
+        try:
+            with open(file, 'rb') as f:
+                expires = float(f.readline())
+                if expires < time.time():
+                    return None
+                text = f.read().decode()
+            # the modification time orders the entries for eviction
+            os.utime(file)
+        except (FileNotFoundError, ValueError):
+            return None
+        return text
+
+    def put(self, url: str, text: str) -> None:
+        """
+        Store the response text of a URL.
+
+        Args:
+            url: Requested URL.
+            text: Text of the response.
+        """
+        file = self._file(url)
+        data = f'{self._expires(url)}\n'.encode() + text.encode()
+        file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=file.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, file)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        with self._lock:
+            if self._size is not None:
+                self._size += len(data)
+            if self._size is None or self._size > self.max_size \
+                    or time.monotonic() - self._scanned > SCAN_INTERVAL:
+                self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for file in self.path.glob('*/*'):
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                # removed by another process
+                continue
+            if file.suffix == '.tmp' and stat.st_mtime > time.time() - 3600:
+                # still being written by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file))
+
+        size = sum(e[1] for e in entries)
+        for _, file_size, file in sorted(entries):
+            if size <= self.max_size:
+                break
+            file.unlink(missing_ok=True)
+            size -= file_size
+
+        self._size = size
+        self._scanned = time.monotonic()
+
+
+def get_response_cache() -> ResponseCache | None:
+    """
+    Get the response cache configured by the settings.
+
+    Returns:
+        The response cache, or None if caching is disabled.
+    """
+    settings = get_settings()
+    if not settings.HTTP_CACHE_PATH:
+        return None
+    return _response_cache(settings.HTTP_CACHE_PATH,
+                           settings.HTTP_CACHE_SIZE,
+                           settings.HTTP_CACHE_TTL,
+                           settings.HTTP_CACHE_IMMUTABLE_AFTER)
+
+
+@lru_cache()
+def _response_cache(path: str,
+                    max_size: int,
+                    ttl: float,
+                    immutable_after: float) -> ResponseCache:
+    # one instance per process, which keeps track of the size
+    return ResponseCache(path,
+                         max_size=max_size,
+                         ttl=ttl,
+                         immutable_after=timedelta(days=immutable_after))
@@ -7,6 +7,7 @@ from typing import Generic, TypeVar
 import requests
 from prefect import get_run_logger, task
 
+from hermes.io.cache import get_response_cache
 from hermes.utils.url import add_query_params
 
 T = TypeVar('T')
@@ -78,6 +79,9 @@ class DataSource(ABC, Generic[T]):
         """
         Request text from a URL and raise for status.
 
+        Responses are taken from the response cache if it is enabled,
+        the status code of a cached response is 200.
+
         Args:
             url: URL to request.
             timeout: Timeout for the request.
@@ -92,10 +96,20 @@ class DataSource(ABC, Generic[T]):
 
         url = add_query_params(url, **kwargs)
 
+        cache = get_response_cache()
+        if cache is not None:
+            text = cache.get(url)
+            if text is not None:
+                self.logger.info(f'Using cached response of {url}.')
+                return text, 200
+
         self.logger.info(f'Requesting text from {url}.')
 
         response = requests.get(url, timeout=timeout)
 
         response.raise_for_status()
 
+        if cache is not None:
+            cache.put(url, response.text)
+
         return response.text, response.status_code
@@ -0,0 +1,180 @@
+import asyncio
+import contextvars
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Coroutine, TypeVar
+from urllib.parse import urlparse
+
+import httpx
+
+from hermes.io.cache import ResponseCache
+
+T = TypeVar('T')
+
+# status codes of responses which are worth retrying
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+logger = logging.getLogger('prefect.hermes')
+
+
+class TokenBucket:
+    """
+    Limits the rate at which requests are started, allowing bursts
+    of up to `capacity` requests.
+
+    Args:
+        rate: Number of requests per second.
+        capacity: Maximum number of requests started at once.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """
+        Wait until a request can be started.
+        """
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens
+                                   + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class Downloader:
+    """
+    Downloads many URLs concurrently over a pool of keep-alive
+    connections, parsing each response as soon as it arrives.
+
+    Args:
+        concurrency: Maximum number of requests in flight per host.
+        rate_limit: Maximum number of requests started per second and
+            host, 0 for no limit.
+        retries: Number of retries of a failed request.
+        retry_delay: Delay in seconds before the first retry, doubled
+            for every further retry.
+        timeout: Timeout of a request in seconds.
+        cache: Cache of the responses, requests of cached URLs are not
+            sent again.
+    """
+
+    def __init__(self,
+                 concurrency: int = 4,
+                 rate_limit: float = 0,
+                 retries: int = 3,
+                 retry_delay: float = 3,
+                 timeout: float = 300,
+                 cache: ResponseCache | None = None) -> None:
+        self.concurrency = concurrency
+        self.rate_limit = rate_limit
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.cache = cache
+
+    def download(self,
+                 urls: list[str],
+                 parse: Callable[[str], T]) -> list[T]:
+        """
+        Download the URLs and parse their responses.
+
+        Args:
+            urls: URLs to download.
+            parse: Function parsing the text of a response, called in a
+                worker thread while the other URLs are downloaded.
+
+        Returns:
+            The parsed responses, in the order of the URLs.
+        """
+        return _run(self._download(urls, parse))
+
+    async def _download(self,
+                        urls: list[str],
+                        parse: Callable[[str], T]) -> list[T]:
+        hosts = {urlparse(url).netloc for url in urls}
+        semaphores = {h: asyncio.Semaphore(self.concurrency) for h in hosts}
+        buckets = {h: TokenBucket(self.rate_limit) for h in hosts} \
+            if self.rate_limit > 0 else {}
+
+        async with httpx.AsyncClient(transport=self._transport(len(hosts)),
+                                     timeout=self.timeout) as client:
+
+            async def download(url: str) -> T:
+                if self.cache is not None:
+                    text = await asyncio.to_thread(self.cache.get, url)
+                    if text is not None:
+                        return await asyncio.to_thread(parse, text)
+                host = urlparse(url).netloc
+                async with semaphores[host]:
+                    text = await self._request(client, url,
+                                               buckets.get(host))
+                result = await asyncio.to_thread(parse, text)
+                # only responses which could be parsed are cached
+                if self.cache is not None:
+                    await asyncio.to_thread(self.cache.put, url, text)
+                return result
+
+            tasks = [asyncio.ensure_future(download(url)) for url in urls]
+            try:
+                return await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    def _transport(self, hosts: int) -> httpx.AsyncBaseTransport:
+        connections = self.concurrency * hosts
+        return httpx.AsyncHTTPTransport(limits=httpx.Limits(
+            max_connections=connections,
+            max_keepalive_connections=connections))
+
+    async def _request(self,
+                       client: httpx.AsyncClient,
+                       url: str,
+                       bucket: TokenBucket | None) -> str:
+        for attempt in range(self.retries + 1):
+            if bucket is not None:
+                await bucket.acquire()
+            try:
+                response = await client.get(url)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.text
+                error = httpx.HTTPStatusError(
+                    f'{response.status_code} response from {url}.',
+                    request=response.request, response=response)
+            except httpx.TransportError as e:
+                error = e
+
+            if attempt == self.retries:
+                raise error
+            delay = self.retry_delay * 2 ** attempt
+            logger.warning(f'Request to {url} failed ({error}), '
+                           f'retrying in {delay:.0f}s.')
+            await asyncio.sleep(random.uniform(0.5, 1.5) * delay)
+
+
+def _run(coroutine: Coroutine) -> T:
+    """
+    Run a coroutine to completion, also from threads which are already
+    running an event loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    # keep the context, eg. the prefect logger
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(1) as executor:
+        return executor.submit(context.run, asyncio.run, coroutine).result()
@@ -2,11 +2,62 @@ import json
 from copy import deepcopy
 from datetime import datetime
 
-from hydws.parser import BoreholeHydraulics
+import pandas as pd
+from hydws.parser import BoreholeHydraulics, SectionHydraulics
 from prefect import task
 from typing_extensions import Self
 
+from hermes.config import get_settings
+from hermes.io.cache import get_response_cache
 from hermes.io.datasource import DataSource
+from hermes.io.download import Downloader
+from hermes.io.serialize import serialize_hydjson
+from hermes.utils.dateutils import generate_date_ranges
+from hermes.utils.url import add_query_params
+
+
+def _parse_hydjson(text: str) -> BoreholeHydraulics | None:
+    return BoreholeHydraulics(json.loads(text)) if text.strip() else None
+
+
+def _merge_parts(parts: list[BoreholeHydraulics]) -> BoreholeHydraulics:
+    """
+    Merge the hydraulics of a borehole received in consecutive time
+    slices, joining the time series of each section.
+
+    The samples at the boundary of two slices are contained in both
+    slices and only kept in the earlier one. The metadata is taken from
+    the last slice which contains the borehole or section.
+    """
+    if len(parts) == 1:
+        return parts[0]
+
+    merged = BoreholeHydraulics()
+    merged.metadata = deepcopy(parts[-1].metadata)
+
+    sections = {}
+    samples = {}
+    for part in parts:
+        for key, section in part.items():
+            sections[key] = section
+            hydraulics = section.hydraulics
+            if hydraulics is None or len(hydraulics) == 0:
+                continue
+            if key in samples:
+                hydraulics = hydraulics[
+                    hydraulics.index > samples[key][-1].index[-1]]
+                if len(hydraulics) == 0:
+                    continue
+            samples.setdefault(key, []).append(hydraulics)
+
+    for key, section in sections.items():
+        merged_section = SectionHydraulics()
+        merged_section.metadata = deepcopy(section.metadata)
+        merged_section.hydraulics = pd.concat(samples[key]) \
+            if key in samples else pd.DataFrame()
+        merged[key] = merged_section
+
+    return merged
 
 
 class HydraulicsDataSource(DataSource[BoreholeHydraulics]):
@@ -20,6 +71,10 @@ class HydraulicsDataSource(DataSource[BoreholeHydraulics]):
         """
         Initialize a HydraulicsDataSource from a hydws url.
 
+        The hydraulics are requested in parallel in time slices of
+        HYDRAULICS_CHUNK_SIZE days, which are merged again. Only the
+        requests of failed slices are retried.
+
         Args:
             url: URL to the hydws service.
             starttime: Start time of the hydraulic data.
@@ -32,18 +87,35 @@ class HydraulicsDataSource(DataSource[BoreholeHydraulics]):
 
         hds.logger.info('Requesting hydraulics from hydraulic webservice:')
 
-        response = hds._request_text(
-            url,
-            level='hydraulic',
-            starttime=starttime.strftime('%Y-%m-%dT%H:%M:%S'),
-            endtime=endtime.strftime('%Y-%m-%dT%H:%M:%S'))
+        settings = get_settings()
 
-        hds.logger.info(f'Received response from {url} '
-                        f'with status code {response[1]}.')
+        slices = generate_date_ranges(
+            starttime, endtime, settings.HYDRAULICS_CHUNK_SIZE)
 
-        hydraulics = BoreholeHydraulics(json.loads(response[0]))
+        if len(slices) > 1:
+            hds.logger.info(
+                f'Requesting hydraulics in {len(slices)} parts.')
 
-        hds.data = [hydraulics]
+        urls = [add_query_params(
+            url,
+            level='hydraulic',
+            starttime=start.strftime('%Y-%m-%dT%H:%M:%S'),
+            endtime=end.strftime('%Y-%m-%dT%H:%M:%S'))
+            for start, end in slices]
+
+        downloader = Downloader(concurrency=settings.DOWNLOAD_CONCURRENCY,
+                                rate_limit=settings.DOWNLOAD_RATE_LIMIT,
+                                retries=settings.DOWNLOAD_RETRIES,
+                                cache=get_response_cache())
+        parts = [p for p in downloader.download(urls, _parse_hydjson)
+                 if p is not None]
+
+        if parts:
+            hds.logger.info(f'Received {len(parts)} parts from {url}.')
+            hds.data = [_merge_parts(parts)]
+        else:
+            hds.logger.warning(f'No hydraulics received from {url}.')
+            hds.data = []
 
         return hds
 
@@ -144,9 +216,9 @@ class HydraulicsDataSource(DataSource[BoreholeHydraulics]):
             dict
         """
 
+        hydraulics = self.data
         if starttime or endtime:
             hydraulics = [bh.query_datetime(
                 starttime, endtime) for bh in self.data]
-            return json.dumps([hd.to_json() for hd in hydraulics])
 
-        return json.dumps([hd.to_json() for hd in self.data])
+        return serialize_hydjson(hydraulics)
@@ -1,19 +1,130 @@
+import json
+from copy import deepcopy
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
 from hydws.parser import BoreholeHydraulics, SectionHydraulics
 
+from hermes.io.serialize import serialize_hydjson
+from hermes.schemas.data_schemas import InjectionPlan
+from hermes.utils.compression import content_hash
+
+
+def _borehole_name(borehole: dict | BoreholeHydraulics) -> str:
+    if isinstance(borehole, BoreholeHydraulics):
+        return borehole.metadata['name']
+    return borehole['name']
+
+
+def _lookback(config: dict, hydraulics: pd.DataFrame) -> pd.DataFrame:
+    """
+    The observed samples a multiply plan depends on.
+    """
+    if config.get("mode", "mean") == "mean":
+        return hydraulics.iloc[-config.get("lookback_window", 1):]
+    return hydraulics
+
+
+def plan_cache_key(template: dict,
+                   name: str,
+                   data: list[BoreholeHydraulics] | None,
+                   start: datetime,
+                   end: datetime) -> str:
+    """
+    Key identifying the injection plan built from a template.
+
+    Plans with the same key are identical: they have the same name,
+    template and time window, and were built from the same metadata of
+    the observed borehole and section. For multiply plans, the key also
+    covers the observed samples the plan is computed from.
+
+    Args:
+        template: Injection plan template.
+        name: Name of the plan.
+        data: Observed hydraulics of the boreholes.
+        start: Start of the plan.
+        end: End of the plan.
+
+    Returns:
+        The hex digest of the key.
+    """
+    observed = None
+    if data is not None:
+        borehole = next(d for d in data
+                        if _borehole_name(d) == template['borehole_name'])
+        section = borehole.nloc[template['section_name']]
+        observed = {'borehole': borehole.metadata,
+                    'section': section.metadata}
+        if template['type'] == 'multiply' and section.hydraulics is not None:
+            samples = _lookback(template['config'], section.hydraulics)
+            observed['columns'] = list(samples.columns)
+            observed['samples'] = content_hash(
+                pd.util.hash_pandas_object(samples).to_numpy().tobytes())
+
+    key = {'name': name,
+           'template': template,
+           'start': start,
+           'end': end,
+           'observed': observed}
+    return content_hash(
+        json.dumps(key, sort_keys=True, default=str).encode())
+
+
+def build_injectionplans(templates: list[dict],
+                         data: list[dict] | list[BoreholeHydraulics] | None,
+                         start: datetime,
+                         end: datetime) -> list[dict]:
+    """
+    Build the injection plans of several templates at once, in their
+    compact representation (see `InjectionPlanBuilder.build_steps`).
+
+    Each observed borehole is parsed at most once and shared by all
+    templates, boreholes which no template refers to aren't parsed.
+
+    Args:
+        templates: Injection plan templates.
+        data: Observed hydraulics of the boreholes, as hydJSON or
+            already parsed.
+        start: Start of the plans.
+        end: End of the plans.
+
+    Returns:
+        The plans, in the order of the templates.
+    """
+    boreholes = {}
+    plans = []
+    for template in templates:
+        observed = None
+        if data is not None:
+            name = template['borehole_name']
+            if name not in boreholes:
+                boreholes[name] = next(d for d in data
+                                       if _borehole_name(d) == name)
+            observed = [boreholes[name]]
+
+        builder = InjectionPlanBuilder(template, observed)
+        plans.append(builder.build_steps(start, end))
+        if observed is not None:
+            # parsed by the builder, if it wasn't yet
+            boreholes[name] = builder.observed_hydraulics
+
+    return plans
+
 
 class InjectionPlanBuilder:
-    def __init__(self, template: dict, data: dict | None = None):
+    def __init__(self,
+                 template: dict,
+                 data: list[dict] | list[BoreholeHydraulics] | None = None):
         self.template = template
         self.hydraulics = None
 
         if data is not None:
-            data = next(d for d in data if d['name']
+            data = next(d for d in data if _borehole_name(d)
                         == template['borehole_name'])
-            self.observed_hydraulics = BoreholeHydraulics(data)
+            if not isinstance(data, BoreholeHydraulics):
+                data = BoreholeHydraulics(data)
+            self.observed_hydraulics = data
             self.hydraulics = self.observed_hydraulics.nloc[
                 template['section_name']].hydraulics
 
@@ -24,18 +135,12 @@ class InjectionPlanBuilder:
                              f"must be one of {valid_types}")
 
     def build(self, start: datetime, end: datetime) -> dict:
-        if self.template_type == 'fixed':
-            hydraulics = build_fixed(
-                start, end, self.template['resolution'],
-                self.template['config'], self.hydraulics)
-        elif self.template_type == 'constant':
-            hydraulics = build_constant(
-                start, end, self.template['resolution'],
-                self.template['config'], self.hydraulics)
-        elif self.template_type == 'multiply':
-            hydraulics = build_multiply(
-                start, end, self.template['resolution'],
-                self.template['config'], self.hydraulics)
+        return self.build_hydraulics(start, end).to_json()
+
+    def build_hydraulics(self,
+                         start: datetime,
+                         end: datetime) -> BoreholeHydraulics:
+        hydraulics = expand_steps(self._steps(start, end))
 
         ip = BoreholeHydraulics()
         ip.metadata = self.observed_hydraulics.metadata
@@ -45,70 +150,179 @@ class InjectionPlanBuilder:
         section.hydraulics = hydraulics
         ip[section.metadata['publicid']] = section
 
-        return ip.to_json()
-
-
-def build_fixed(start: datetime,
+        return ip
+
+    def build_steps(self, start: datetime, end: datetime) -> dict:
+        """
+        Build the plan in its compact representation: hydJSON of the
+        borehole, whose section has the "steps" of `expand_steps`
+        instead of its "hydraulics".
+        """
+        borehole = deepcopy(self.observed_hydraulics.metadata)
+        section = deepcopy(self.observed_hydraulics.nloc[
+            self.template['section_name']].metadata)
+        borehole['publicid'] = str(borehole['publicid'])
+        section['publicid'] = str(section['publicid'])
+        section['steps'] = self._steps(start, end)
+        borehole['sections'] = [section]
+        return borehole
+
+    def _steps(self, start: datetime, end: datetime) -> dict:
+        if self.template_type == 'fixed':
+            build = fixed_steps
+        elif self.template_type == 'constant':
+            build = constant_steps
+        elif self.template_type == 'multiply':
+            build = multiply_steps
+        return build(start, end, self.template['resolution'],
+                     self.template['config'], self.hydraulics)
+
+
+def expand_plan(plan: list[dict]) -> list[BoreholeHydraulics]:
+    """
+    Expand injection plans in their compact representation, as built
+    by `InjectionPlanBuilder.build_steps`, to their samples.
+
+    Args:
+        plan: Compact representation of the boreholes.
+
+    Returns:
+        BoreholeHydraulics objects with the samples of the plans.
+    """
+    boreholes = []
+    for borehole in plan:
+        steps = [section['steps'] for section in borehole['sections']]
+        metadata = {**borehole, 'sections': [
+            {k: v for k, v in section.items() if k != 'steps'}
+            for section in borehole['sections']]}
+        borehole = BoreholeHydraulics(metadata)
+        for section, section_steps in zip(borehole.values(), steps):
+            section.hydraulics = expand_steps(section_steps)
+        boreholes.append(borehole)
+    return boreholes
+
+
+def injectionplan_hydjson(plan: InjectionPlan) -> bytes:
+    """
+    The hydJSON of a stored injection plan, expanding it if it is
+    stored in its compact representation.
+
+    Args:
+        plan: Injection plan with data or steps.
+
+    Returns:
+        The hydJSON of the plan, as list of boreholes.
+    """
+    if plan.data is not None or plan.steps is None:
+        return plan.data
+    return serialize_hydjson(expand_plan(json.loads(plan.steps))).encode()
+
+
+def _plan_row(config: dict) -> pd.Series:
+    """
+    The constant values of a plan, by hydraulic column name.
+    """
+    # Convert nested JSON into a DataFrame
+    plan_df = pd.json_normalize(config.get("plan", []), sep="_")
+    row = plan_df.iloc[0]
+    return row.rename(lambda col: col.removesuffix('_value'))
+
+
+def _steps(start: datetime,
+           end: datetime,
+           resolution: int,
+           breakpoints: pd.DataFrame,
+           interpolation: str = "none") -> dict:
+    """
+    Compact representation of a plan, see `expand_steps`.
+    """
+    values = {}
+    for col in breakpoints.columns:
+        # tolist converts to python scalars
+        column = breakpoints[col].infer_objects().tolist()
+        values[col] = [None if pd.isna(v) else v for v in column]
+
+    return {"starttime": pd.Timestamp(start).isoformat(),
+            "endtime": pd.Timestamp(end).isoformat(),
+            "resolution": resolution,
+            "interpolation": interpolation,
+            "datetime": [t.isoformat() for t in breakpoints.index],
+            "values": values}
+
+
+def expand_steps(steps: dict) -> pd.DataFrame:
+    """
+    Expand the compact representation of a plan to its samples.
+
+    The plan is sampled every `resolution` seconds between `starttime`
+    and `endtime`, and at every breakpoint inside this window. Each
+    column either keeps the value of its last breakpoint
+    (interpolation "none") or is interpolated linearly between its
+    breakpoints ("linear"). Before its first breakpoint, a column has
+    the value of the first one. Missing values (None) of a breakpoint
+    don't change the column.
+
+    Args:
+        steps: Compact representation of the plan.
+
+    Returns:
+        The samples of the plan, indexed by their datetime.
+    """
+    start = pd.Timestamp(steps["starttime"])
+    end = pd.Timestamp(steps["endtime"])
+    time_index = pd.date_range(start=start, end=end,
+                               freq=f"{steps['resolution']}s")
+    breakpoints = pd.DatetimeIndex(pd.to_datetime(steps["datetime"]))
+    time_index = time_index.union(
+        breakpoints[(breakpoints >= start) & (breakpoints <= end)])
+
+    columns = {}
+    for col, values in steps["values"].items():
+        values = pd.Series(values, index=breakpoints).dropna()
+        if values.empty:
+            columns[col] = np.full(len(time_index), np.nan)
+        elif steps["interpolation"] == "linear" and \
+                pd.api.types.is_numeric_dtype(values):
+            columns[col] = np.interp(time_index.asi8,
+                                     values.index.asi8,
+                                     values.to_numpy(dtype=float))
+        else:
+            position = values.index.searchsorted(time_index, side="right")
+            columns[col] = values.to_numpy()[np.maximum(position - 1, 0)]
+
+    return pd.DataFrame(columns, index=time_index)
+
+
+def fixed_steps(start: datetime,
                 end: datetime,
                 resolution: int,
                 config: dict,
                 hydraulics: pd.DataFrame | None) -> dict:
-    # Create a time range based on start, end, and resolution
-    time_index = pd.date_range(start=start, end=end, freq=f"{resolution}s")
-
-    # Convert nested JSON into a DataFrame
-    plan_df = pd.json_normalize(config.get("plan", []), sep="_")
-    plan_df["datetime_value"] = pd.to_datetime(plan_df["datetime_value"])
-    plan_df = plan_df.set_index("datetime_value")
-
-    result_df = pd.DataFrame(index=time_index)
-    result_df = result_df.join(plan_df, how="outer")
-
-    # Handle interpolation
     interpolation = config.get("interpolation", "none")
-    if interpolation == "none":
-        result_df = result_df.ffill()
-    elif interpolation == "linear":
-        # Interpolate linearly between values for numeric columns
-        for column in result_df.columns:
-            if result_df[column].dtype in [np.float64, np.int64]:
-                result_df[column] = result_df[column].interpolate(
-                    method="time")
-    else:
+    if interpolation not in ["none", "linear"]:
         raise ValueError(
             "Invalid interpolation type. Must be 'none' or 'linear'.")
 
-    # Ensure no remaining NaN values (fill with the last known value)
-    result_df = result_df.bfill()
-
-    # Trim the DataFrame to the specified start and end times
-    result_df = result_df[start:end]
+    # Convert nested JSON into a DataFrame
+    plan_df = pd.json_normalize(config.get("plan", []), sep="_")
+    plan_df["datetime_value"] = pd.to_datetime(plan_df["datetime_value"])
+    plan_df = plan_df.set_index("datetime_value").sort_index()
+    plan_df = plan_df.rename(columns=lambda col: col.removesuffix('_value'))
 
-    return result_df.rename(columns=lambda col:
-                            col.removesuffix('_value'))
+    return _steps(start, end, resolution, plan_df, interpolation)
 
 
-def build_constant(start: datetime,
+def constant_steps(start: datetime,
                    end: datetime,
                    resolution: int,
                    config: dict,
                    hydraulics: pd.DataFrame | None) -> dict:
-    # Create a time range based on start, end, and resolution
-    time_index = pd.date_range(start=start, end=end, freq=f"{resolution}s")
+    row = _plan_row(config)
+    return _steps(start, end, resolution,
+                  row.to_frame().T.set_axis([pd.Timestamp(start)]))
 
-    # Convert nested JSON into a DataFrame
-    plan_df = pd.json_normalize(config.get("plan", []), sep="_")
-    row = plan_df.iloc[0]
-
-    # Create a DataFrame with the same index as the time range
-    result_df = pd.DataFrame([row.values] * len(time_index),
-                             columns=plan_df.columns, index=time_index)
-
-    return result_df.rename(columns=lambda col:
-                            col.removesuffix('_value'))
 
-
-def build_multiply(start: datetime,
+def multiply_steps(start: datetime,
                    end: datetime,
                    resolution: int,
                    config: dict,
@@ -118,31 +332,46 @@ def build_multiply(start: datetime,
         raise ValueError("Hydraulics data must be provided "
                          "for multiply injection plans.")
 
-    # Create a time range based on start, end, and resolution
-    time_index = pd.date_range(start=start, end=end, freq=f"{resolution}s")
-
-    # Convert nested JSON into a DataFrame
-    plan_df = pd.json_normalize(config.get("plan", []), sep="_")
-    row = plan_df.iloc[0]
-
-    # Create a DataFrame with the same index as the time range
-    result_df = pd.DataFrame([row.values] * len(time_index),
-                             columns=plan_df.columns, index=time_index)
-    result_df = result_df.rename(columns=lambda col:
-                                 col.removesuffix('_value'))
+    row = _plan_row(config)
 
     lookback = config.get("lookback_window", 1)
     method = config.get("mode", "mean")
 
     if method == "mean":
-        lb_val = hydraulics.iloc[-lookback:].mean(skipna=True).fillna(0)
+        lb_val = _lookback(config, hydraulics).mean(skipna=True).fillna(0)
     elif method == "ewma":
         lb_val = hydraulics.ewm(
             span=lookback, ignore_na=True).mean().iloc[-1].fillna(0)
 
-    result_df = result_df * \
-        lb_val[lb_val.index.intersection(result_df.columns)]
+    # columns without observed values are set to 0
+    row = (row * lb_val.reindex(row.index)).fillna(0)
+
+    return _steps(start, end, resolution,
+                  row.to_frame().T.set_axis([pd.Timestamp(start)]))
+
+
+def build_fixed(start: datetime,
+                end: datetime,
+                resolution: int,
+                config: dict,
+                hydraulics: pd.DataFrame | None) -> pd.DataFrame:
+    return expand_steps(
+        fixed_steps(start, end, resolution, config, hydraulics))
+
+
+def build_constant(start: datetime,
+                   end: datetime,
+                   resolution: int,
+                   config: dict,
+                   hydraulics: pd.DataFrame | None) -> pd.DataFrame:
+    return expand_steps(
+        constant_steps(start, end, resolution, config, hydraulics))
 
-    result_df.fillna(0, inplace=True)
 
-    return result_df
+def build_multiply(start: datetime,
+                   end: datetime,
+                   resolution: int,
+                   config: dict,
+                   hydraulics: pd.DataFrame | None) -> pd.DataFrame:
+    return expand_steps(
+        multiply_steps(start, end, resolution, config, hydraulics))
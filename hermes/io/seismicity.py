@@ -1,5 +1,3 @@
-import random
-import time
 from datetime import datetime
 
 import pandas as pd
@@ -7,11 +5,51 @@ from prefect import task
 from seismostats import Catalog, FDSNWSEventClient
 from typing_extensions import Self
 
+from hermes.config import get_settings
+from hermes.io.cache import get_response_cache
 from hermes.io.datasource import DataSource
+from hermes.io.download import Downloader
 from hermes.utils.url import add_query_params
 
 
+def _parse_quakeml(quakeml: str) -> Catalog:
+    return Catalog.from_quakeml(quakeml,
+                                include_uncertainties=True,
+                                include_ids=True,
+                                include_quality=True)
+
+
+def _concat_parts(parts: list[Catalog]) -> Catalog:
+    """
+    Concatenate the parts of a catalog at once, ordered by time, and drop
+    the events which are repeated at the boundaries of the parts.
+    """
+    parts = [part for part in parts if not part.empty]
+    if not parts:
+        return Catalog()
+
+    catalog = pd.concat(parts, ignore_index=True)
+
+    if 'eventID' in catalog.columns:
+        repeated = catalog['eventID'].notna() \
+            & catalog['eventID'].duplicated()
+        catalog = catalog.loc[~repeated]
+
+    # the parts of a time range are usually ordered already, fdsnws-event
+    # orders by descending time by default. Otherwise the stable sort
+    # merges the ordered runs of the parts.
+    if catalog['time'].is_monotonic_decreasing:
+        catalog = catalog.iloc[::-1]
+    elif not catalog['time'].is_monotonic_increasing:
+        catalog = catalog.sort_values('time', kind='stable')
+
+    return catalog.reset_index(drop=True)
+
+
 class SeismicityDataSource(DataSource[Catalog]):
+    # the original QuakeML response, if the catalog was received at once
+    quakeml: str | None = None
+
     @classmethod
     @task(name='SeismicityDataSource.from_file')
     def from_file(cls,
@@ -90,32 +128,23 @@ class SeismicityDataSource(DataSource[Catalog]):
 
         urls = [add_query_params(url, **p) for p in params]
 
-        try:
-            tasks = []
-            for u in urls:
-                time.sleep(random.uniform(1, 2))
-                tasks.append(cds._request_text.submit(u))
-            parts = [task.result() for task in tasks]
-        except RuntimeError:
-            parts = [cds._request_text(u) for u in urls]
-
-        catalog = Catalog()
-
-        for part in parts:
-            catalog = pd.concat([
-                catalog if not catalog.empty else None,
-                Catalog.from_quakeml(part[0],
-                                     include_uncertainties=True,
-                                     include_ids=True,
-                                     include_quality=True)],
-                                ignore_index=True,
-                                axis=0).reset_index(drop=True)
-
-        catalog = catalog.sort_values('time')
+        settings = get_settings()
+        downloader = Downloader(concurrency=settings.DOWNLOAD_CONCURRENCY,
+                                rate_limit=settings.DOWNLOAD_RATE_LIMIT,
+                                retries=settings.DOWNLOAD_RETRIES,
+                                cache=get_response_cache())
+        parts = downloader.download(
+            urls, lambda text: (text, _parse_quakeml(text)))
+
+        # a catalog received in parts is serialized again if needed,
+        # the responses can't simply be merged.
+        if len(parts) == 1:
+            cds.quakeml = parts[0][0]
+
+        catalog = _concat_parts([part for _, part in parts])
 
         if parts:
-            cds.logger.info(f'Received response from {url} '
-                            f'with status code {part[1]}.')
+            cds.logger.info(f'Received {len(parts)} parts from {url}.')
         else:
             cds.logger.warning('Observed seismicity period has zero length.'
                                ' No data was requested.')
@@ -126,7 +155,7 @@ class SeismicityDataSource(DataSource[Catalog]):
 
     def get_quakeml(self,
                     starttime: datetime | None = None,
-                    endtime: datetime | None = None) -> Catalog:
+                    endtime: datetime | None = None) -> str:
         """
         Get the catalog in QuakeML format.
 
@@ -135,8 +164,12 @@ class SeismicityDataSource(DataSource[Catalog]):
             endtime: End time of the catalog.
 
         Returns:
-            Catalog in QuakeML format
+            Catalog in QuakeML format, the original response if the
+            catalog was received at once and isn't filtered.
         """
+        if self.quakeml is not None and not (starttime or endtime):
+            return self.quakeml
+
         cat = self.get_catalog(starttime=starttime, endtime=endtime)
 
         return cat.to_quakeml()
@@ -1,9 +1,12 @@
+import json
+from copy import deepcopy
+
 import numpy as np
 import pandas as pd
+from hydws.parser import BoreholeHydraulics
 from seismostats import Catalog, ForecastCatalog, ForecastGRRateGrid
-from shapely import Point
 
-from hermes.repositories.types import db_to_shapely, shapely_to_db
+from hermes.repositories.types import db_to_shapely
 from hermes.schemas import EventForecast, GRParameters
 from hermes.schemas.base import Model
 
@@ -11,29 +14,47 @@ CATALOG_QUANTITY_FIELDS = ['latitude',
                            'longitude', 'depth', 'magnitude', 'time']
 RATEGRID_QUANTITY_FIELDS = ['number_events', 'b', 'a', 'alpha', 'mc']
 
+# little endian EWKB point with SRID flag set
+EWKB_POINT = np.dtype([('byteorder', 'u1'),
+                       ('type', '<u4'),
+                       ('srid', '<u4'),
+                       ('x', '<f8'),
+                       ('y', '<f8')])
+EWKB_POINT_TYPE = 0x20000001
+
+_HEX = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+
+
+def _serialize_columns(data: pd.DataFrame,
+                       quantity_fields: list[str],
+                       model: type[Model]) -> dict[str, np.ndarray]:
+    """
+    Collect the columns of a DataFrame which exist on the model as
+    column buffers, renaming quantity columns to their `_value` field.
+    """
+    fields = model.model_fields
+    columns = {}
+    for column in data.columns:
+        name = f'{column}_value' if column in quantity_fields else column
+        if name in fields:
+            columns[name] = data[column].to_numpy()
+    return columns
+
 
 def serialize_seismostats_grrategrid(
         rategrid: ForecastGRRateGrid,
-        model: type[Model] = GRParameters) -> list[dict]:
+        model: type[Model] = GRParameters) -> dict[str, np.ndarray]:
     """
-    Serialize a Seismostats ForecastGRRateGrid object to a list of dicts.
+    Serialize a Seismostats ForecastGRRateGrid object to column buffers.
 
     Args:
         rategrid: ForecastGRRateGrid object.
         model: Model object to serialize the rategrid to.
 
     Returns:
-        List of dictionaries, each dictionary representing a rategrid.
+        Dictionary mapping the model field names to column arrays.
     """
-
-    column_renames = {col: f'{col}_value' for col in RATEGRID_QUANTITY_FIELDS}
-
-    rategrid = rategrid.rename(columns=column_renames)
-
-    rategrid = rategrid[[c for c in rategrid.columns if c in list(
-        model.model_fields)]]
-
-    return rategrid.to_dict(orient='records')
+    return _serialize_columns(rategrid, RATEGRID_QUANTITY_FIELDS, model)
 
 
 def deserialize_seismostats_grrategrid(
@@ -63,7 +84,9 @@ def deserialize_seismostats_grrategrid(
     boundingbox = deserialize_geom_column(rategrid['geom'])
     rategrid = pd.concat([boundingbox, rategrid], axis=1)
 
-    rategrid = rategrid.drop(columns=['oid', 'modelresult_oid', 'geom'])
+    rategrid = rategrid.drop(
+        columns=['oid', 'forecastseries_oid', 'modelresult_oid', 'geom'],
+        errors='ignore')
     rategrid = rategrid.dropna(axis=1, how='all')
 
     if timestep:
@@ -100,39 +123,65 @@ def deserialize_geom_column(geom_col: pd.Series) -> pd.DataFrame:
     return bounding_cols
 
 
-def serialize_seismostats_catalog(
-    catalog: Catalog,
-        model: type[Model] = EventForecast) -> list[dict]:
+def points_to_ewkb(longitude: np.ndarray,
+                   latitude: np.ndarray,
+                   srid: int = 4326) -> np.ndarray:
     """
-    Serialize a Seismostats Catalog object to a list of dictionaries.
+    Build hex encoded EWKB point geometries from coordinate arrays.
+
+    The binary representation is assembled directly from the NumPy
+    arrays, without creating a geometry object per point.
 
     Args:
-        catalog: Catalog object with the events.
-        model: Model object to serialize the events to.
+        longitude: Longitude values.
+        latitude: Latitude values.
+        srid: Spatial reference id of the points.
+
     Returns:
-        List of dictionaries, each dictionary representing an event.
+        Object array of hex EWKB strings, None where a coordinate
+        is missing.
     """
+    longitude = np.asarray(longitude, dtype=np.float64)
+    latitude = np.asarray(latitude, dtype=np.float64)
 
-    # rename value columns to match 'RealQuantity" fields
-    column_renames = {col: f'{col}_value' for col in CATALOG_QUANTITY_FIELDS}
-    catalog = catalog.rename(columns=column_renames)
+    points = np.empty(len(longitude), dtype=EWKB_POINT)
+    points['byteorder'] = 1
+    points['type'] = EWKB_POINT_TYPE
+    points['srid'] = srid
+    points['x'] = longitude
+    points['y'] = latitude
+
+    raw = points.view(np.uint8).reshape(-1, EWKB_POINT.itemsize)
+    chars = np.empty((len(points), 2 * EWKB_POINT.itemsize), dtype=np.uint8)
+    chars[:, 0::2] = _HEX[raw >> 4]
+    chars[:, 1::2] = _HEX[raw & 0x0F]
 
-    if 'longitude_value' in catalog.columns and \
-            'latitude_value' in catalog.columns:
-        catalog['coordinates'] = catalog.apply(
-            lambda row: shapely_to_db(
-                Point(row['longitude_value'], row['latitude_value'])),
-            axis=1)
+    ewkb = chars.view(f'S{chars.shape[1]}').ravel().astype(str) \
+        .astype(object)
+    ewkb[np.isnan(longitude) | np.isnan(latitude)] = None
 
-    # only keep columns that are in the model
-    catalog = catalog[[c for c in catalog.columns if c in list(
-        model.model_fields)]]
+    return ewkb
 
-    # replace NaNs with None for database compatibility
-    catalog = catalog.replace({pd.NA: None,
-                               np.nan: None})
 
-    events = catalog.to_dict(orient='records')
+def serialize_seismostats_catalog(
+    catalog: Catalog,
+        model: type[Model] = EventForecast) -> dict[str, np.ndarray]:
+    """
+    Serialize a Seismostats Catalog object to column buffers.
+
+    Args:
+        catalog: Catalog object with the events.
+        model: Model object to serialize the events to.
+    Returns:
+        Dictionary mapping the model field names to column arrays.
+    """
+    events = _serialize_columns(catalog, CATALOG_QUANTITY_FIELDS, model)
+
+    if 'coordinates' in model.model_fields and \
+            'longitude' in catalog.columns and \
+            'latitude' in catalog.columns:
+        events['coordinates'] = points_to_ewkb(
+            catalog['longitude'].to_numpy(), catalog['latitude'].to_numpy())
 
     return events
 
@@ -181,9 +230,11 @@ def deserialize_seismostats_catalog(
         endtime = catalog['endtime'][0]
         catalog = catalog.drop(columns=['starttime', 'endtime'])
 
-    # drop oid and modelresult_oid columns
+    # drop the key columns, the compact layout doesn't have coordinates
     catalog = catalog.drop(
-        columns=['oid', 'modelresult_oid', 'coordinates', 'geom'])
+        columns=['oid', 'forecastseries_oid', 'modelresult_oid',
+                 'coordinates', 'geom'],
+        errors='ignore')
     catalog = catalog.dropna(axis=1, how='all')
 
     return Catalog(catalog,
@@ -192,3 +243,93 @@ def deserialize_seismostats_catalog(
                    bounding_polygon=bounding_polygon,
                    depth_min=depth_min,
                    depth_max=depth_max)
+
+
+def deserialize_seismostats_observations(events: pd.DataFrame) -> Catalog:
+    """
+    Deserialize observed events directly from the DB model to a
+    Seismostats Catalog object, keeping their public IDs as event IDs.
+
+    Args:
+        events: Raw tabular data from the database.
+
+    Returns:
+        Catalog object.
+    """
+    if events.empty:
+        return Catalog()
+
+    column_renames = {f'{col}_value': col for col in CATALOG_QUANTITY_FIELDS}
+    column_renames['public_id'] = 'eventID'
+    events = events.rename(columns=column_renames)
+
+    events = events.drop(
+        columns=['oid', 'forecastseries_oid', 'seismicityobservation_oid',
+                 'valid_from', 'valid_to', 'coordinates'],
+        errors='ignore')
+    events = events.dropna(axis=1, how='all')
+
+    return Catalog(events.sort_values('time', ignore_index=True))
+
+
+def _samples_to_hydjson(hydraulics: pd.DataFrame | None) -> str:
+    """
+    Format the samples of a section as hydJSON, column by column.
+    """
+    if hydraulics is None or len(hydraulics) == 0:
+        return '[]'
+
+    # every value is followed by a separator, the datetime comes last.
+    # Values are formatted once per distinct value, plans mostly repeat
+    # a few values.
+    samples = np.full(len(hydraulics), '{', dtype=object)
+    for column in hydraulics.columns:
+        codes, uniques = pd.factorize(hydraulics[column])
+        # formatted like json.dumps does
+        format = float.__repr__ if uniques.dtype.kind == 'f' \
+            else json.dumps
+        parts = [f'{json.dumps(column)}: {{"value": {format(v)}}}, '
+                 for v in uniques.tolist()]
+        # missing values have the code -1 and are left out
+        samples += np.array(parts + [''], dtype=object)[codes]
+
+    times = np.datetime_as_string(
+        hydraulics.index.to_numpy(dtype='datetime64[s]'), unit='s')
+    samples += '"datetime": {"value": "' + times.astype(object) + '"}}'
+    return f'[{", ".join(samples)}]'
+
+
+def serialize_hydjson(boreholes: list[BoreholeHydraulics]) -> str:
+    """
+    Serialize the hydraulics of boreholes to hydJSON.
+
+    Equivalent to dumping `BoreholeHydraulics.to_json`, but formats the
+    samples with vectorized operations instead of one dictionary per
+    sample.
+
+    Args:
+        boreholes: BoreholeHydraulics objects.
+
+    Returns:
+        The hydJSON of the boreholes, as list.
+    """
+    samples = {}
+    hydjson = []
+    for borehole in boreholes:
+        metadata = deepcopy(borehole.metadata)
+        metadata['publicid'] = str(metadata['publicid'])
+        metadata['sections'] = []
+        for section in borehole.values():
+            placeholder = f'__hydraulics_{len(samples)}__'
+            samples[json.dumps(placeholder)] = \
+                _samples_to_hydjson(section.hydraulics)
+            section_metadata = deepcopy(section.metadata)
+            section_metadata['publicid'] = str(section_metadata['publicid'])
+            section_metadata['hydraulics'] = placeholder
+            metadata['sections'].append(section_metadata)
+        hydjson.append(metadata)
+
+    text = json.dumps(hydjson)
+    for placeholder, section in samples.items():
+        text = text.replace(placeholder, section, 1)
+    return text
@@ -0,0 +1,113 @@
+import os
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from hermes.io.cache import ResponseCache, normalize_url
+from hermes.io.download import Downloader
+from hermes.io.tests.test_download import mock_transport
+
+
+def test_normalize_url():
+    assert normalize_url('HTTPS://Mock.com?b=2&a=1#part') == \
+        normalize_url('https://mock.com/?a=1&b=2')
+    assert normalize_url('https://mock.com?a=1') != \
+        normalize_url('https://mock.com?a=2')
+
+
+class TestResponseCache:
+    def test_get_put(self, tmp_path):
+        cache = ResponseCache(tmp_path)
+        assert cache.get('https://mock.com?a=1&b=2') is None
+
+        cache.put('https://mock.com?a=1&b=2', 'text')
+        assert cache.get('https://mock.com?b=2&a=1') == 'text'
+        assert cache.get('https://mock.com?a=1') is None
+
+    def test_ttl(self, tmp_path):
+        cache = ResponseCache(tmp_path, ttl=0,
+                              immutable_after=timedelta(days=1))
+
+        old = (datetime.now() - timedelta(days=2)).isoformat()
+        recent = datetime.now().isoformat()
+
+        cache.put(f'https://mock.com?endtime={old}', 'old')
+        cache.put(f'https://mock.com?endtime={recent}', 'recent')
+        cache.put('https://mock.com', 'no window')
+        time.sleep(0.01)
+
+        assert cache.get(f'https://mock.com?endtime={old}') == 'old'
+        assert cache.get(f'https://mock.com?endtime={recent}') is None
+        assert cache.get('https://mock.com') is None
+
+    def test_evict(self, tmp_path):
+        cache = ResponseCache(tmp_path, max_size=400)
+
+        for i in range(3):
+            cache.put(f'https://mock.com?part={i}', 'x' * 100)
+            file = cache._file(f'https://mock.com?part={i}')
+            os.utime(file, (i, i))
+
+        # reading marks part 0 as recently used
+        assert cache.get('https://mock.com?part=0') is not None
+        cache.put('https://mock.com?part=3', 'x' * 100)
+
+        assert cache.get('https://mock.com?part=0') is not None
+        assert cache.get('https://mock.com?part=1') is None
+        assert cache.get('https://mock.com?part=2') is not None
+        assert cache.get('https://mock.com?part=3') is not None
+
+    def test_evict_scans(self, tmp_path):
+        cache = ResponseCache(tmp_path, max_size=400)
+
+        with patch.object(cache, '_evict', wraps=cache._evict) as evict:
+            # the size is determined on the first write only
+            cache.put('https://mock.com?part=0', 'x' * 100)
+            cache.put('https://mock.com?part=1', 'x' * 100)
+            cache.put('https://mock.com?part=2', 'x' * 100)
+            assert evict.call_count == 1
+
+            # until it exceeds the maximum
+            cache.put('https://mock.com?part=3', 'x' * 100)
+            assert evict.call_count == 2
+            assert len(list(tmp_path.glob('*/*'))) == 3
+
+            # or other processes could have written to the cache
+            with patch('hermes.io.cache.time.monotonic',
+                       return_value=time.monotonic() + 3600):
+                cache.put('https://mock.com?part=0', 'x')
+            assert evict.call_count == 3
+
+
+def test_download_cached(tmp_path):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url)
+        return httpx.Response(200, text=request.url.params['part'])
+
+    urls = [f'https://mock.com?part={i}' for i in range(3)]
+    downloader = Downloader(cache=ResponseCache(tmp_path))
+
+    with mock_transport(handler):
+        assert downloader.download(urls, int) == [0, 1, 2]
+        assert downloader.download(urls, int) == [0, 1, 2]
+
+    assert len(requests) == 3
+
+
+def test_download_not_cached_invalid(tmp_path):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text='garbage')
+
+    cache = ResponseCache(tmp_path)
+    downloader = Downloader(cache=cache)
+
+    with mock_transport(handler):
+        with pytest.raises(ValueError):
+            downloader.download(['https://mock.com?part=0'], int)
+
+    assert cache.get('https://mock.com?part=0') is None
@@ -0,0 +1,82 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from hermes.io.download import Downloader, TokenBucket
+
+
+def mock_transport(handler):
+    return patch('hermes.io.download.Downloader._transport',
+                 return_value=httpx.MockTransport(handler))
+
+
+class TestDownloader:
+    def test_download(self):
+        in_flight = 0
+        max_in_flight = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            # later parts are answered first
+            await asyncio.sleep(0.1 / int(request.url.params['part']))
+            in_flight -= 1
+            return httpx.Response(200, text=request.url.params['part'])
+
+        urls = [f'https://mock.com?part={i}' for i in range(1, 9)]
+
+        with mock_transport(handler):
+            parts = Downloader(concurrency=3).download(urls, int)
+
+        assert parts == list(range(1, 9))
+        assert max_in_flight == 3
+
+    def test_retries(self):
+        attempts = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            attempts.append(request.url)
+            if len(attempts) < 3:
+                return httpx.Response(503)
+            return httpx.Response(200, text='ok')
+
+        with mock_transport(handler):
+            parts = Downloader(retries=2, retry_delay=0.01).download(
+                ['https://mock.com'], str)
+
+        assert parts == ['ok']
+        assert len(attempts) == 3
+
+        attempts.clear()
+        with mock_transport(handler), pytest.raises(httpx.HTTPStatusError):
+            Downloader(retries=1, retry_delay=0.01).download(
+                ['https://mock.com'], str)
+
+    def test_client_error(self):
+        attempts = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            attempts.append(request.url)
+            return httpx.Response(404)
+
+        with mock_transport(handler), pytest.raises(httpx.HTTPStatusError):
+            Downloader(retries=3, retry_delay=0.01).download(
+                ['https://mock.com'], str)
+
+        # not retried
+        assert len(attempts) == 1
+
+    def test_rate_limit(self):
+        async def acquire(bucket, n):
+            for _ in range(n):
+                await bucket.acquire()
+
+        start = time.monotonic()
+        asyncio.run(acquire(TokenBucket(rate=20), 5))
+
+        # the first request is started immediately
+        assert time.monotonic() - start >= 0.2
@@ -1,10 +1,13 @@
 import json
 import os
 from datetime import datetime
-from unittest.mock import MagicMock, Mock, patch
+from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
+from hydws.parser import BoreholeHydraulics
 
+from hermes.config import get_settings
 from hermes.io.hydraulics import HydraulicsDataSource
 
 MODULE_LOCATION = os.path.join(os.path.dirname(os.path.abspath(__file__)),
@@ -33,31 +36,86 @@ class TestHydraulicsDataSource:
 
         assert json.loads(hydraulics.get_json()) == [hydjson]
 
-    @patch('hermes.io.datasource.requests.get')
-    def test_get_catalog_from_hydws(self, mock_get: MagicMock):
-
-        with open(os.path.join(MODULE_LOCATION, 'borehole.json'), 'r') as f:
-            answer = Mock(text=f.read(), status_code=200)
-
-        url = 'https://mock.com?level=hydraulic&starttime=2021-12-25' \
-            'T00%3A00%3A00&endtime=2023-12-12T12%3A01%3A03'
-
-        mock_get.return_value = answer
+    @patch('hermes.io.hydraulics.get_settings',
+           return_value=get_settings().model_copy(
+               update={'HYDRAULICS_CHUNK_SIZE': 1}))
+    @patch('hermes.io.download.Downloader._transport')
+    def test_get_catalog_from_hydws(self,
+                                    mock_transport: MagicMock,
+                                    mock_settings: MagicMock):
+        borehole = BoreholeHydraulics.from_file(
+            os.path.join(MODULE_LOCATION, 'borehole.json'))
+
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            params = request.url.params
+            requests.append((params['starttime'], params['endtime']))
+            assert params['level'] == 'hydraulic'
+            part = borehole.query_datetime(
+                datetime.fromisoformat(params['starttime']),
+                datetime.fromisoformat(params['endtime']))
+            return httpx.Response(200, json=part.to_json())
+
+        mock_transport.return_value = httpx.MockTransport(handler)
 
         base_url = 'https://mock.com'
-        starttime = datetime(2021, 12, 25)
-        endtime = datetime(2023, 12, 12, 12, 1, 3)
+        starttime = datetime(2022, 4, 18, 13, 30)
+        endtime = datetime(2022, 4, 20, 12)
 
         hydraulics = HydraulicsDataSource.from_ws(
             base_url, starttime, endtime)
 
-        mock_get.assert_called_with(url, timeout=300)
+        # the samples are split between the first two slices
+        assert sorted(requests) == [
+            ('2022-04-18T13:30:00', '2022-04-19T13:30:00'),
+            ('2022-04-19T13:30:00', '2022-04-20T12:00:00')]
+
+        section = hydraulics.get_hydraulics()[0].nloc['16A-32/section_02']
+        assert len(section.hydraulics) == \
+            len(borehole.nloc['16A-32/section_02'].hydraulics)
+        assert section.hydraulics.index.is_monotonic_increasing
+        assert len(hydraulics.get_hydraulics()[0]) == len(borehole)
 
         assert len(hydraulics.get_hydraulics(
             starttime=datetime(2022, 4, 19, 13, 4, 0),
             endtime=datetime(2022, 4, 19, 13, 5, 0))[0]
             .nloc['16A-32/section_02'].hydraulics) == 60
 
+    @patch('hermes.io.hydraulics.get_settings',
+           return_value=get_settings().model_copy(
+               update={'HYDRAULICS_CHUNK_SIZE': 30}))
+    @patch('hermes.io.download.Downloader._transport')
+    def test_get_catalog_from_hydws_years(self,
+                                          mock_transport: MagicMock,
+                                          mock_settings: MagicMock):
+        borehole = BoreholeHydraulics.from_file(
+            os.path.join(MODULE_LOCATION, 'borehole.json'))
+
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            params = request.url.params
+            requests.append((params['starttime'], params['endtime']))
+            part = borehole.query_datetime(
+                datetime.fromisoformat(params['starttime']),
+                datetime.fromisoformat(params['endtime']))
+            return httpx.Response(200, json=part.to_json())
+
+        mock_transport.return_value = httpx.MockTransport(handler)
+
+        hydraulics = HydraulicsDataSource.from_ws(
+            'https://mock.com', datetime(2021, 12, 25), datetime(2023, 12, 12))
+
+        # 717 days in slices of 30 days
+        assert len(requests) == 24
+        assert min(requests) == ('2021-12-25T00:00:00', '2022-01-24T00:00:00')
+        assert max(requests) == ('2023-11-15T00:00:00', '2023-12-12T00:00:00')
+
+        assert len(hydraulics.get_hydraulics()[0]
+                   .nloc['16A-32/section_02'].hydraulics) == \
+            len(borehole.nloc['16A-32/section_02'].hydraulics)
+
     @patch('hermes.io.hydraulics.HydraulicsDataSource.from_file',
            autocast=True)
     @patch('hermes.io.hydraulics.HydraulicsDataSource.from_ws',
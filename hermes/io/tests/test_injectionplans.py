@@ -6,7 +6,11 @@ import pytest
 from hydws.parser import BoreholeHydraulics
 
 from hermes.io.injectionplans import (InjectionPlanBuilder, build_constant,
-                                      build_fixed, build_multiply)
+                                      build_fixed, build_injectionplans,
+                                      build_multiply, expand_plan,
+                                      expand_steps, injectionplan_hydjson,
+                                      plan_cache_key)
+from hermes.schemas.data_schemas import InjectionPlan
 
 MODULE_LOCATION = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                                'data')
@@ -34,10 +38,79 @@ class TestInjectionPlanBuilder:
         assert plan['sections'][0]['hydraulics'][0]['bottomflow']['value'] \
             == 0.02
 
+        # the observed hydraulics can also be passed already parsed
+        builder = InjectionPlanBuilder(template, [hydraulics])
+        assert builder.build(start, end) == plan
+
         template['type'] = 'xx'
         with pytest.raises(ValueError):
             InjectionPlanBuilder(template)
 
+    def test_build_injectionplans(self):
+        templates = []
+        for name in ['constant', 'fixed', 'multiply']:
+            with open(os.path.join(MODULE_LOCATION, f'{name}_template.json'),
+                      'r') as f:
+                templates.append(json.load(f))
+
+        plans = build_injectionplans(templates, [data], start, end)
+
+        assert [plan.to_json() for plan in expand_plan(plans)] == \
+            [InjectionPlanBuilder(template, [data]).build(start, end)
+             for template in templates]
+
+    def test_build_steps(self):
+        with open(os.path.join(MODULE_LOCATION, 'fixed_template.json'),
+                  'r') as f:
+            template = json.load(f)
+
+        builder = InjectionPlanBuilder(template, [data])
+        plan = json.loads(json.dumps(builder.build_steps(start, end)))
+
+        # three breakpoints instead of eleven samples
+        [section] = plan['sections']
+        assert 'hydraulics' not in section
+        assert section['steps']['datetime'] == [
+            '2022-04-19T14:01:00', '2022-04-19T14:05:00',
+            '2022-04-19T14:08:30']
+        assert section['steps']['values']['bottomflow'] == \
+            [0.03, None, 0.04]
+
+        [expanded] = expand_plan([plan])
+        assert expanded.to_json() == builder.build(start, end)
+
+        stored = InjectionPlan(steps=json.dumps([plan]).encode())
+        assert json.loads(injectionplan_hydjson(stored)) == \
+            [builder.build(start, end)]
+
+    def test_plan_cache_key(self):
+        templates = {}
+        for name in ['constant', 'multiply']:
+            with open(os.path.join(MODULE_LOCATION, f'{name}_template.json'),
+                      'r') as f:
+                templates[name] = json.load(f)
+
+        def keys(observed, start=start, end=end):
+            return {name: plan_cache_key(t, 'plan', [observed], start, end)
+                    for name, t in templates.items()}
+
+        key = keys(hydraulics)
+        assert key == keys(BoreholeHydraulics(data))
+        assert key['constant'] != key['multiply']
+        assert key != keys(hydraulics, end=end + timedelta(minutes=1))
+        assert plan_cache_key(templates['constant'], 'other',
+                              [hydraulics], start, end) != key['constant']
+
+        # only samples inside the lookback window change multiply plans
+        changed = BoreholeHydraulics(data)
+        samples = changed.nloc['16A-32/section_02'].hydraulics
+        samples.iloc[0, 0] += 1
+        assert keys(changed) == key
+
+        samples.iloc[-1, 0] += 1
+        assert keys(changed)['constant'] == key['constant']
+        assert keys(changed)['multiply'] != key['multiply']
+
     def test_build_fixed(self):
         with open(os.path.join(MODULE_LOCATION, 'fixed_template.json'),
                   'r') as f:
@@ -84,3 +157,23 @@ class TestInjectionPlanBuilder:
         assert plan['bottomflow'].unique() == [0.03]
         assert plan['topflow_uncertainty'].unique() == [0]
         assert len(plan.columns) == 3
+
+    def test_expand_steps(self):
+        steps = {'starttime': '2022-04-19T14:00:00',
+                 'endtime': '2022-04-19T14:04:00',
+                 'resolution': 60,
+                 'interpolation': 'linear',
+                 'datetime': ['2022-04-19T14:01:00', '2022-04-19T14:02:30',
+                              '2022-04-19T14:03:00'],
+                 'values': {'topflow': [1.0, None, 3.0],
+                            'bottomflow': [None, None, None]}}
+
+        plan = expand_steps(steps)
+
+        # the breakpoint between the samples is kept
+        assert len(plan) == 6
+        assert plan['topflow'].tolist() == [1, 1, 2, 2.5, 3, 3]
+        assert plan['bottomflow'].isna().all()
+
+        steps['interpolation'] = 'none'
+        assert expand_steps(steps)['topflow'].tolist() == [1, 1, 1, 1, 3, 3]
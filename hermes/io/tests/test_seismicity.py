@@ -1,10 +1,13 @@
 import os
 from datetime import datetime, timedelta
-from unittest.mock import MagicMock, Mock, patch
+from unittest.mock import MagicMock, patch
 
+import httpx
+import pandas as pd
 import pytest
+from seismostats import Catalog
 
-from hermes.io.seismicity import SeismicityDataSource
+from hermes.io.seismicity import SeismicityDataSource, _concat_parts
 
 MODULE_LOCATION = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                                'data')
@@ -31,11 +34,19 @@ class TestSeismicityDataSource:
         assert catalog.get_quakeml() == catalog.data.to_quakeml()
 
     @patch('seismostats.FDSNWSEventClient._get_batch_params')
-    @patch('hermes.io.datasource.requests.get')
-    def test_get_catalog_from_fdsnws(self, mock_get, params):
+    @patch('hermes.io.download.Downloader._transport')
+    def test_get_catalog_from_fdsnws(self, mock_transport, params):
 
         with open(os.path.join(MODULE_LOCATION, 'quakeml.xml'), 'r') as f:
-            answer = Mock(text=f.read(), status_code=200)
+            answer = f.read()
+
+        requested = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requested.append(str(request.url))
+            return httpx.Response(200, text=answer)
+
+        mock_transport.return_value = httpx.MockTransport(handler)
 
         params.return_value = [
             {'starttime': '2021-12-25T00:00:00',
@@ -52,7 +63,6 @@ class TestSeismicityDataSource:
                 'endtime=2022-12-25T00%3A00%3A00&limit=1000&offset=0',
                 'https://mock.com?starttime=2021-12-25T00%3A00%3A00&'
                 'endtime=2022-12-25T00%3A00%3A00&limit=1000&offset=1000']
-        mock_get.return_value = answer
 
         base_url = 'https://mock.com'
         starttime = datetime(2021, 12, 25)
@@ -60,10 +70,55 @@ class TestSeismicityDataSource:
         catalog = SeismicityDataSource.from_ws(
             base_url, starttime, endtime)
 
-        for url in urls:
-            mock_get.assert_any_call(url, timeout=300)
+        assert sorted(requested) == urls
+
+        # both parts return the same events
+        assert len(catalog.data) == 2
+        assert catalog.data['time'].is_monotonic_increasing
+        # the responses of multiple parts are not kept
+        assert catalog.quakeml is None
+
+    @patch('seismostats.FDSNWSEventClient._get_batch_params')
+    @patch('hermes.io.download.Downloader._transport')
+    def test_keep_quakeml_from_fdsnws(self, mock_transport, params):
+        with open(os.path.join(MODULE_LOCATION, 'quakeml.xml'), 'r') as f:
+            answer = f.read()
+
+        mock_transport.return_value = httpx.MockTransport(
+            lambda request: httpx.Response(200, text=answer))
+        params.return_value = [{'starttime': '2021-12-25T00:00:00',
+                                'endtime': '2022-12-25T00:00:00'}]
 
-        assert len(catalog.data) == 4
+        catalog = SeismicityDataSource.from_ws(
+            'https://mock.com', datetime(2021, 12, 25), datetime(2022, 12, 25))
+
+        assert len(catalog.data) == 2
+        assert catalog.get_quakeml() == answer
+        assert catalog.get_quakeml(endtime=datetime(2021, 12, 30)) != answer
+
+    def test_concat_parts(self):
+        times = pd.date_range('2021-01-01', periods=6, freq='h')
+        parts = [Catalog({'eventID': ['e5', 'e4', 'e3'],
+                          'time': times[5:2:-1]}),
+                 Catalog({'eventID': ['e3', 'e2', 'e1', 'e0'],
+                          'time': times[3::-1]}),
+                 Catalog()]
+
+        catalog = _concat_parts(parts)
+        assert catalog['eventID'].tolist() == \
+            ['e0', 'e1', 'e2', 'e3', 'e4', 'e5']
+        assert catalog.index.tolist() == list(range(6))
+
+        catalog = _concat_parts([parts[1], parts[0]])
+        assert catalog['eventID'].tolist() == \
+            ['e0', 'e1', 'e2', 'e3', 'e4', 'e5']
+
+        # events without public ID are never dropped
+        catalog = _concat_parts([Catalog({'eventID': [None, None],
+                                          'time': times[:2]})])
+        assert len(catalog) == 2
+
+        assert _concat_parts([Catalog()]).empty
 
     @patch('hermes.io.seismicity.SeismicityDataSource.from_file',
            autocast=True)
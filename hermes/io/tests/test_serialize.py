@@ -1,11 +1,16 @@
+import json
 import os
 import pickle
 
+import numpy as np
 import pandas as pd
+import shapely
+from hydws.parser import BoreholeHydraulics
 from numpy.testing import assert_almost_equal
 from seismostats import Catalog
 
-from hermes.io.serialize import (serialize_seismostats_catalog,
+from hermes.io.serialize import (points_to_ewkb, serialize_hydjson,
+                                 serialize_seismostats_catalog,
                                  serialize_seismostats_grrategrid)
 from hermes.io.tests.test_seismicity import MODULE_LOCATION
 
@@ -22,7 +27,8 @@ class TestGRRategrid:
         rategrid = data[-1]
 
         rategrid = serialize_seismostats_grrategrid(rategrid)
-        assert_almost_equal(rategrid[-1]['b_value'], 2.097799, 5)
+        assert_almost_equal(rategrid['b_value'][-1], 2.097799, 5)
+        assert 'b' not in rategrid
 
 
 class TestCatalog:
@@ -37,4 +43,32 @@ class TestCatalog:
 
         events = serialize_seismostats_catalog(catalog)
 
-        assert events[0]['magnitude_value'] == 2.510115344
+        assert events['magnitude_value'][0] == 2.510115344
+        assert len(events['coordinates']) == len(catalog)
+
+    def test_points_to_ewkb(self):
+        longitude = np.array([8.5, 7.25, np.nan])
+        latitude = np.array([47.1, 46.0, 46.0])
+
+        ewkb = points_to_ewkb(longitude, latitude)
+
+        expected = shapely.to_wkb(
+            shapely.set_srid(shapely.points(longitude[:2], latitude[:2]),
+                             4326),
+            hex=True, include_srid=True)
+
+        assert [e.upper() for e in ewkb[:2]] == list(expected)
+        assert ewkb[2] is None
+
+
+class TestHydraulics:
+    def test_hydjson_serialization(self):
+        borehole = BoreholeHydraulics.from_file(
+            os.path.join(MODULE_LOCATION, 'borehole.json'))
+        section = borehole.nloc['16A-32/section_02']
+        # missing values are left out
+        section.hydraulics.iloc[0, 0] = np.nan
+
+        assert json.loads(serialize_hydjson([borehole])) == \
+            [borehole.to_json()]
+        assert json.loads(serialize_hydjson([])) == []
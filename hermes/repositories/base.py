@@ -1,10 +1,16 @@
+import io
+from typing import Mapping
 from uuid import UUID
 
-from sqlalchemy import select
+import pandas as pd
+from numpy.typing import ArrayLike
+from sqlalchemy import Integer, Table, select
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import Session
 
 from hermes.datamodel.base import ORMBase
 from hermes.schemas.base import Model
+from hermes.utils.uuids import random_uuids
 
 
 def repository_factory(model: Model, orm_model: ORMBase):
@@ -14,10 +20,14 @@ def repository_factory(model: Model, orm_model: ORMBase):
         orm_model: ORMBase
 
         @classmethod
-        def create(cls, session: Session, data: Model) -> Model:
+        def create(cls, session: Session, data: Model,
+                   commit: bool = True) -> Model:
             db_model = cls.orm_model(**data.model_dump(exclude_unset=True))
             session.add(db_model)
-            session.commit()
+            if commit:
+                session.commit()
+            else:
+                session.flush()
             session.refresh(db_model)
             return cls.model.model_validate(db_model)
 
@@ -63,3 +73,64 @@ def repository_factory(model: Model, orm_model: ORMBase):
     RepositoryBase.orm_model = orm_model
 
     return RepositoryBase
+
+
+def copy_from_dataframe(session: Session,
+                        table: Table,
+                        frame: pd.DataFrame | Mapping[str, ArrayLike],
+                        chunksize: int = 100_000) -> int:
+    """
+    Bulk insert tabular data into a table using PostgreSQL
+    `COPY ... FROM STDIN`.
+
+    The data is streamed to the database as CSV in chunks of
+    `chunksize` rows, on the connection (and inside the transaction)
+    of the given session. Columns which don't exist on the table are
+    ignored, missing `oid` values of UUID keys are generated client side.
+
+    Args:
+        session: Session to use for the insert.
+        table: Table to insert the rows into.
+        frame: DataFrame or column buffers (mapping of column name to
+            array) with the table column names as keys.
+        chunksize: Number of rows sent per COPY statement.
+
+    Returns:
+        Number of rows inserted.
+    """
+    if not isinstance(frame, pd.DataFrame):
+        frame = pd.DataFrame(frame, copy=False)
+
+    if frame.empty:
+        return 0
+
+    frame = frame[[c for c in frame.columns if c in table.c]]
+
+    if 'oid' in table.c and 'oid' not in frame.columns \
+            and isinstance(table.c.oid.type, PG_UUID):
+        frame = frame.assign(oid=random_uuids(len(frame)))
+
+    # integer columns holding NaN's would otherwise be written as floats
+    for column in frame.columns:
+        if isinstance(table.c[column].type, Integer) \
+                and frame[column].dtype.kind == 'f':
+            frame = frame.assign(**{column: frame[column].astype('Int64')})
+
+    connection = session.connection()
+    preparer = connection.dialect.identifier_preparer
+    columns = ', '.join(preparer.quote(c) for c in frame.columns)
+    stmt = f'COPY {preparer.format_table(table)} ({columns}) ' \
+        'FROM STDIN WITH (FORMAT csv)'
+
+    cursor = connection.connection.cursor()
+    try:
+        for start in range(0, len(frame), chunksize):
+            buffer = io.StringIO()
+            frame.iloc[start:start + chunksize].to_csv(
+                buffer, header=False, index=False)
+            buffer.seek(0)
+            cursor.copy_expert(stmt, buffer)
+    finally:
+        cursor.close()
+
+    return len(frame)
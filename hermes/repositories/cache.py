@@ -0,0 +1,141 @@
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Hashable
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, scoped_session
+
+from hermes.config import get_settings
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+_PENDING = 'identity_cache_pending'
+
+
+class IdentityCache:
+    """
+    Bounded LRU cache mapping the natural key of a row to its oid.
+
+    The first element of every key is the forecastseries_oid, so that
+    all entries of a forecast series can be invalidated at once. New
+    entries are only published once the transaction which looked them
+    up is committed, a rollback discards them.
+
+    Args:
+        name: Name of the cache.
+        maxsize: Maximum number of entries, defaults to the
+            IDENTITY_CACHE_SIZE setting.
+    """
+
+    def __init__(self, name: str, maxsize: int | None = None):
+        self.name = name
+        self._maxsize = maxsize
+        self._entries: OrderedDict[Hashable, UUID] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self) -> int:
+        if self._maxsize is None:
+            self._maxsize = get_settings().IDENTITY_CACHE_SIZE
+        return self._maxsize
+
+    def get(self, key: tuple) -> UUID | None:
+        with self._lock:
+            oid = self._entries.get(key)
+            if oid is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return oid
+
+    def add(self, session: Session, key: tuple, oid: UUID) -> None:
+        """
+        Add an entry once the current transaction of `session` commits.
+        """
+        session.info.setdefault(_PENDING, {}) \
+            .setdefault(_boundary(session), []).append((self, key, oid))
+
+    def put(self, key: tuple, oid: UUID) -> None:
+        maxsize = self.maxsize
+        with self._lock:
+            self._entries[key] = oid
+            self._entries.move_to_end(key)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, forecastseries_oid: UUID) -> None:
+        with self._lock:
+            for key in [k for k in self._entries
+                        if k[0] == forecastseries_oid]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses,
+                             self.maxsize, len(self._entries))
+
+
+gridcell_cache = IdentityCache('gridcell')
+timestep_cache = IdentityCache('timestep')
+
+
+def invalidate_forecastseries(forecastseries_oid: UUID) -> None:
+    """
+    Remove all cached GridCells and TimeSteps of a forecast series.
+    """
+    gridcell_cache.invalidate(forecastseries_oid)
+    timestep_cache.invalidate(forecastseries_oid)
+
+
+def _boundary(session: Session):
+    """
+    The innermost savepoint, or the root transaction of the session.
+    """
+    if isinstance(session, scoped_session):
+        session = session()
+    return session.get_nested_transaction() or session.get_transaction()
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_pending(session: Session) -> None:
+    # also called when a savepoint is released, its entries are then
+    # only moved to the enclosing transaction.
+    pending = session.info.get(_PENDING)
+    if not pending:
+        return
+
+    # the released savepoint is still the innermost one, but inactive
+    savepoint = session.get_nested_transaction()
+    if savepoint is None or savepoint.is_active:
+        for entries in session.info.pop(_PENDING).values():
+            for cache, key, oid in entries:
+                cache.put(key, oid)
+        return
+
+    parent = savepoint.parent
+    while not parent.nested and parent.parent is not None:
+        parent = parent.parent
+    pending.setdefault(parent, []).extend(pending.pop(savepoint, []))
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _discard_pending(session: Session, transaction) -> None:
+    # entries still pending at the end of their transaction were rolled
+    # back, committed ones were already published or moved.
+    pending = session.info.get(_PENDING)
+    if not pending:
+        return
+    if transaction.parent is None:
+        session.info.pop(_PENDING)
+    else:
+        pending.pop(transaction, None)
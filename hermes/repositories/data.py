@@ -1,23 +1,116 @@
 import json
+from datetime import datetime
 from uuid import UUID
 
+import numpy as np
+import pandas as pd
 from hydws.parser import BoreholeHydraulics
 from seismostats import Catalog
-from sqlalchemy import insert, select
+from sqlalchemy import (Column, MetaData, Row, Select, Table, delete, exists,
+                        func, or_, select, text)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from hermes.datamodel.base import ORMBase
+from hermes.datamodel.blobs import BlobTable
 from hermes.datamodel.data_tables import (EventObservationTable,
                                           InjectionObservationTable,
                                           InjectionPlanTable,
                                           SeismicityObservationTable)
 from hermes.datamodel.project_tables import ForecastTable
 from hermes.datamodel.result_tables import ModelRunTable
-from hermes.io.serialize import serialize_seismostats_catalog
-from hermes.repositories.base import repository_factory
-from hermes.schemas.data_schemas import (EventObservation,
+from hermes.io.serialize import (deserialize_seismostats_observations,
+                                 serialize_hydjson,
+                                 serialize_seismostats_catalog)
+from hermes.repositories.base import copy_from_dataframe, repository_factory
+from hermes.schemas.data_schemas import (Blob, EventObservation,
                                          InjectionObservation, InjectionPlan,
                                          SeismicityObservation)
 
+# columns of the observation store which don't describe the event itself
+STORE_COLUMNS = ['oid', 'coordinates', 'seismicityobservation_oid',
+                 'forecastseries_oid', 'valid_from', 'valid_to']
+
+# staging table for the events merged into the observation store
+EVENTS_INCOMING = Table(
+    'eventobservation_incoming', MetaData(),
+    *[Column(c.name, c.type) for c in EventObservationTable.__table__.c
+      if c.name not in STORE_COLUMNS],
+    prefixes=['TEMPORARY'],
+    postgresql_on_commit='DROP')
+
+_EVENT_COLUMNS = [c.name for c in EVENTS_INCOMING.c if c.name != 'public_id']
+
+# close the current versions of the events in the merged time range, or
+# with a merged public ID, which changed or are no longer observed.
+CLOSE_EVENTS = f"""
+UPDATE eventobservation s SET valid_to = :snapshot_time
+WHERE s.forecastseries_oid = :forecastseries_oid
+AND s.valid_to IS NULL
+AND (s.time_value BETWEEN :starttime AND :endtime
+     OR s.public_id IN (SELECT public_id FROM eventobservation_incoming))
+AND NOT EXISTS (
+    SELECT 1 FROM eventobservation_incoming i
+    WHERE i.public_id = s.public_id
+    AND ({', '.join(f'i.{c}' for c in _EVENT_COLUMNS)})
+        IS NOT DISTINCT FROM
+        ({', '.join(f's.{c}' for c in _EVENT_COLUMNS)})
+)
+"""
+
+# insert a new version of the events without a current version
+INSERT_EVENTS = f"""
+INSERT INTO eventobservation (oid, forecastseries_oid, valid_from,
+    coordinates, public_id, {', '.join(_EVENT_COLUMNS)})
+SELECT gen_random_uuid(), :forecastseries_oid, :snapshot_time,
+    ST_SetSRID(ST_MakePoint(i.longitude_value, i.latitude_value), 4326),
+    i.public_id, {', '.join(f'i.{c}' for c in _EVENT_COLUMNS)}
+FROM eventobservation_incoming i
+WHERE NOT EXISTS (
+    SELECT 1 FROM eventobservation s
+    WHERE s.forecastseries_oid = :forecastseries_oid
+    AND s.valid_to IS NULL
+    AND s.public_id = i.public_id
+)
+"""
+
+
+def event_public_ids(catalog: Catalog) -> np.ndarray:
+    """
+    Get the IDs identifying the events of a catalog in the observation
+    store. Events without a public ID, or sharing it with other events
+    of the catalog, are identified by their origin time.
+    """
+    if catalog.empty:
+        return np.array([], dtype=object)
+
+    times = catalog['time'].dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+    if 'eventID' in catalog.columns:
+        ids = catalog['eventID'].astype(object)
+    else:
+        ids = pd.Series(None, index=catalog.index, dtype=object)
+
+    ambiguous = ids.isna() | ids.duplicated(keep=False)
+    ids = ids.where(~ambiguous, ids.fillna('') + '#' + times)
+    return ids.to_numpy()
+
+
+def snapshot_events(observation: SeismicityObservation | Row) -> Select:
+    """
+    Select the events of a snapshot of the observation store, as they
+    were known at the time of the snapshot.
+    """
+    table = EventObservationTable
+    return select(*[c for c in table.__table__.c
+                    if c.name != 'coordinates']) \
+        .where(table.forecastseries_oid == observation.forecastseries_oid,
+               table.time_value >= observation.starttime,
+               table.time_value <= observation.endtime,
+               table.valid_from <= observation.snapshot_time,
+               or_(table.valid_to.is_(None),
+                   table.valid_to > observation.snapshot_time)) \
+        .order_by(table.time_value)
+
 
 class EventObservationRepository(repository_factory(
         EventObservation, EventObservationTable)):
@@ -28,11 +121,9 @@ class EventObservationRepository(repository_factory(
                             seismicityobservation_oid: UUID) -> UUID:
 
         events = serialize_seismostats_catalog(data, EventObservation)
+        events['seismicityobservation_oid'] = seismicityobservation_oid
 
-        session.execute(
-            insert(EventObservationTable)
-            .values(seismicityobservation_oid=seismicityobservation_oid),
-            events)
+        copy_from_dataframe(session, EventObservationTable.__table__, events)
         session.commit()
 
     @classmethod
@@ -47,6 +138,60 @@ class EventObservationRepository(repository_factory(
 
         cls.create_from_catalog(session, catalog, seismicityobservation_oid)
 
+    @classmethod
+    def lock_store(cls,
+                   session: Session,
+                   forecastseries_oid: UUID) -> datetime:
+        """
+        Lock the observation store of a ForecastSeries until the end of
+        the transaction.
+
+        Returns:
+            The time of the snapshot of the store, later than all changes
+            committed to it before.
+        """
+        session.execute(
+            text('SELECT pg_advisory_xact_lock(hashtextextended(:key, 0))'),
+            {'key': f'eventobservation:{forecastseries_oid}'})
+        return session.execute(text(
+            "SELECT clock_timestamp() AT TIME ZONE 'UTC'")).scalar()
+
+    @classmethod
+    def merge_into_store(cls,
+                         session: Session,
+                         forecastseries_oid: UUID,
+                         data: Catalog,
+                         starttime: datetime,
+                         endtime: datetime,
+                         snapshot_time: datetime,
+                         commit: bool = True) -> None:
+        """
+        Merge the events of a catalog covering starttime to endtime into
+        the observation store of a ForecastSeries.
+
+        Events are identified by their public ID. Events which changed get
+        a new version valid from snapshot_time, events of the time range
+        which are no longer in the catalog are closed at snapshot_time.
+        """
+        events = pd.DataFrame(
+            serialize_seismostats_catalog(data, EventObservation))
+        events['public_id'] = event_public_ids(data)
+        events = events.drop_duplicates('public_id', keep='last')
+
+        EVENTS_INCOMING.create(session.connection())
+        copy_from_dataframe(session, EVENTS_INCOMING, events)
+
+        params = {'forecastseries_oid': forecastseries_oid,
+                  'starttime': starttime,
+                  'endtime': endtime,
+                  'snapshot_time': snapshot_time}
+        session.execute(text(CLOSE_EVENTS), params)
+        session.execute(text(INSERT_EVENTS), params)
+        EVENTS_INCOMING.drop(session.connection())
+
+        if commit:
+            session.commit()
+
 
 class SeismicityObservationRepository(repository_factory(
         SeismicityObservation, SeismicityObservationTable)):
@@ -55,10 +200,17 @@ class SeismicityObservationRepository(repository_factory(
     def create_from_catalog(cls,
                             session: Session,
                             data: Catalog,
-                            forecast_oid: UUID) -> UUID:
-        qml = data.to_quakeml()
+                            forecast_oid: UUID,
+                            quakeml: str | None = None) -> UUID:
+        """
+        Store a catalog and its events. The QuakeML of the catalog, eg.
+        the original response it was parsed from, is only generated if
+        it isn't passed.
+        """
+        if quakeml is None:
+            quakeml = data.to_quakeml()
         object_db = SeismicityObservation(
-            data=qml,
+            data=quakeml,
             forecast_oid=forecast_oid
         )
         object_db = cls.create(session, object_db)
@@ -85,6 +237,110 @@ class SeismicityObservationRepository(repository_factory(
 
         return object_db
 
+    @classmethod
+    def get_store_coverage(cls,
+                           session: Session,
+                           forecastseries_oid: UUID) \
+            -> tuple[datetime, datetime] | None:
+        """
+        Get the time range covered by the observation store of a
+        ForecastSeries, None if nothing was stored yet.
+        """
+        q = select(func.min(SeismicityObservationTable.starttime),
+                   func.max(SeismicityObservationTable.endtime)) \
+            .where(SeismicityObservationTable.forecastseries_oid
+                   == forecastseries_oid)
+        starttime, endtime = session.execute(q).one()
+        return (starttime, endtime) if starttime is not None else None
+
+    @classmethod
+    def create_snapshot(cls,
+                        session: Session,
+                        forecast_oid: UUID,
+                        forecastseries_oid: UUID,
+                        starttime: datetime,
+                        endtime: datetime,
+                        snapshot_time: datetime,
+                        commit: bool = True) -> SeismicityObservation:
+        """
+        Create a seismicity observation referencing the events of the
+        observation store of the ForecastSeries between starttime and
+        endtime, as they are known at snapshot_time.
+        """
+        object_db = SeismicityObservation(
+            forecast_oid=forecast_oid,
+            forecastseries_oid=forecastseries_oid,
+            starttime=starttime,
+            endtime=endtime,
+            snapshot_time=snapshot_time
+        )
+        return cls.create(session, object_db, commit=commit)
+
+    @classmethod
+    def get_quakeml(cls, session: Session, oid: UUID) -> bytes:
+        """
+        Get the QuakeML of a seismicity observation, generated from the
+        observation store for snapshots.
+        """
+        observation = cls.get_by_id(session, oid)
+        if observation.data is not None:
+            return observation.data
+        return cls.get_catalog(session, oid).to_quakeml().encode()
+
+    @classmethod
+    def get_catalog(cls, session: Session, oid: UUID) -> Catalog:
+        """
+        Get the events of a seismicity observation as Catalog, read from
+        the stored event columns instead of parsing the QuakeML.
+        """
+        table = SeismicityObservationTable
+        observation = session.execute(
+            select(table.data_hash.is_(None).label('snapshot'),
+                   table.forecastseries_oid,
+                   table.starttime,
+                   table.endtime,
+                   table.snapshot_time)
+            .where(table.oid == oid)).one()
+
+        if observation.snapshot:
+            q = snapshot_events(observation)
+        else:
+            events = EventObservationTable
+            q = select(*[c for c in events.__table__.c
+                         if c.name != 'coordinates']) \
+                .where(events.seismicityobservation_oid == oid) \
+                .order_by(events.time_value)
+
+        events = pd.read_sql_query(q, session.connection())
+        return deserialize_seismostats_observations(events)
+
+
+class BlobRepository(repository_factory(Blob, BlobTable)):
+    @classmethod
+    def delete_unreferenced(cls, session: Session) -> int:
+        """
+        Delete the blobs which aren't referenced anymore, eg. after the
+        forecasts using them were deleted.
+
+        Returns:
+            Number of deleted blobs, 0 if a blob was referenced again
+            concurrently, it is deleted the next time instead.
+        """
+        references = [fk.parent
+                      for table in ORMBase.metadata.tables.values()
+                      for fk in table.foreign_keys
+                      if fk.column is BlobTable.__table__.c.hash]
+        q = delete(BlobTable).where(
+            *[~exists().where(column == BlobTable.hash)
+              for column in references])
+        try:
+            with session.begin_nested():
+                deleted = session.execute(q).rowcount
+        except IntegrityError:
+            deleted = 0
+        session.commit()
+        return deleted
+
 
 class InjectionObservationRepository(repository_factory(
         InjectionObservation, InjectionObservationTable)):
@@ -111,6 +367,25 @@ class InjectionObservationRepository(repository_factory(
 
         return cls.create_from_hydjson(session, hydjson, forecast_oid)
 
+    @classmethod
+    def create_from_hydraulics(cls,
+                               session: Session,
+                               data: list[BoreholeHydraulics],
+                               forecast_oid: UUID,
+                               commit: bool = True) -> InjectionObservation:
+        """
+        Store the observed hydraulics of all boreholes as hydJSON.
+        """
+        db_model = cls.orm_model(data=serialize_hydjson(data),
+                                 forecast_oid=forecast_oid)
+        session.add(db_model)
+        if commit:
+            session.commit()
+        else:
+            session.flush()
+        session.refresh(db_model)
+        return cls.model.model_validate(db_model)
+
 
 class InjectionPlanRepository(repository_factory(
         InjectionPlan, InjectionPlanTable)):
@@ -142,6 +417,84 @@ class InjectionPlanRepository(repository_factory(
         return cls.create_from_hydjson(
             session, hydjson, name, forecastseries_oid)
 
+    @classmethod
+    def create_from_steps(cls,
+                          session: Session,
+                          plan: list[dict],
+                          name: str,
+                          template: bytes | None = None,
+                          forecastseries_oid: UUID | None = None,
+                          cache_key: str | None = None,
+                          commit: bool = True) -> InjectionPlan:
+        """
+        Store a plan in its compact representation, as built by
+        `InjectionPlanBuilder.build_steps`. The samples are only
+        expanded when they are read.
+        """
+        db_model = cls.orm_model(steps=json.dumps(plan),
+                                 name=name,
+                                 template=template,
+                                 forecastseries_oid=forecastseries_oid,
+                                 cache_key=cache_key)
+        session.add(db_model)
+        if commit:
+            session.commit()
+        else:
+            session.flush()
+        session.refresh(db_model)
+        return cls.model.model_validate(db_model)
+
+    @classmethod
+    def get_by_cache_keys(cls,
+                          session: Session,
+                          cache_keys: list[str],
+                          lock: bool = False) -> dict[str, InjectionPlan]:
+        """
+        Get the already generated injection plans by their cache key.
+
+        With `lock`, the plans can't be deleted before the transaction
+        ends, eg. until the ModelRuns referencing them are committed.
+        """
+        q = select(InjectionPlanTable).where(
+            InjectionPlanTable.cache_key.in_(cache_keys))
+        if lock:
+            q = q.with_for_update(read=True, key_share=True,
+                                  of=InjectionPlanTable)
+        result = session.execute(q).unique().scalars().all()
+        return {ip.cache_key: cls.model.model_validate(ip) for ip in result}
+
+    @classmethod
+    def delete_unreferenced(cls,
+                            session: Session,
+                            oids: list[UUID]) -> int:
+        """
+        Delete the generated injection plans which aren't used by any
+        ModelRun anymore. Templates are never deleted.
+
+        Returns:
+            Number of deleted injection plans.
+        """
+        if not oids:
+            return 0
+        # wait for forecasts which found the plans to commit their
+        # ModelRuns, the references are only checked afterwards
+        locked = session.execute(
+            select(InjectionPlanTable.oid)
+            .where(InjectionPlanTable.oid.in_(oids),
+                   InjectionPlanTable.forecastseries_oid.is_(None))
+            .order_by(InjectionPlanTable.oid)
+            .with_for_update()).scalars().all()
+        deleted = 0
+        if locked:
+            q = delete(InjectionPlanTable).where(
+                InjectionPlanTable.oid.in_(locked),
+                ~exists().where(
+                    ModelRunTable.injectionplan_oid
+                    == InjectionPlanTable.oid))
+            deleted = session.execute(q).rowcount
+        session.commit()
+        return deleted
+
     @classmethod
     def get_by_forecastseries(cls,
                               session: Session,
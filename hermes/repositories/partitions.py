@@ -0,0 +1,47 @@
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from hermes.datamodel.result_tables import PARTITIONED_TABLES
+
+
+def partition_name(table: str, forecastseries_oid: UUID | str) -> str:
+    return f'{table}_{UUID(str(forecastseries_oid)).hex}'
+
+
+def create_partitions(session: Session,
+                      forecastseries_oid: UUID | str) -> None:
+    """
+    Create the partitions of the result tables for a ForecastSeries.
+
+    Results can only be stored for a ForecastSeries once its partitions
+    exist.
+    """
+    forecastseries_oid = UUID(str(forecastseries_oid))
+    for table in PARTITIONED_TABLES:
+        session.execute(text(
+            f'CREATE TABLE IF NOT EXISTS '
+            f'{partition_name(table, forecastseries_oid)} '
+            f"PARTITION OF {table} FOR VALUES IN ('{forecastseries_oid}')"))
+
+
+def drop_partitions(session: Session,
+                    forecastseries_oid: UUID | str) -> None:
+    """
+    Drop the partitions of the result tables of a ForecastSeries,
+    together with all of its results.
+
+    Much faster than deleting the results row by row by cascading
+    the delete of the ForecastSeries.
+    """
+    for table in reversed(PARTITIONED_TABLES):
+        name = partition_name(table, forecastseries_oid)
+        exists = session.execute(text('SELECT to_regclass(:name)'),
+                                 {'name': name}).scalar()
+        if exists is None:
+            continue
+        # detaching checks that no rows of other partitions reference
+        # the partition, which dropping it directly would not.
+        session.execute(text(f'ALTER TABLE {table} DETACH PARTITION {name}'))
+        session.execute(text(f'DROP TABLE {name}'))
@@ -1,3 +1,5 @@
+from uuid import UUID
+
 from geoalchemy2.shape import from_shape
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
@@ -7,6 +9,9 @@ from hermes.datamodel.project_tables import (ForecastSeriesTable,
                                              ForecastTable, ModelConfigTable,
                                              ProjectTable, TagTable)
 from hermes.repositories.base import repository_factory
+from hermes.repositories.cache import invalidate_forecastseries
+from hermes.repositories.partitions import create_partitions, drop_partitions
+from hermes.repositories.storage import get_result_store
 from hermes.schemas import (EStatus, Forecast, ForecastSeries, ModelConfig,
                             Project, Tag)
 
@@ -94,6 +99,8 @@ class ForecastSeriesRepository(repository_factory(
                               exclude=['tags', 'bounding_polygon']))
 
         session.add(db_model)
+        session.flush()
+        create_partitions(session, db_model.oid)
         session.commit()
         session.refresh(db_model)
 
@@ -123,6 +130,14 @@ class ForecastSeriesRepository(repository_factory(
             return cls.model.model_validate(result)
         return
 
+    @classmethod
+    def delete(cls, session: Session, oid: str | UUID) -> None:
+        drop_partitions(session, oid)
+        super().delete(session, oid)
+        # the GridCells and TimeSteps were removed by the cascade
+        invalidate_forecastseries(UUID(str(oid)))
+        get_result_store().delete_forecastseries(oid)
+
     @classmethod
     def get_tags(cls, session: Session, forecastseries_oid: str) -> list[Tag]:
         q = select(TagTable).join(ForecastSeriesTable._tags).where(
@@ -149,6 +164,11 @@ class ForecastSeriesRepository(repository_factory(
 
 class ForecastRepository(repository_factory(Forecast, ForecastTable)):
 
+    @classmethod
+    def delete(cls, session: Session, oid: str | UUID) -> None:
+        super().delete(session, oid)
+        get_result_store().delete_forecast(oid)
+
     @classmethod
     def update_status(cls,
                       session: Session,
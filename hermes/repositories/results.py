@@ -1,24 +1,35 @@
+from datetime import datetime, timezone
 from uuid import UUID
 
 import numpy as np
+import pandas as pd
 from geoalchemy2.functions import (ST_Envelope, ST_Equals, ST_GeomFromText,
                                    ST_SetSRID)
 from geoalchemy2.shape import from_shape
+from numpy.typing import ArrayLike
 from seismostats import ForecastCatalog, ForecastGRRateGrid
-from sqlalchemy import insert, select
+from sqlalchemy import delete, select, text, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from hermes.datamodel.result_tables import (EventForecastTable, GridCellTable,
-                                            GRParametersTable,
+from hermes.datamodel.project_tables import ForecastTable
+from hermes.datamodel.result_tables import (EventForecastCompactTable,
+                                            EventForecastTable,
+                                            EventForecastUncertaintyTable,
+                                            GridCellTable, GRParametersTable,
                                             ModelResultTable, ModelRunTable,
                                             TimeStepTable)
 from hermes.io.serialize import (serialize_seismostats_catalog,
                                  serialize_seismostats_grrategrid)
-from hermes.repositories.base import repository_factory
-from hermes.schemas.result_schemas import (EventForecast, GridCell,
+from hermes.repositories.base import copy_from_dataframe, repository_factory
+from hermes.repositories.cache import gridcell_cache, timestep_cache
+from hermes.repositories.storage import get_result_store
+from hermes.schemas.base import EStatus
+from hermes.schemas.result_schemas import (EventForecast, EventForecastCompact,
+                                           EventForecastUncertainty, GridCell,
                                            GRParameters, ModelResult, ModelRun,
                                            TimeStep)
+from hermes.utils.uuids import random_uuids
 
 
 class ModelResultRepository(
@@ -27,28 +38,137 @@ class ModelResultRepository(
     @classmethod
     def batch_create(cls,
                      session: Session,
+                     forecastseries_oid: UUID,
                      number: int,
                      result_type: str,
                      timestep_oid: UUID | None = None,
-                     gridcell_oid: UUID | None = None,
-                     modelrun_oid: UUID | None = None) -> list[UUID]:
-        data = [{'timestep_oid': timestep_oid,
-                 'gridcell_oid': gridcell_oid,
-                 'modelrun_oid': modelrun_oid,
-                 'result_type': result_type,
-                 'realization_id': i} for i in range(number)]
-
-        q = insert(ModelResultTable).returning(
-            ModelResultTable.oid,
-            ModelResultTable.realization_id)
-
-        result = session.execute(q, data).fetchall()
-        session.commit()
+                     gridcell_oid: UUID | ArrayLike | None = None,
+                     modelrun_oid: UUID | None = None,
+                     realization_id: ArrayLike | None = None,
+                     storage_uri: str | None = None,
+                     event_count: ArrayLike | None = None,
+                     commit: bool = True) -> list[UUID]:
+        """
+        Create `number` ModelResults with client side generated keys.
+
+        `gridcell_oid`, `realization_id` and `event_count` can be given
+        per ModelResult. The returned oids are in the order of the
+        created ModelResults.
+        """
+        oids = random_uuids(number)
+
+        data = {'oid': oids,
+                'forecastseries_oid': forecastseries_oid,
+                'timestep_oid': timestep_oid,
+                'gridcell_oid': gridcell_oid,
+                'modelrun_oid': modelrun_oid,
+                'result_type': result_type,
+                'realization_id': np.arange(number) if realization_id is None
+                else realization_id,
+                'storage_uri': storage_uri,
+                'event_count': event_count,
+                'creationinfo_creationtime': datetime.now(timezone.utc)}
+
+        copy_from_dataframe(session, ModelResultTable.__table__, data)
+        if commit:
+            session.commit()
+
+        return [UUID(oid) for oid in oids]
+
+    @classmethod
+    def delete_by_modelrun(cls,
+                           session: Session,
+                           forecastseries_oid: UUID,
+                           modelrun_oid: UUID,
+                           commit: bool = True) -> None:
+        # the series restricts the delete to its partition
+        session.execute(delete(ModelResultTable).where(
+            ModelResultTable.forecastseries_oid == forecastseries_oid,
+            ModelResultTable.modelrun_oid == modelrun_oid))
+        if commit:
+            session.commit()
 
-        # make sure that the list id is the same as the realization_id
-        # since the database does not guarantee the order of the results
-        batch = sorted(result, key=lambda x: x[1])
-        return [x[0] for x in batch]
+
+EVENTFORECAST_COMPACT_REAL_COLUMNS = ['latitude_value', 'longitude_value',
+                                      'depth_value', 'magnitude_value']
+
+EVENTFORECAST_COMPACT_NEXTVAL = text(
+    "SELECT nextval(pg_get_serial_sequence('eventforecastcompact', 'oid')) "
+    "FROM generate_series(1, :n)")
+
+GRIDCELL_COLUMNS = ['longitude_min', 'longitude_max',
+                    'latitude_min', 'latitude_max',
+                    'depth_min', 'depth_max']
+
+# Inserts all missing cells of a grid and returns the oid of every
+# input cell in input order. The geometries are built with the same
+# vertex order as `shapely.box` (geom) and its envelope (unique_geom).
+GRIDCELL_UPSERT = text("""
+WITH cells AS (
+    SELECT c.*,
+           ST_MakePolygon(ST_MakeLine(ARRAY[
+               ST_MakePoint(c.longitude_max, c.latitude_min),
+               ST_MakePoint(c.longitude_max, c.latitude_max),
+               ST_MakePoint(c.longitude_min, c.latitude_max),
+               ST_MakePoint(c.longitude_min, c.latitude_min),
+               ST_MakePoint(c.longitude_max, c.latitude_min)])) AS geom,
+           ST_SetSRID(ST_MakePolygon(ST_MakeLine(ARRAY[
+               ST_MakePoint(c.longitude_min, c.latitude_min),
+               ST_MakePoint(c.longitude_max, c.latitude_min),
+               ST_MakePoint(c.longitude_max, c.latitude_max),
+               ST_MakePoint(c.longitude_min, c.latitude_max),
+               ST_MakePoint(c.longitude_min, c.latitude_min)])),
+               4326) AS unique_geom
+    FROM unnest(CAST(:oid AS uuid[]),
+                CAST(:longitude_min AS float8[]),
+                CAST(:longitude_max AS float8[]),
+                CAST(:latitude_min AS float8[]),
+                CAST(:latitude_max AS float8[]),
+                CAST(:depth_min AS float8[]),
+                CAST(:depth_max AS float8[]))
+        WITH ORDINALITY AS c(oid, longitude_min, longitude_max,
+                             latitude_min, latitude_max,
+                             depth_min, depth_max, idx)
+),
+existing AS (
+    SELECT cells.idx, gridcell.oid
+    FROM cells
+    JOIN gridcell
+        ON gridcell.forecastseries_oid
+            IS NOT DISTINCT FROM CAST(:forecastseries_oid AS uuid)
+        AND gridcell.unique_geom ~= cells.unique_geom
+        AND gridcell.depth_min IS NOT DISTINCT FROM cells.depth_min
+        AND gridcell.depth_max IS NOT DISTINCT FROM cells.depth_max
+),
+inserted AS (
+    INSERT INTO gridcell (oid, geom, unique_geom, depth_min, depth_max,
+                          forecastseries_oid)
+    SELECT cells.oid, cells.geom, cells.unique_geom,
+           cells.depth_min, cells.depth_max,
+           CAST(:forecastseries_oid AS uuid)
+    FROM cells
+    WHERE cells.idx NOT IN (SELECT idx FROM existing)
+    ON CONFLICT DO NOTHING
+    RETURNING oid
+)
+SELECT COALESCE(existing.oid, inserted.oid) AS oid
+FROM cells
+LEFT JOIN existing ON existing.idx = cells.idx
+LEFT JOIN inserted ON inserted.oid = cells.oid
+ORDER BY cells.idx;
+""").columns(oid=GridCellTable.oid.type)
+
+
+def _depth(value: float | None) -> float | None:
+    return None if value is None or np.isnan(value) else float(value)
+
+
+def _gridcell_key(forecastseries_oid: UUID,
+                  bounds: tuple[float, float, float, float],
+                  depth_min: float | None,
+                  depth_max: float | None) -> tuple:
+    return (forecastseries_oid, *map(float, bounds),
+            _depth(depth_min), _depth(depth_max))
 
 
 class GridCellRepository(
@@ -57,7 +177,8 @@ class GridCellRepository(
     @classmethod
     def create(cls,
                session: Session,
-               data: GridCell) -> GridCell:
+               data: GridCell,
+               commit: bool = True) -> GridCell:
 
         geom = None
         if data.geom:
@@ -69,7 +190,10 @@ class GridCellRepository(
                               exclude=['geom']))
 
         session.add(db_model)
-        session.commit()
+        if commit:
+            session.commit()
+        else:
+            session.flush()
         session.refresh(db_model)
 
         return cls.model.model_validate(db_model)
@@ -77,7 +201,16 @@ class GridCellRepository(
     @classmethod
     def get_or_create(cls,
                       session: Session,
-                      gridcell: GridCell) -> GridCell:
+                      gridcell: GridCell,
+                      commit: bool = True) -> GridCell:
+        key = _gridcell_key(gridcell.forecastseries_oid,
+                            gridcell.geom.bounds,
+                            gridcell.depth_min,
+                            gridcell.depth_max)
+        oid = gridcell_cache.get(key)
+        if oid:
+            return gridcell.model_copy(update={'oid': oid})
+
         q = select(GridCellTable).where(
             GridCellTable.forecastseries_oid == gridcell.forecastseries_oid,
             # TODO: Improve SRID handling
@@ -93,16 +226,77 @@ class GridCellRepository(
         )
         result = session.execute(q).unique().scalar_one_or_none()
 
-        if not result:
-            try:
-                result = cls.create(session, gridcell)
-            except IntegrityError as e:
-                session.rollback()
-                result = session.execute(q).unique().scalar_one_or_none()
-                if not result:
-                    raise e
+        if result:
+            gridcell_cache.add(session, key, result.oid)
+            return result
+
+        try:
+            # savepoint, so that a conflict doesn't roll back
+            # the surrounding transaction
+            with session.begin_nested():
+                result = cls.create(session, gridcell, commit=False)
+        except IntegrityError as e:
+            result = session.execute(q).unique().scalar_one_or_none()
+            if not result:
+                raise e
+
+        gridcell_cache.add(session, key, result.oid)
+        if commit:
+            session.commit()
         return result
 
+    @classmethod
+    def bulk_get_or_create(cls,
+                           session: Session,
+                           forecastseries_oid: UUID,
+                           cells: pd.DataFrame,
+                           commit: bool = True) -> np.ndarray:
+        """
+        Get or create the GridCells for all rows of `cells` in one
+        statement.
+
+        `cells` needs the columns of GRIDCELL_COLUMNS and should not
+        contain duplicates. The returned oids are in the order of
+        the rows of `cells`.
+        """
+        keys = [_gridcell_key(forecastseries_oid,
+                              (c.longitude_min, c.latitude_min,
+                               c.longitude_max, c.latitude_max),
+                              c.depth_min, c.depth_max)
+                for c in cells[GRIDCELL_COLUMNS].itertuples(index=False)]
+        oids = np.fromiter((gridcell_cache.get(k) for k in keys),
+                           dtype=object, count=len(keys))
+        missing = np.flatnonzero(oids == None)  # noqa: E711
+
+        if len(missing) == 0:
+            return oids
+
+        params = {c: np.where(cells[c].isna(), None,
+                              cells[c].to_numpy(dtype=object))[
+                                  missing].tolist()
+                  for c in GRIDCELL_COLUMNS}
+        params['forecastseries_oid'] = str(forecastseries_oid) \
+            if forecastseries_oid else None
+
+        # cells inserted concurrently by another transaction are neither
+        # visible nor inserted, they are resolved on the second attempt.
+        for _ in range(2):
+            params['oid'] = random_uuids(len(missing)).tolist()
+            result = session.execute(GRIDCELL_UPSERT, params).scalars().all()
+            if None not in result:
+                break
+        else:
+            raise ValueError('Could not resolve all GridCells.')
+
+        for i, oid in zip(missing, result):
+            oids[i] = oid
+            gridcell_cache.add(session, keys[i], oid)
+
+        if commit:
+            session.commit()
+
+        return oids
+
 
 class TimeStepRepository(
     repository_factory(GridCell,
@@ -110,20 +304,35 @@ class TimeStepRepository(
     @classmethod
     def get_or_create(cls,
                       session: Session,
-                      timestep: TimeStep) -> TimeStep:
+                      timestep: TimeStep,
+                      commit: bool = True) -> TimeStep:
+        key = (timestep.forecastseries_oid,
+               timestep.starttime,
+               timestep.endtime)
+        oid = timestep_cache.get(key)
+        if oid:
+            return timestep.model_copy(update={'oid': oid})
+
         q = select(TimeStepTable).where(
             TimeStepTable.starttime == timestep.starttime,
             TimeStepTable.endtime == timestep.endtime,
             TimeStepTable.forecastseries_oid == timestep.forecastseries_oid)
         result = session.execute(q).unique().scalar_one_or_none()
-        if not result:
-            try:
-                result = cls.create(session, timestep)
-            except IntegrityError as e:
-                session.rollback()
-                result = session.execute(q).unique().scalar_one_or_none()
-                if not result:
-                    raise e
+        if result:
+            timestep_cache.add(session, key, result.oid)
+            return result
+
+        try:
+            with session.begin_nested():
+                result = cls.create(session, timestep, commit=False)
+        except IntegrityError as e:
+            result = session.execute(q).unique().scalar_one_or_none()
+            if not result:
+                raise e
+
+        timestep_cache.add(session, key, result.oid)
+        if commit:
+            session.commit()
         return result
 
 
@@ -134,22 +343,27 @@ class GRParametersRepository(
     def create_from_forecast_grrategrid(
             cls,
             session: Session,
+            forecastseries_oid: UUID,
             rategrid: ForecastGRRateGrid,
-            modelresult_oids: list[UUID]) -> None:
+            modelresult_oids: list[UUID],
+            commit: bool = True) -> None:
 
         # make sure that the grid_id is 0 indexed
         if max(rategrid.grid_id) >= len(modelresult_oids):
             raise ValueError('The number of modelresult_oids is less than the '
                              'maximum grid_id in the rategrid.')
 
+        grparameters = serialize_seismostats_grrategrid(rategrid)
+
         # Modelresult_oid is guaranteed to be in the same order as the
         # 0 indexed grid_id. Replace the grid_id with the modelresult_oid.
-        rategrid.grid_id = np.array(modelresult_oids)[rategrid.grid_id]
-        rategrid = rategrid.rename(columns={'grid_id': 'modelresult_oid'})
-        grparameters = serialize_seismostats_grrategrid(rategrid)
+        grparameters['modelresult_oid'] = np.asarray(
+            modelresult_oids)[rategrid['grid_id'].to_numpy()]
+        grparameters['forecastseries_oid'] = forecastseries_oid
 
-        session.execute(insert(GRParametersTable), grparameters)
-        session.commit()
+        copy_from_dataframe(session, GRParametersTable.__table__, grparameters)
+        if commit:
+            session.commit()
 
 
 class EventForecastRepository(
@@ -159,8 +373,10 @@ class EventForecastRepository(
     @classmethod
     def create_from_forecast_catalog(cls,
                                      session: Session,
+                                     forecastseries_oid: UUID,
                                      catalog: ForecastCatalog,
-                                     modelresult_oids: list[UUID]) -> None:
+                                     modelresult_oids: list[UUID],
+                                     commit: bool = True) -> None:
         if catalog.empty:
             return
         # make sure that the catalog_id is 0 indexed
@@ -168,15 +384,69 @@ class EventForecastRepository(
             raise ValueError('The number of modelresult_oids is less than the '
                              'maximum catalog_id in the catalog.')
 
+        events = serialize_seismostats_catalog(catalog)
+
         # Modelresult_oid is guaranteed to be in the same order as the 0
-        # indexed grid_id. Replace the catalog_id column with the
+        # indexed catalog_id. Replace the catalog_id column with the
         # modelresult_oids.
-        catalog.catalog_id = np.array(modelresult_oids)[catalog.catalog_id]
-        catalog = catalog.rename(columns={'catalog_id': 'modelresult_oid'})
-        events = serialize_seismostats_catalog(catalog)
+        events['modelresult_oid'] = np.asarray(
+            modelresult_oids)[catalog['catalog_id'].to_numpy()]
+        events['forecastseries_oid'] = forecastseries_oid
+
+        copy_from_dataframe(session, EventForecastTable.__table__, events)
+        if commit:
+            session.commit()
 
-        session.execute(insert(EventForecastTable), events)
-        session.commit()
+
+class EventForecastCompactRepository(
+    repository_factory(EventForecastCompact,
+                       EventForecastCompactTable)):
+
+    @classmethod
+    def create_from_forecast_catalog(cls,
+                                     session: Session,
+                                     forecastseries_oid: UUID,
+                                     catalog: ForecastCatalog,
+                                     modelresult_oids: list[UUID],
+                                     commit: bool = True) -> None:
+        if catalog.empty:
+            return
+        # make sure that the catalog_id is 0 indexed
+        if max(catalog.catalog_id) >= len(modelresult_oids):
+            raise ValueError('The number of modelresult_oids is less than the '
+                             'maximum catalog_id in the catalog.')
+
+        events = serialize_seismostats_catalog(catalog, EventForecastCompact)
+        for column in EVENTFORECAST_COMPACT_REAL_COLUMNS:
+            if column in events:
+                events[column] = events[column].astype(np.float32)
+
+        events['modelresult_oid'] = np.asarray(
+            modelresult_oids)[catalog['catalog_id'].to_numpy()]
+        events['forecastseries_oid'] = forecastseries_oid
+
+        uncertainties = {
+            k: v for k, v in serialize_seismostats_catalog(
+                catalog, EventForecastUncertainty).items()
+            if not pd.isna(v).all()}
+
+        # the keys of the events are only needed to reference them
+        # from their uncertainties, otherwise they are generated on insert
+        if uncertainties:
+            events['oid'] = uncertainties['oid'] = np.asarray(
+                session.execute(EVENTFORECAST_COMPACT_NEXTVAL,
+                                {'n': len(catalog)}).scalars().all())
+            uncertainties['forecastseries_oid'] = forecastseries_oid
+
+        copy_from_dataframe(
+            session, EventForecastCompactTable.__table__, events)
+        if uncertainties:
+            copy_from_dataframe(
+                session, EventForecastUncertaintyTable.__table__,
+                uncertainties)
+
+        if commit:
+            session.commit()
 
 
 class ModelRunRepository(repository_factory(
@@ -196,6 +466,47 @@ class ModelRunRepository(repository_factory(
             return cls.model.model_validate(result)
         return None
 
+    @classmethod
+    def fail_unfinished(cls,
+                        session: Session,
+                        forecast_oid: UUID) -> int:
+        """
+        Set the ModelRuns of a forecast which didn't finish to failed,
+        eg. after the process running them crashed, and delete the
+        results of all failed ModelRuns of the forecast.
+
+        Results written in parallel are committed one by one, the ones
+        of a failed ModelRun are left behind if its process crashed or
+        their own cleanup failed.
+
+        Returns:
+            Number of ModelRuns set to failed.
+        """
+        q = update(ModelRunTable) \
+            .where(ModelRunTable.forecast_oid == forecast_oid,
+                   ModelRunTable.status.in_([EStatus.PENDING,
+                                             EStatus.SCHEDULED,
+                                             EStatus.RUNNING])) \
+            .values(status=EStatus.FAILED)
+        failed = session.execute(q).rowcount
+
+        modelruns = session.execute(
+            select(ModelRunTable.oid).where(
+                ModelRunTable.forecast_oid == forecast_oid,
+                ModelRunTable.status == EStatus.FAILED)).scalars().all()
+        if modelruns:
+            forecastseries_oid = session.execute(
+                select(ForecastTable.forecastseries_oid).where(
+                    ForecastTable.oid == forecast_oid)).scalar_one()
+            session.execute(delete(ModelResultTable).where(
+                ModelResultTable.forecastseries_oid == forecastseries_oid,
+                ModelResultTable.modelrun_oid.in_(modelruns)))
+        session.commit()
+
+        for modelrun_oid in modelruns:
+            get_result_store().delete_modelrun(modelrun_oid)
+        return failed
+
     @classmethod
     def get_by_modelconfig(cls,
                            session: Session,
@@ -0,0 +1,207 @@
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from uuid import UUID, uuid4
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from numpy.typing import ArrayLike
+from seismostats import ForecastCatalog
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from hermes.config import get_settings
+from hermes.io.serialize import serialize_seismostats_catalog
+
+PARTITIONS = ['forecastseries_oid', 'forecast_oid',
+              'modelrun_oid', 'timestep_oid']
+
+_PENDING = 'result_store_pending'
+
+
+class ParquetResultStore:
+    """
+    Stores the events of forecast catalogs as Parquet files instead of
+    rows in the `eventforecast` table.
+
+    The files are partitioned hive style by forecastseries, forecast,
+    modelrun and timestep below `root`. The `storage_uri` of a
+    ModelResult points to the file holding its events, relative to
+    `root`, so that the store can be mounted at different locations.
+
+    Files are written under a staging name and only renamed to their
+    final name when the database transaction commits.
+
+    Args:
+        root: Root directory of the store.
+    """
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+
+    def catalog_uri(self,
+                    forecastseries_oid: UUID,
+                    forecast_oid: UUID,
+                    modelrun_oid: UUID,
+                    timestep_oid: UUID) -> str:
+        """
+        Create a new, unique uri for the events of a forecast catalog.
+        """
+        values = [forecastseries_oid, forecast_oid,
+                  modelrun_oid, timestep_oid]
+        return '/'.join([f'{k}={v}' for k, v in zip(PARTITIONS, values)]
+                        + [f'{uuid4().hex}.parquet'])
+
+    def write_catalog(self,
+                      session: Session,
+                      uri: str,
+                      catalog: ForecastCatalog,
+                      modelresult_oids: ArrayLike) -> None:
+        """
+        Write the events of a forecast catalog to `uri`.
+
+        The file is published when the transaction of `session`
+        commits and removed if it is rolled back.
+
+        Args:
+            session: Session of the transaction creating the results.
+            uri: Uri of the file, relative to the root of the store.
+            catalog: Forecast catalog, `catalog_id` is used as the
+                realization_id of the events.
+            modelresult_oids: Oids of the ModelResults, indexed by
+                the `catalog_id` of the events.
+        """
+        events = serialize_seismostats_catalog(catalog)
+        events.pop('coordinates', None)
+
+        catalog_id = catalog['catalog_id'].to_numpy()
+        events['realization_id'] = catalog_id
+        events['modelresult_oid'] = np.asarray(
+            [str(o) for o in modelresult_oids])[catalog_id]
+
+        # sorted by longitude, the row group statistics allow to skip
+        # most of the file when filtering by a bounding box.
+        table = pa.table(events).sort_by('longitude_value')
+
+        path = self.root / uri
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staged = path.with_name(f'_{path.name}')
+
+        pq.write_table(table, staged, compression='zstd',
+                       row_group_size=100_000)
+        session.info.setdefault(_PENDING, []).append((staged, path))
+
+    def dataset(self, uris: list[str]) -> ds.Dataset:
+        """
+        Dataset of the given files, including the partition columns.
+        """
+        return ds.dataset(
+            [str(self.root / uri) for uri in uris],
+            format='parquet',
+            partitioning=ds.partitioning(
+                pa.schema([(p, pa.string()) for p in PARTITIONS]),
+                flavor='hive'),
+            partition_base_dir=str(self.root))
+
+    def read_events(self,
+                    uris: list[str],
+                    modelresult_oids: list[UUID] | None = None,
+                    columns: list[str] | None = None,
+                    filter: pc.Expression | None = None) -> pd.DataFrame:
+        """
+        Read the events stored in the given files.
+
+        Args:
+            uris: Uris of the files to read.
+            modelresult_oids: Only read the events of these ModelResults.
+            columns: Columns to read, defaults to all columns except
+                the partition columns.
+            filter: Additional filter, eg. on the coordinates, which is
+                pushed down to the Parquet reader.
+
+        Returns:
+            DataFrame with one row per event.
+        """
+        if len(uris) == 0:
+            return pd.DataFrame(columns=columns)
+
+        dataset = self.dataset(uris)
+
+        if columns is None:
+            columns = [n for n in dataset.schema.names
+                       if n not in PARTITIONS]
+        if modelresult_oids is not None:
+            oids = pc.field('modelresult_oid').isin(
+                [str(o) for o in modelresult_oids])
+            filter = oids if filter is None else filter & oids
+
+        return dataset.to_table(columns=columns, filter=filter).to_pandas()
+
+    def delete_forecastseries(self, forecastseries_oid: UUID) -> None:
+        shutil.rmtree(self.root / f'forecastseries_oid={forecastseries_oid}',
+                      ignore_errors=True)
+
+    def delete_forecast(self, forecast_oid: UUID) -> None:
+        for path in self.root.glob(f'*/forecast_oid={forecast_oid}'):
+            shutil.rmtree(path, ignore_errors=True)
+
+    def delete_modelrun(self, modelrun_oid: UUID) -> None:
+        for path in self.root.glob(f'*/*/modelrun_oid={modelrun_oid}'):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+@lru_cache()
+def get_result_store() -> ParquetResultStore:
+    return ParquetResultStore(get_settings().RESULTS_PARQUET_PATH)
+
+
+def bbox_filter(min_lon: float,
+                min_lat: float,
+                max_lon: float,
+                max_lat: float) -> pc.Expression:
+    """
+    Filter for events strictly within a bounding box, like `ST_Within`.
+    """
+    lon = pc.field('longitude_value')
+    lat = pc.field('latitude_value')
+    return (lon > min_lon) & (lon < max_lon) & \
+        (lat > min_lat) & (lat < max_lat)
+
+
+def _publish(session: Session) -> None:
+    for staged, path in session.info.pop(_PENDING, []):
+        staged.rename(path)
+
+
+@event.listens_for(Session, 'before_commit')
+def _publish_pending(session: Session) -> None:
+    # also called when a savepoint is released, the files are only
+    # published with the root transaction. Published before the
+    # commit, a failing commit only leaves unreferenced files behind,
+    # never references to missing files.
+    if not session.in_nested_transaction():
+        _publish(session)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_pending_root(session: Session) -> None:
+    # a savepoint begun while the root transaction commits, eg. by an
+    # event listener, hides the root commit from before_commit. The
+    # released savepoint is inactive.
+    savepoint = session.get_nested_transaction()
+    if savepoint is None or savepoint.is_active:
+        _publish(session)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending(session: Session, previous_transaction) -> None:
+    # the files are still part of the transaction if only a savepoint
+    # was rolled back.
+    if previous_transaction.nested:
+        return
+    for staged, _ in session.info.pop(_PENDING, []):
+        staged.unlink(missing_ok=True)
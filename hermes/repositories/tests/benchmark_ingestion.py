@@ -0,0 +1,93 @@
+"""
+Benchmark the ingestion of forecast catalogs into the `eventforecast`
+table, comparing the executemany `INSERT` path against `COPY FROM STDIN`.
+
+Needs a running database as configured in the `.env` file. The events
+are stored for a temporary ForecastSeries inside a transaction which is
+rolled back, the ForecastSeries and its partitions are deleted at the end.
+
+Usage:
+    python -m hermes.repositories.tests.benchmark_ingestion [n_events]
+"""
+import sys
+import time
+from datetime import datetime
+from uuid import uuid4
+
+import numpy as np
+import pandas as pd
+from seismostats import ForecastCatalog
+from sqlalchemy import insert
+
+from hermes.datamodel.result_tables import EventForecastTable
+from hermes.io.serialize import serialize_seismostats_catalog
+from hermes.repositories.base import copy_from_dataframe
+from hermes.repositories.database import DatabaseSession
+from hermes.repositories.project import (ForecastSeriesRepository,
+                                         ProjectRepository)
+from hermes.repositories.results import ModelResultRepository
+from hermes.schemas import EResultType, ForecastSeries, Project
+from hermes.schemas.result_schemas import ModelResult
+
+
+def synthetic_catalog(n_events: int, n_catalogs: int = 1000) \
+        -> ForecastCatalog:
+    rng = np.random.default_rng(42)
+    catalog = ForecastCatalog(pd.DataFrame({
+        'longitude': rng.uniform(5.9, 10.5, n_events),
+        'latitude': rng.uniform(45.8, 47.8, n_events),
+        'depth': rng.uniform(0, 30, n_events),
+        'magnitude': rng.exponential(0.4, n_events) + 1,
+        'time': pd.Timestamp('2024-01-01')
+        + pd.to_timedelta(rng.uniform(0, 86400, n_events), unit='s'),
+        'catalog_id': rng.integers(0, n_catalogs, n_events)
+    }))
+    catalog.n_catalogs = n_catalogs
+    return catalog
+
+
+def benchmark(n_events: int) -> None:
+    catalog = synthetic_catalog(n_events)
+    catalog = catalog.drop(columns=['catalog_id'])
+
+    with DatabaseSession() as session:
+        # the events can only be stored in the partitions of a series
+        project = ProjectRepository.create(session, Project(
+            name=f'benchmark_{uuid4()}',
+            starttime=datetime(2024, 1, 1)))
+        forecastseries = ForecastSeriesRepository.create(
+            session, ForecastSeries(name=f'benchmark_{uuid4()}',
+                                    project_oid=project.oid))
+        modelresult = ModelResultRepository.create(session, ModelResult(
+            forecastseries_oid=forecastseries.oid,
+            result_type=EResultType.CATALOG))
+
+        try:
+            events = pd.DataFrame(serialize_seismostats_catalog(catalog))
+            events['forecastseries_oid'] = str(forecastseries.oid)
+            events['modelresult_oid'] = str(modelresult.oid)
+
+            start = time.perf_counter()
+            session.execute(insert(EventForecastTable),
+                            events.astype(object).where(events.notna(), None)
+                            .to_dict(orient='records'))
+            elapsed_insert = time.perf_counter() - start
+
+            start = time.perf_counter()
+            copy_from_dataframe(session,
+                                EventForecastTable.__table__,
+                                events)
+            elapsed_copy = time.perf_counter() - start
+
+            session.rollback()
+        finally:
+            ForecastSeriesRepository.delete(session, forecastseries.oid)
+            ProjectRepository.delete(session, project.oid)
+
+    print(f'{n_events} events')
+    print(f'INSERT (executemany): {n_events / elapsed_insert:12.0f} rows/s')
+    print(f'COPY FROM STDIN:      {n_events / elapsed_copy:12.0f} rows/s')
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
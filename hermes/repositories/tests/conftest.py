@@ -9,6 +9,7 @@ from sqlalchemy.orm import scoped_session, sessionmaker
 
 from hermes.config import get_settings
 from hermes.datamodel.base import ORMBase
+from hermes.repositories.cache import gridcell_cache, timestep_cache
 from hermes.repositories.database import create_engine, create_extensions
 from hermes.repositories.project import (ForecastRepository,
                                          ForecastSeriesRepository,
@@ -114,6 +115,9 @@ def session(connection, request: pytest.FixtureRequest):
         session.remove()
         if transaction.is_active:
             transaction.rollback()
+        # the committed entries were rolled back with the transaction
+        gridcell_cache.clear()
+        timestep_cache.clear()
 
     request.addfinalizer(teardown)
     return session
@@ -0,0 +1,98 @@
+import uuid
+from datetime import datetime
+
+from shapely import Polygon
+
+from hermes.repositories.cache import (IdentityCache, gridcell_cache,
+                                       timestep_cache)
+from hermes.repositories.project import ForecastSeriesRepository
+from hermes.repositories.results import GridCellRepository, TimeStepRepository
+from hermes.schemas.result_schemas import GridCell, TimeStep
+
+
+class TestIdentityCache:
+    def test_lru(self, session):
+        cache = IdentityCache('test', maxsize=2)
+        fs = uuid.uuid4()
+        oids = [uuid.uuid4() for _ in range(3)]
+
+        cache.put((fs, 1), oids[0])
+        cache.put((fs, 2), oids[1])
+        assert cache.get((fs, 1)) == oids[0]
+
+        # (fs, 2) is the least recently used entry
+        cache.put((fs, 3), oids[2])
+        assert cache.get((fs, 2)) is None
+        assert cache.get((fs, 3)) == oids[2]
+
+        assert cache.info() == (2, 1, 2, 2)
+
+        cache.invalidate(fs)
+        assert cache.info().currsize == 0
+
+    def test_pending(self, session):
+        cache = IdentityCache('test')
+        key = (uuid.uuid4(), 1)
+
+        cache.add(session, key, uuid.uuid4())
+        session.rollback()
+        assert cache.get(key) is None
+
+        oid = uuid.uuid4()
+        cache.add(session, key, oid)
+        assert cache.get(key) is None
+        session.commit()
+        assert cache.get(key) == oid
+
+    def test_pending_savepoint(self, session):
+        cache = IdentityCache('test')
+        fs = uuid.uuid4()
+
+        # a released savepoint doesn't publish the entries before the
+        # surrounding transaction commits
+        cache.add(session, (fs, 1), uuid.uuid4())
+        with session.begin_nested():
+            cache.add(session, (fs, 2), uuid.uuid4())
+        assert cache.info().currsize == 0
+        session.rollback()
+        assert cache.info().currsize == 0
+
+    def test_pending_savepoint_rollback(self, session):
+        cache = IdentityCache('test')
+        fs = uuid.uuid4()
+
+        # only the entries of a rolled back savepoint are discarded
+        oid = uuid.uuid4()
+        with session.begin_nested():
+            cache.add(session, (fs, 1), oid)
+        savepoint = session.begin_nested()
+        cache.add(session, (fs, 2), uuid.uuid4())
+        savepoint.rollback()
+        session.commit()
+        assert cache.get((fs, 1)) == oid
+        assert cache.get((fs, 2)) is None
+
+    def test_get_or_create(self, session, forecastseries):
+        cell = GridCell(geom=Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]),
+                        depth_max=10,
+                        depth_min=5,
+                        forecastseries_oid=forecastseries.oid)
+        timestep = TimeStep(starttime=datetime(2021, 1, 1),
+                            endtime=datetime(2021, 1, 2),
+                            forecastseries_oid=forecastseries.oid)
+
+        cell1 = GridCellRepository.get_or_create(session, cell)
+        timestep1 = TimeStepRepository.get_or_create(session, timestep)
+        assert gridcell_cache.info().misses == 1
+        assert timestep_cache.info().misses == 1
+
+        cell2 = GridCellRepository.get_or_create(session, cell)
+        timestep2 = TimeStepRepository.get_or_create(session, timestep)
+        assert cell2.oid == cell1.oid
+        assert timestep2.oid == timestep1.oid
+        assert gridcell_cache.info().hits == 1
+        assert timestep_cache.info().hits == 1
+
+        ForecastSeriesRepository.delete(session, forecastseries.oid)
+        assert gridcell_cache.info().currsize == 0
+        assert timestep_cache.info().currsize == 0
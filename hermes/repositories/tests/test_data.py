@@ -4,15 +4,22 @@ import uuid
 from datetime import datetime
 
 import pandas as pd
+import pytest
 from hydws.parser import BoreholeHydraulics
 from seismostats import Catalog
 from sqlalchemy import text
 
-from hermes.repositories.data import (InjectionObservationRepository,
+from hermes.io.injectionplans import (InjectionPlanBuilder,
+                                      injectionplan_hydjson)
+from hermes.repositories.data import (BlobRepository,
+                                      EventObservationRepository,
+                                      InjectionObservationRepository,
                                       InjectionPlanRepository,
-                                      SeismicityObservationRepository)
+                                      SeismicityObservationRepository,
+                                      event_public_ids)
 from hermes.repositories.project import (ForecastRepository,
                                          ForecastSeriesRepository)
+from hermes.repositories.types import DuplicateError
 from hermes.schemas.project_schemas import Forecast, ForecastSeries
 
 MODULE_LOCATION = os.path.join(os.path.dirname(os.path.abspath(__file__)),
@@ -53,6 +60,12 @@ class TestData:
 
         assert obs_db.data.decode('utf-8')
 
+        events = SeismicityObservationRepository.get_catalog(
+            session, seismicity.oid)
+        assert len(events) == len(catalog)
+        assert events['magnitude'].tolist() == \
+            pytest.approx(catalog.sort_values('time')['magnitude'].tolist())
+
     def test_create_injectionobservation(self, session, connection):
         forecast = Forecast(oid=uuid.uuid4(),
                             starttime=datetime(2021, 1, 1),
@@ -86,6 +99,11 @@ class TestData:
             {'oid': injection_oid}
         ).scalar() == 1
 
+        observation = InjectionObservationRepository.create_from_hydraulics(
+            session, [borehole_hydraulics], forecast_oid)
+        assert json.loads(observation.data) == \
+            [borehole_hydraulics.to_json()]
+
     def test_create_injectionplan(self, session, connection):
         forecastseries = ForecastSeries(oid=uuid.uuid4(),
                                         name='test_series',)
@@ -118,3 +136,153 @@ class TestData:
                 'SELECT COUNT(*) FROM injectionplan WHERE oid = :oid'),
             {'oid': injectionplan_oid}
         ).scalar() == 1
+
+    def test_create_injectionplan_steps(self, session):
+        with open(os.path.join(MODULE_LOCATION, 'hydraulics.json'), 'rb') as f:
+            [data] = json.load(f)
+        section = data['sections'][0]
+        template = {'borehole_name': data['name'],
+                    'section_name': section['name'],
+                    'type': 'constant',
+                    'resolution': 60,
+                    'config': {'plan': {'topflow': {'value': 0.04}}}}
+        builder = InjectionPlanBuilder(template, [data])
+        start = datetime(2022, 4, 19, 14)
+        end = datetime(2022, 4, 19, 15)
+
+        plan = InjectionPlanRepository.create_from_steps(
+            session, [builder.build_steps(start, end)], 'test_plan')
+
+        assert plan.data is None
+        plan = InjectionPlanRepository.get_by_id(session, plan.oid)
+        assert json.loads(injectionplan_hydjson(plan)) == \
+            [builder.build(start, end)]
+
+    def test_injectionplan_cache_key(self, session):
+        plan = InjectionPlanRepository.create_from_steps(
+            session, [], 'test_plan', cache_key='a' * 64)
+
+        cached = InjectionPlanRepository.get_by_cache_keys(
+            session, ['a' * 64, 'b' * 64])
+        assert list(cached) == ['a' * 64]
+        assert cached['a' * 64].oid == plan.oid
+        assert InjectionPlanRepository.get_by_cache_keys(
+            session, ['a' * 64], lock=True)['a' * 64].oid == plan.oid
+
+        with pytest.raises(DuplicateError):
+            InjectionPlanRepository.create_from_steps(
+                session, [], 'test_plan', cache_key='a' * 64)
+        session.rollback()
+
+        assert InjectionPlanRepository.delete_unreferenced(
+            session, [plan.oid]) == 1
+        assert InjectionPlanRepository.get_by_cache_keys(
+            session, ['a' * 64]) == {}
+
+
+class TestSeismicityObservationStore:
+    def test_snapshots(self, session, forecastseries, forecast):
+        catalog = Catalog(pd.read_parquet(
+            os.path.join(MODULE_LOCATION, 'catalog.parquet.gzip')))
+        catalog = catalog.sort_values('time', ignore_index=True)
+        catalog['eventID'] = [f'smi:test/event/{i}'
+                              for i in range(len(catalog))]
+        starttime = catalog['time'].min().floor('s')
+        endtime = catalog['time'].max().ceil('s')
+
+        first = EventObservationRepository.lock_store(
+            session, forecastseries.oid)
+        EventObservationRepository.merge_into_store(
+            session, forecastseries.oid, catalog, starttime, endtime, first)
+        snapshot = SeismicityObservationRepository.create_snapshot(
+            session, forecast.oid, forecastseries.oid,
+            starttime, endtime, first)
+
+        assert snapshot.data is None
+        assert SeismicityObservationRepository.get_store_coverage(
+            session, forecastseries.oid) == (starttime, endtime)
+
+        # revise the magnitude of one event and delete another one
+        revised = catalog.drop(index=1)
+        revised.loc[0, 'magnitude'] += 1
+
+        second = EventObservationRepository.lock_store(
+            session, forecastseries.oid)
+        assert second > first
+        EventObservationRepository.merge_into_store(
+            session, forecastseries.oid, revised, starttime, endtime, second)
+        later = SeismicityObservationRepository.create_snapshot(
+            session, forecast.oid, forecastseries.oid,
+            starttime, endtime, second)
+
+        old = Catalog.from_quakeml(
+            SeismicityObservationRepository.get_quakeml(
+                session, snapshot.oid).decode(), include_ids=True)
+        new = Catalog.from_quakeml(
+            SeismicityObservationRepository.get_quakeml(
+                session, later.oid).decode(), include_ids=True)
+
+        assert set(old['eventID']) == set(catalog['eventID'])
+        assert set(new['eventID']) == set(revised['eventID'])
+        assert new.loc[new['eventID'] == 'smi:test/event/0',
+                       'magnitude'].item() == \
+            pytest.approx(catalog['magnitude'][0] + 1)
+        assert old.loc[old['eventID'] == 'smi:test/event/0',
+                       'magnitude'].item() == \
+            pytest.approx(catalog['magnitude'][0])
+
+        # merging unchanged events doesn't create new versions
+        third = EventObservationRepository.lock_store(
+            session, forecastseries.oid)
+        EventObservationRepository.merge_into_store(
+            session, forecastseries.oid, revised, starttime, endtime, third)
+
+        assert session.execute(text(
+            'SELECT COUNT(*) FROM eventobservation '
+            'WHERE forecastseries_oid = :oid'),
+            {'oid': forecastseries.oid}).scalar() == len(catalog) + 1
+
+    def test_event_public_ids(self):
+        catalog = Catalog({
+            'eventID': ['a', 'b', 'b', None],
+            'time': pd.to_datetime(['2021-01-01', '2021-01-02',
+                                    '2021-01-03', '2021-01-04'])})
+
+        assert event_public_ids(catalog).tolist() == [
+            'a',
+            'b#2021-01-02T00:00:00.000000',
+            'b#2021-01-03T00:00:00.000000',
+            '#2021-01-04T00:00:00.000000']
+
+
+class TestBlobs:
+    def test_shared_blobs(self, session, connection):
+        with open(os.path.join(MODULE_LOCATION, 'hydraulics.json'), 'rb') as f:
+            [data] = json.load(f)
+        data = json.dumps(data)
+
+        oids = []
+        for _ in range(2):
+            forecast = ForecastRepository.create(session, Forecast(
+                starttime=datetime(2021, 1, 1), endtime=datetime(2021, 1, 2)))
+            oids.append(InjectionObservationRepository.create_from_hydjson(
+                session, data, forecast.oid))
+            session.expunge_all()
+
+        # identical payloads are stored once, compressed
+        blob = connection.execute(text(
+            'SELECT COUNT(*), MAX(size), MAX(octet_length(data)) FROM blob')
+        ).one()
+        assert blob[0] == 1
+        assert blob[1] == len(data.encode())
+        assert blob[2] < blob[1]
+
+        for oid in oids:
+            assert InjectionObservationRepository.get_by_id(
+                session, oid).data.decode() == data
+
+        # only deleted once it isn't referenced anymore
+        InjectionObservationRepository.delete(session, oids[0])
+        assert BlobRepository.delete_unreferenced(session) == 0
+        InjectionObservationRepository.delete(session, oids[1])
+        assert BlobRepository.delete_unreferenced(session) == 1
@@ -2,9 +2,10 @@ import json
 import os
 
 from hermes.repositories.data import InjectionPlanRepository
-from hermes.repositories.results import ModelRunRepository
-from hermes.schemas.base import EStatus
-from hermes.schemas.result_schemas import ModelRun
+from hermes.repositories.results import (ModelResultRepository,
+                                         ModelRunRepository)
+from hermes.schemas.base import EResultType, EStatus
+from hermes.schemas.result_schemas import ModelResult, ModelRun
 
 MODULE_LOCATION = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                                'data')
@@ -40,3 +41,22 @@ class TestModelRun:
 
         assert InjectionPlanRepository.get_by_id(
             session, injectionplan_oid) is None
+
+    def test_fail_unfinished(self, session, forecast):
+        modelruns = [ModelRunRepository.create(session, ModelRun(
+            status=status, forecast_oid=forecast.oid))
+            for status in [EStatus.SCHEDULED, EStatus.COMPLETED]]
+        modelresults = [ModelResultRepository.create(session, ModelResult(
+            forecastseries_oid=forecast.forecastseries_oid,
+            result_type=EResultType.CATALOG,
+            modelrun_oid=m.oid)) for m in modelruns]
+
+        assert ModelRunRepository.fail_unfinished(session, forecast.oid) == 1
+        assert [ModelRunRepository.get_by_id(session, m.oid).status
+                for m in modelruns] == [EStatus.FAILED, EStatus.COMPLETED]
+
+        # the results of the failed ModelRun are deleted
+        assert ModelResultRepository.get_by_id(
+            session, modelresults[0].oid) is None
+        assert ModelResultRepository.get_by_id(
+            session, modelresults[1].oid) is not None
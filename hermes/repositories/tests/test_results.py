@@ -11,9 +11,11 @@ from shapely import Polygon
 from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
 
+from hermes.repositories.partitions import partition_name
 from hermes.repositories.project import (ForecastRepository,
                                          ForecastSeriesRepository)
-from hermes.repositories.results import (EventForecastRepository,
+from hermes.repositories.results import (EventForecastCompactRepository,
+                                         EventForecastRepository,
                                          GridCellRepository,
                                          GRParametersRepository,
                                          ModelResultRepository,
@@ -53,6 +55,39 @@ class TestGridCells:
         cell2 = GridCellRepository.get_or_create(session, cell2)
         assert cell1.oid == cell2.oid
 
+    def test_bulk_get_or_create(self, session, forecastseries):
+        cell1 = GridCell(geom=Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]),
+                         depth_max=10,
+                         depth_min=5,
+                         forecastseries_oid=forecastseries.oid)
+        cell1 = GridCellRepository.get_or_create(session, cell1)
+
+        cells = pd.DataFrame({'longitude_min': [0, 1, 2],
+                              'longitude_max': [1, 2, 3],
+                              'latitude_min': [0, 0, 0],
+                              'latitude_max': [1, 1, 1],
+                              'depth_min': [5, 5, np.nan],
+                              'depth_max': [10, 10, np.nan]})
+
+        oids = GridCellRepository.bulk_get_or_create(
+            session, forecastseries.oid, cells)
+        assert len(oids) == 3
+        assert len(set(oids)) == 3
+        assert oids[0] == cell1.oid
+
+        # the second call only returns the existing cells
+        oids2 = GridCellRepository.bulk_get_or_create(
+            session, forecastseries.oid, cells.iloc[::-1])
+        assert list(oids2) == list(oids[::-1])
+
+        # cells created in bulk are found by get_or_create
+        cell2 = GridCell(geom=Polygon([(1, 0), (2, 0), (2, 1), (1, 1)]),
+                         depth_max=10,
+                         depth_min=5,
+                         forecastseries_oid=forecastseries.oid)
+        cell2 = GridCellRepository.get_or_create(session, cell2)
+        assert cell2.oid == oids[1]
+
     def test_get_by_id(self, session, forecastseries):
         cell1 = GridCell(geom=Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]),
                          depth_max=10,
@@ -179,6 +214,7 @@ class TestModelResult:
         self.timestep = TimeStepRepository.create(session, timestep)
 
         modelresult = ModelResult(result_type=EResultType.CATALOG,
+                                  forecastseries_oid=self.forecastseries_oid,
                                   timestep_oid=self.timestep.oid,
                                   gridcell_oid=self.cell.oid,
                                   modelrun_oid=self.modelrun_oid)
@@ -198,8 +234,31 @@ class TestModelResult:
         assert GridCellRepository.get_by_id(session, self.cell.oid) is None
         assert TimeStepRepository.get_by_id(session, self.timestep.oid) is None
 
+    def test_delete_partitions(self, session):
+        partition = partition_name('modelresult', self.forecastseries_oid)
+        assert session.execute(text('SELECT to_regclass(:name)'),
+                               {'name': partition}).scalar() is not None
+
+        ForecastSeriesRepository.delete(session, self.forecastseries_oid)
+        assert session.execute(text('SELECT to_regclass(:name)'),
+                               {'name': partition}).scalar() is None
+        assert ModelResultRepository.get_by_id(
+            session, self.modelresult_oid) is None
+
+    def test_delete_by_modelrun(self, session):
+        ModelResultRepository.delete_by_modelrun(
+            session, uuid.uuid4(), self.modelrun_oid)
+        assert ModelResultRepository.get_by_id(
+            session, self.modelresult_oid) is not None
+
+        ModelResultRepository.delete_by_modelrun(
+            session, self.forecastseries_oid, self.modelrun_oid)
+        assert ModelResultRepository.get_by_id(
+            session, self.modelresult_oid) is None
+
     def test_batch_create(self, session):
         ids = ModelResultRepository.batch_create(session,
+                                                 self.forecastseries_oid,
                                                  10,
                                                  EResultType.CATALOG,
                                                  None,
@@ -214,10 +273,16 @@ class TestModelResult:
         assert count[0] == 11
         assert len(ids) == 10
 
+        realization_id = session.execute(
+            text('SELECT realization_id FROM modelresult WHERE oid = :oid;'),
+            {'oid': ids[3]}).scalar()
+        assert realization_id == 3
+
 
 class TestEventForecast:
-    def test_create(self, session):
-        event = EventForecast(longitude_value=1,
+    def test_create(self, session, forecastseries):
+        event = EventForecast(forecastseries_oid=forecastseries.oid,
+                              longitude_value=1,
                               latitude_value=2,
                               depth_value=3,
                               magnitude_value=4,
@@ -226,7 +291,7 @@ class TestEventForecast:
         event = EventForecastRepository.create(session, event)
         assert event.oid is not None
 
-    def test_create_from_forecast_catalog(self, session):
+    def test_create_from_forecast_catalog(self, session, forecastseries):
         catalog_path = os.path.join(MODULE_LOCATION, 'catalog.parquet.gzip')
 
         catalog = ForecastCatalog(pd.read_parquet(catalog_path))
@@ -238,10 +303,12 @@ class TestEventForecast:
         len_fc = len(catalog)
 
         modelresult_oids = ModelResultRepository.batch_create(
-            session, catalog.n_catalogs, EResultType.CATALOG, None, None, None)
+            session, forecastseries.oid, catalog.n_catalogs,
+            EResultType.CATALOG, None, None, None)
 
         EventForecastRepository \
-            .create_from_forecast_catalog(session, catalog, modelresult_oids)
+            .create_from_forecast_catalog(session, forecastseries.oid,
+                                          catalog, modelresult_oids)
 
         count = session.execute(
             text('SELECT COUNT(eventforecast.oid) FROM eventforecast;'))\
@@ -258,14 +325,72 @@ class TestEventForecast:
         assert count[0] == len_cat0
 
 
+class TestEventForecastCompact:
+    def test_create_from_forecast_catalog(self, session, forecastseries):
+        catalog_path = os.path.join(MODULE_LOCATION, 'catalog.parquet.gzip')
+
+        catalog = ForecastCatalog(pd.read_parquet(catalog_path))
+        catalog.n_catalogs = 5
+        catalog['catalog_id'] = np.random.randint(0, catalog.n_catalogs,
+                                                  catalog.shape[0])
+
+        len_cat0 = len(catalog[catalog['catalog_id'] == 0])
+
+        modelresult_oids = ModelResultRepository.batch_create(
+            session, forecastseries.oid, catalog.n_catalogs,
+            EResultType.CATALOG, None, None, None)
+
+        EventForecastCompactRepository \
+            .create_from_forecast_catalog(session, forecastseries.oid,
+                                          catalog, modelresult_oids)
+
+        count = session.execute(
+            text('SELECT COUNT(*) FROM eventforecastcompact '
+                 'WHERE modelresult_oid = :modelresult_oid;'),
+            {'modelresult_oid': modelresult_oids[0]}
+        ).scalar_one()
+        assert count == len_cat0
+
+        # no uncertainties in the catalog, no rows in the side table
+        count = session.execute(
+            text('SELECT COUNT(*) FROM eventforecastuncertainty;')
+        ).scalar_one()
+        assert count == 0
+
+    def test_create_with_uncertainties(self, session, forecastseries):
+        catalog_path = os.path.join(MODULE_LOCATION, 'catalog.parquet.gzip')
+
+        catalog = ForecastCatalog(pd.read_parquet(catalog_path))
+        catalog.n_catalogs = 1
+        catalog['catalog_id'] = 0
+        catalog['magnitude_uncertainty'] = 0.1
+
+        modelresult_oids = ModelResultRepository.batch_create(
+            session, forecastseries.oid, catalog.n_catalogs,
+            EResultType.CATALOG, None, None, None)
+
+        EventForecastCompactRepository \
+            .create_from_forecast_catalog(session, forecastseries.oid,
+                                          catalog, modelresult_oids)
+
+        result = session.execute(
+            text('SELECT COUNT(*), MIN(u.magnitude_uncertainty) '
+                 'FROM eventforecastcompact e '
+                 'JOIN eventforecastuncertainty u ON e.oid = u.oid;')
+        ).one()
+        assert result[0] == len(catalog)
+        assert result[1] == pytest.approx(0.1)
+
+
 class TestGRParameters:
-    def test_create(self, session):
-        gr_params = GRParameters(a_value=1, b_value=2,
+    def test_create(self, session, forecastseries):
+        gr_params = GRParameters(forecastseries_oid=forecastseries.oid,
+                                 a_value=1, b_value=2,
                                  mc_value=3, number_events_value=4)
         gr_params = GRParametersRepository.create(session, gr_params)
         assert gr_params.oid is not None
 
-    def test_create_from_forecast_grrategrid(self, session):
+    def test_create_from_forecast_grrategrid(self, session, forecastseries):
         rategrid_path = os.path.join(MODULE_LOCATION, 'forecastgrrategrid.pkl')
 
         with open(rategrid_path, 'rb') as f:
@@ -277,10 +402,11 @@ class TestGRParameters:
         len_fc = len(rategrid)
 
         modelresult_oids = ModelResultRepository.batch_create(
-            session, len(rategrid), EResultType.GRID, None, None, None)
+            session, forecastseries.oid, len(rategrid), EResultType.GRID,
+            None, None, None)
 
         GRParametersRepository.create_from_forecast_grrategrid(
-            session, rategrid, modelresult_oids)
+            session, forecastseries.oid, rategrid, modelresult_oids)
 
         count = session.execute(
             text('SELECT COUNT(grparameters.oid) FROM grparameters;'))\
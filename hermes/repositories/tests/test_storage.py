@@ -0,0 +1,88 @@
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+from seismostats import ForecastCatalog
+
+from hermes.repositories.storage import ParquetResultStore, bbox_filter
+
+MODULE_LOCATION = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               'data')
+
+
+def forecast_catalog() -> ForecastCatalog:
+    catalog = ForecastCatalog(pd.read_parquet(
+        os.path.join(MODULE_LOCATION, 'catalog.parquet.gzip')))
+    catalog['catalog_id'] = np.arange(len(catalog)) % 10
+    catalog.n_catalogs = 10
+    return catalog
+
+
+class TestParquetResultStore:
+    def test_write_catalog(self, session, tmp_path):
+        store = ParquetResultStore(tmp_path)
+        catalog = forecast_catalog()
+        oids = [uuid.uuid4() for _ in range(catalog.n_catalogs)]
+        forecastseries_oid, forecast_oid = uuid.uuid4(), uuid.uuid4()
+
+        uri = store.catalog_uri(forecastseries_oid, forecast_oid,
+                                uuid.uuid4(), uuid.uuid4())
+        store.write_catalog(session, uri, catalog, oids)
+
+        # only published on commit
+        assert not (tmp_path / uri).exists()
+        session.commit()
+        assert (tmp_path / uri).exists()
+
+        events = store.read_events([uri])
+        assert len(events) == len(catalog)
+        assert set(events['modelresult_oid']) == set(map(str, oids))
+
+        events = store.read_events([uri], modelresult_oids=oids[:1])
+        assert len(events) == (catalog['catalog_id'] == 0).sum()
+        assert (events['realization_id'] == 0).all()
+
+        bbox = (catalog['longitude'].median(), catalog['latitude'].min(),
+                catalog['longitude'].max(), catalog['latitude'].max())
+        events = store.read_events(
+            [uri], columns=['forecast_oid', 'longitude_value'],
+            filter=bbox_filter(*bbox))
+        assert len(events) == ((catalog['longitude'] > bbox[0])
+                               & (catalog['longitude'] < bbox[2])
+                               & (catalog['latitude'] > bbox[1])
+                               & (catalog['latitude'] < bbox[3])).sum()
+        assert (events['forecast_oid'] == str(forecast_oid)).all()
+
+        store.delete_forecast(forecast_oid)
+        assert not (tmp_path / uri).exists()
+
+    def test_rollback(self, session, tmp_path):
+        store = ParquetResultStore(tmp_path)
+        catalog = forecast_catalog()
+        oids = [uuid.uuid4() for _ in range(catalog.n_catalogs)]
+
+        uri = store.catalog_uri(uuid.uuid4(), uuid.uuid4(),
+                                uuid.uuid4(), uuid.uuid4())
+        store.write_catalog(session, uri, catalog, oids)
+        session.rollback()
+        session.commit()
+
+        assert not (tmp_path / uri).exists()
+        assert list((tmp_path / uri).parent.iterdir()) == []
+
+    def test_rollback_after_savepoint(self, session, tmp_path):
+        store = ParquetResultStore(tmp_path)
+        catalog = forecast_catalog()
+        oids = [uuid.uuid4() for _ in range(catalog.n_catalogs)]
+
+        uri = store.catalog_uri(uuid.uuid4(), uuid.uuid4(),
+                                uuid.uuid4(), uuid.uuid4())
+        store.write_catalog(session, uri, catalog, oids)
+        # releasing a savepoint doesn't publish the files
+        with session.begin_nested():
+            pass
+        assert not (tmp_path / uri).exists()
+
+        session.rollback()
+        assert list((tmp_path / uri).parent.iterdir()) == []
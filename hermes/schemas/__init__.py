@@ -1,5 +1,5 @@
 # flake8: noqa
-from hermes.schemas.base import EInput, EResultType, EStatus
+from hermes.schemas.base import ECatalogLayout, EInput, EResultType, EStatus
 from hermes.schemas.data_schemas import (EventObservation,
                                          InjectionObservation, InjectionPlan,
                                          SeismicityObservation)
@@ -8,6 +8,7 @@ from hermes.schemas.project_schemas import (Forecast, ForecastSeries,
                                             ForecastSeriesConfig,
                                             ForecastSeriesSchedule, Project,
                                             Tag)
-from hermes.schemas.result_schemas import (EventForecast, GridCell,
+from hermes.schemas.result_schemas import (EventForecast, EventForecastCompact,
+                                           EventForecastUncertainty, GridCell,
                                            GRParameters, ModelResult, ModelRun,
                                            TimeStep)
@@ -37,6 +37,11 @@ class EResultType(str, enum.Enum):
     BINS = 'BINS'
 
 
+class ECatalogLayout(str, enum.Enum):
+    DEFAULT = 'DEFAULT'
+    COMPACT = 'COMPACT'
+
+
 class CreationInfoMixin(Model):
     creationinfo_author: str | None = None
     creationinfo_agencyid: str | None = None
@@ -64,6 +69,24 @@ def real_value_mixin(field_name: str, real_type: TypeVar) -> Model:
     return retval
 
 
+def uncertainty_mixin(field_name: str) -> Model:
+    _func_map = dict([
+        (f'{field_name}_uncertainty',
+         (float | None, Field(default=None))),
+        (f'{field_name}_loweruncertainty',
+         (float | None, Field(default=None))),
+        (f'{field_name}_upperuncertainty',
+         (float | None, Field(default=None))),
+        (f'{field_name}_confidencelevel',
+         (float | None, Field(default=None))),
+    ])
+
+    retval = create_model(f'{field_name}_uncertainty',
+                          __base__=Model, **_func_map)
+
+    return retval
+
+
 def sd_validator(val):
     if isinstance(val, datetime):
         return val.strftime('%Y-%m-%dT%H:%M:%S')
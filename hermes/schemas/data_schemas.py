@@ -1,3 +1,4 @@
+from datetime import datetime
 from uuid import UUID
 
 from shapely import Point
@@ -5,10 +6,22 @@ from shapely import Point
 from hermes.schemas.base import Model, real_value_mixin
 
 
+class Blob(Model):
+    oid: UUID | None = None
+    hash: str | None = None
+    encoding: str | None = None
+    size: int | None = None
+    data: bytes | None = None
+
+
 class SeismicityObservation(Model):
     oid: UUID | None = None
     data: bytes | None = None
     forecast_oid: UUID | None = None
+    forecastseries_oid: UUID | None = None
+    starttime: datetime | None = None
+    endtime: datetime | None = None
+    snapshot_time: datetime | None = None
 
 
 class InjectionPlanTemplate(Model):
@@ -28,6 +41,7 @@ class InjectionObservation(Model):
 class InjectionPlan(Model):
     oid: UUID | None = None
     data: bytes | None = None
+    steps: bytes | None = None
     template: bytes | None = None
     name: str | None = None
     forecastseries_oid: UUID | None = None
@@ -48,3 +62,7 @@ class EventObservation(real_value_mixin('time', float),
     associatedstationcount: int | None = None
     usedstationcount: int | None = None
     coordinates: Point | None = None
+    forecastseries_oid: UUID | None = None
+    public_id: str | None = None
+    valid_from: datetime | None = None
+    valid_to: datetime | None = None
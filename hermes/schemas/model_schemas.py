@@ -5,7 +5,7 @@ from uuid import UUID
 from pydantic import field_validator
 from shapely import Polygon
 
-from hermes.schemas.base import EResultType, Model
+from hermes.schemas.base import ECatalogLayout, EResultType, Model
 
 
 class ModelConfig(Model):
@@ -14,6 +14,7 @@ class ModelConfig(Model):
     enabled: bool = True
     description: str | None = None
     result_type: EResultType | None = None
+    catalog_layout: ECatalogLayout = ECatalogLayout.DEFAULT
     sfm_module: str | None = None
     sfm_function: str | None = None
     last_modified: datetime | None = None
@@ -56,3 +57,5 @@ class DBModelRunInfo(BaseModelRunInfo):
     injection_observation_oid: UUID | None = None
     injection_plan_oid: UUID | None = None
     seismicity_observation_oid: UUID | None = None
+    # ModelRun already created by the forecast
+    modelrun_oid: UUID | None = None
@@ -7,7 +7,8 @@ from pydantic import field_validator
 from shapely import Point, Polygon
 
 from hermes.repositories.types import PolygonType, db_to_shapely
-from hermes.schemas.base import EResultType, EStatus, Model, real_value_mixin
+from hermes.schemas.base import (EResultType, EStatus, Model, real_value_mixin,
+                                 uncertainty_mixin)
 from hermes.utils.geometry import convert_input_to_polygon
 
 
@@ -22,10 +23,13 @@ class ModelRun(Model):
 
 class ModelResult(Model):
     oid: UUID | None = None
+    forecastseries_oid: UUID | None = None
     result_type: EResultType | None = None
     timestep_oid: UUID | None = None
     gridcell_oid: UUID | None = None
     modelrun_oid: UUID | None = None
+    storage_uri: str | None = None
+    event_count: int | None = None
 
 
 class TimeStep(Model):
@@ -71,10 +75,33 @@ class EventForecast(real_value_mixin('longitude', float),
                     ):
     oid: UUID | None = None
     magnitude_type: str | None = None
+    forecastseries_oid: UUID | None = None
     modelresult_oid: UUID | None = None
     coordinates: Point | None = None
 
 
+class EventForecastCompact(Model):
+    oid: int | None = None
+    time_value: datetime | None = None
+    latitude_value: float | None = None
+    longitude_value: float | None = None
+    depth_value: float | None = None
+    magnitude_value: float | None = None
+    magnitude_type: str | None = None
+    forecastseries_oid: UUID | None = None
+    modelresult_oid: UUID | None = None
+
+
+class EventForecastUncertainty(uncertainty_mixin('longitude'),
+                               uncertainty_mixin('latitude'),
+                               uncertainty_mixin('depth'),
+                               uncertainty_mixin('magnitude'),
+                               uncertainty_mixin('time')
+                               ):
+    oid: int | None = None
+    forecastseries_oid: UUID | None = None
+
+
 class GRParameters(real_value_mixin('number_events', float),
                    real_value_mixin('b', float),
                    real_value_mixin('a', float),
@@ -82,4 +109,5 @@ class GRParameters(real_value_mixin('number_events', float),
                    real_value_mixin('alpha', float)
                    ):
     oid: UUID | None = None
+    forecastseries_oid: UUID | None = None
     modelresult_oid: UUID | None = None
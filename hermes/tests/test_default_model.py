@@ -2,6 +2,7 @@ import os
 from datetime import datetime
 from unittest.mock import patch
 
+from seismostats import Catalog
 from sqlalchemy import text
 
 from hermes.flows.forecast_handler import forecast_runner
@@ -25,6 +26,9 @@ class TestDefaultModelRun:
         mock_session_fc.return_value.__enter__.return_value = session
         mock_session_m.return_value = session
         mock_get_catalog().get_quakeml.return_value = catalog
+        mock_get_catalog().get_catalog.return_value = Catalog.from_quakeml(
+            catalog, include_uncertainties=True, include_ids=True,
+            include_quality=True)
 
         forecast_runner(forecastseries.oid,
                         starttime=datetime(2022, 1, 1, 0, 0, 0))
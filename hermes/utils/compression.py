@@ -0,0 +1,54 @@
+import gzip
+import hashlib
+
+ENCODINGS = ['zstd', 'gzip', 'identity']
+
+
+def content_hash(content: bytes) -> str:
+    """
+    Hash identifying a content, the hexadecimal SHA-256 digest.
+    """
+    return hashlib.sha256(content).hexdigest()
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    """
+    Compress a content.
+
+    Args:
+        content: Uncompressed content.
+        encoding: Compression, one of `ENCODINGS`, named like the HTTP
+            `Content-Encoding` it corresponds to.
+
+    Returns:
+        The compressed content.
+    """
+    if encoding == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor(level=9).compress(content)
+    if encoding == 'gzip':
+        return gzip.compress(content, mtime=0)
+    if encoding == 'identity':
+        return content
+    raise ValueError(f'Unknown encoding: {encoding}')
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    """
+    Decompress a content compressed by `compress`.
+
+    Args:
+        data: Compressed content.
+        encoding: Compression of the content.
+
+    Returns:
+        The uncompressed content.
+    """
+    if encoding == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'identity':
+        return data
+    raise ValueError(f'Unknown encoding: {encoding}')
@@ -8,7 +8,7 @@ from hermes.config import get_settings
 def generate_date_ranges(
         starttime: datetime,
         endtime: datetime,
-        resolution: int = 365) -> list[tuple[datetime, datetime]]:
+        resolution: float = 365) -> list[tuple[datetime, datetime]]:
     """
     Generate date ranges for a given time period.
 
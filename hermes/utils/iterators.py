@@ -0,0 +1,74 @@
+import contextvars
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar('T')
+
+_DONE = object()
+
+
+class _Raised:
+    def __init__(self, exception: BaseException) -> None:
+        self.exception = exception
+
+
+def prefetch(iterable: Iterable[T], maxsize: int = 1) -> Iterator[T]:
+    """
+    Iterate over an iterable in a background thread.
+
+    The next items are produced while the current one is processed by
+    the caller, but at most `maxsize` items are buffered, so that memory
+    stays bounded. Exceptions of the producer are raised in the caller.
+    If the caller stops early, the producer is stopped as well.
+
+    Args:
+        iterable: Iterable to consume in the background.
+        maxsize: Maximum number of items produced ahead of the caller.
+
+    Returns:
+        Iterator over the items of `iterable`.
+    """
+    buffer = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce() -> None:
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put(item):
+                    break
+            else:
+                put(_DONE)
+        except BaseException as e:
+            put(_Raised(e))
+        finally:
+            if hasattr(iterator, 'close'):
+                iterator.close()
+
+    # run in a copy of the current context, eg. to keep the prefect logger
+    thread = threading.Thread(target=contextvars.copy_context().run,
+                              args=(produce,),
+                              daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Raised):
+                raise item.exception
+            yield item
+    finally:
+        stop.set()
+        thread.join()
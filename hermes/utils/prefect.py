@@ -1,6 +1,55 @@
+import asyncio
+from typing import AsyncIterator
+from uuid import UUID
+
+from prefect.client.orchestration import get_client
+from prefect.client.schemas.filters import (FlowRunFilter, FlowRunFilterId,
+                                            FlowRunFilterState,
+                                            FlowRunFilterStateType)
+from prefect.client.schemas.objects import TERMINAL_STATES, FlowRun
+
+# maximum number of flow runs the API returns per request
+READ_LIMIT = 200
+
+
 def futures_wait(futures: list) -> None:
     """
     Wait for all futures to finish.
     """
     for future in futures:
         future.wait()
+
+
+async def final_flow_runs(flow_run_ids: list[UUID],
+                          poll_interval: float = 1) -> AsyncIterator[FlowRun]:
+    """
+    Wait for flow runs to reach a final state.
+
+    Uses a single client, every `poll_interval` seconds the runs which
+    finished since are read with one request per `READ_LIMIT` unfinished
+    runs.
+
+    Args:
+        flow_run_ids: IDs of the flow runs.
+        poll_interval: Seconds between the requests.
+
+    Yields:
+        The flow runs, as soon as they are in a final state.
+    """
+    pending = set(flow_run_ids)
+    async with get_client() as client:
+        while True:
+            ids = list(pending)
+            for i in range(0, len(ids), READ_LIMIT):
+                flow_runs = await client.read_flow_runs(
+                    flow_run_filter=FlowRunFilter(
+                        id=FlowRunFilterId(any_=ids[i:i + READ_LIMIT]),
+                        state=FlowRunFilterState(type=FlowRunFilterStateType(
+                            any_=list(TERMINAL_STATES)))),
+                    limit=READ_LIMIT)
+                for flow_run in flow_runs:
+                    pending.discard(flow_run.id)
+                    yield flow_run
+            if not pending:
+                return
+            await asyncio.sleep(poll_interval)
@@ -0,0 +1,31 @@
+import pytest
+
+from hermes.utils.compression import (ENCODINGS, compress, content_hash,
+                                      decompress)
+
+CONTENT = b'<event><magnitude>1.2</magnitude></event>' * 100
+
+
+@pytest.mark.parametrize('encoding', ENCODINGS)
+def test_compress(encoding):
+    if encoding == 'zstd':
+        pytest.importorskip('zstandard')
+
+    data = compress(CONTENT, encoding)
+    assert decompress(data, encoding) == CONTENT
+
+    if encoding != 'identity':
+        assert len(data) < len(CONTENT) / 10
+
+
+def test_content_hash():
+    assert content_hash(CONTENT) == content_hash(bytes(CONTENT))
+    assert content_hash(CONTENT) != content_hash(CONTENT[1:])
+    assert len(content_hash(CONTENT)) == 64
+
+
+def test_unknown_encoding():
+    with pytest.raises(ValueError):
+        compress(CONTENT, 'br')
+    with pytest.raises(ValueError):
+        decompress(CONTENT, 'br')
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from hermes.utils.iterators import prefetch
+
+
+def test_prefetch():
+    assert list(prefetch(range(10))) == list(range(10))
+    assert list(prefetch([], maxsize=3)) == []
+
+
+def test_prefetch_background():
+    main = threading.get_ident()
+
+    def produce():
+        for i in range(3):
+            yield threading.get_ident()
+
+    assert all(ident != main for ident in prefetch(produce()))
+
+
+def test_prefetch_exception():
+    def produce():
+        yield 1
+        raise ValueError('failed')
+
+    iterator = prefetch(produce())
+    assert next(iterator) == 1
+    with pytest.raises(ValueError, match='failed'):
+        next(iterator)
+
+
+def test_prefetch_close():
+    closed = threading.Event()
+
+    def produce():
+        try:
+            i = 0
+            while True:
+                yield i
+                i += 1
+        finally:
+            closed.set()
+
+    for i in prefetch(produce()):
+        if i == 2:
+            break
+
+    assert closed.is_set()
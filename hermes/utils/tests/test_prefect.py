@@ -0,0 +1,52 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+from hermes.utils import prefect
+from hermes.utils.prefect import final_flow_runs
+
+
+class FakeClient:
+    def __init__(self, finished_after: dict[uuid.UUID, int]):
+        # number of polls after which each flow run is finished
+        self.finished_after = finished_after
+        self.requests = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def read_flow_runs(self, flow_run_filter, limit):
+        ids = flow_run_filter.id.any_
+        self.requests.append(ids)
+        return [SimpleNamespace(id=i) for i in ids
+                if self.finished_after[i] < len(self.requests)]
+
+
+def test_final_flow_runs(monkeypatch):
+    ids = [uuid.uuid4() for _ in range(3)]
+    client = FakeClient({ids[0]: 2, ids[1]: 0, ids[2]: 1})
+    monkeypatch.setattr(prefect, 'get_client', lambda: client)
+
+    async def collect():
+        return [f.id async for f in final_flow_runs(ids, poll_interval=0)]
+
+    assert asyncio.run(collect()) == [ids[1], ids[2], ids[0]]
+
+    # one request per poll, only for the unfinished runs
+    assert [set(r) for r in client.requests] == \
+        [set(ids), {ids[0], ids[2]}, {ids[0]}]
+
+
+def test_final_flow_runs_batches(monkeypatch):
+    ids = [uuid.uuid4() for _ in range(prefect.READ_LIMIT + 1)]
+    client = FakeClient({i: 0 for i in ids})
+    monkeypatch.setattr(prefect, 'get_client', lambda: client)
+
+    async def collect():
+        return [f.id async for f in final_flow_runs(ids, poll_interval=0)]
+
+    assert set(asyncio.run(collect())) == set(ids)
+    assert [len(r) for r in client.requests] == [prefect.READ_LIMIT, 1]
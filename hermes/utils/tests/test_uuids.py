@@ -0,0 +1,17 @@
+from uuid import UUID
+
+from hermes.utils.uuids import random_uuids
+
+
+def test_random_uuids():
+    uuids = random_uuids(1000)
+
+    assert len(uuids) == 1000
+    assert len(set(uuids)) == 1000
+
+    for u in uuids[:10]:
+        parsed = UUID(u)
+        assert parsed.version == 4
+        assert parsed.hex == u
+
+    assert len(random_uuids(0)) == 0
@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+from hermes.utils.write_behind import WriteBehind
+
+
+def test_write_behind():
+    written = []
+    threads = set()
+
+    def write(i):
+        def _write():
+            written.append(i)
+            threads.add(threading.get_ident())
+        return _write
+
+    with WriteBehind(maxsize=2) as writer:
+        for i in range(5):
+            writer.submit(write(i))
+
+    assert written == list(range(5))
+    assert threading.get_ident() not in threads
+
+
+def test_write_behind_backpressure():
+    release = threading.Event()
+    writer = WriteBehind(maxsize=1)
+
+    # the first write blocks the thread, the second waits in the queue
+    writer.submit(release.wait)
+    writer.submit(lambda: None)
+
+    submitted = threading.Event()
+
+    def submit():
+        writer.submit(lambda: None)
+        submitted.set()
+
+    threading.Thread(target=submit, daemon=True).start()
+    assert not submitted.wait(0.2)
+
+    release.set()
+    assert submitted.wait(5)
+    writer.close()
+
+
+def test_write_behind_exception():
+    written = []
+
+    def fail():
+        raise ValueError('failed')
+
+    with pytest.raises(ValueError, match='failed'):
+        with WriteBehind(maxsize=3) as writer:
+            writer.submit(fail)
+            writer.submit(lambda: written.append(1))
+
+    # writes after a failed write are skipped
+    assert written == []
+
+
+def test_write_behind_caller_exception():
+    written = []
+
+    with pytest.raises(KeyError):
+        with WriteBehind() as writer:
+            writer.submit(lambda: written.append(1))
+            raise KeyError('caller')
+
+    # pending writes are still written
+    assert written == [1]
@@ -0,0 +1,75 @@
+import contextvars
+import queue
+import threading
+from typing import Callable
+
+_STOP = object()
+
+
+class WriteBehind:
+    """
+    Executes submitted writes in order in a background thread, so that
+    the caller can continue while they are written.
+
+    At most `maxsize` writes are waiting at the same time, `submit`
+    blocks while the queue is full. If a write fails, no further writes
+    are executed and the exception is raised by the next call to
+    `submit` or `close`.
+
+    Can be used as a context manager, waiting for all writes on exit.
+
+    Args:
+        maxsize: Maximum number of writes waiting to be executed.
+    """
+
+    def __init__(self, maxsize: int = 1) -> None:
+        self._queue = queue.Queue(maxsize)
+        self._exception: BaseException | None = None
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> 'WriteBehind':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # pending writes of the successful runs are still written
+        # if the caller failed, but its exception takes precedence.
+        try:
+            self.close()
+        except BaseException:
+            if exc_type is None:
+                raise
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            context, write = item
+            if self._exception is None:
+                try:
+                    context.run(write)
+                except BaseException as e:
+                    self._exception = e
+
+    def _raise(self) -> None:
+        if self._exception is not None:
+            raise self._exception
+
+    def submit(self, write: Callable[[], None]) -> None:
+        """
+        Submit a write, blocking while too many writes are waiting.
+        """
+        self._raise()
+        # run in a copy of the current context, eg. to keep the
+        # prefect logger
+        self._queue.put((contextvars.copy_context(), write))
+
+    def close(self) -> None:
+        """
+        Wait until all submitted writes are executed.
+        """
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._raise()
@@ -1,14 +1,35 @@
+# The events observed for a forecast, either stored for the forecast
+# itself or once for its forecastseries as they were known at the time
+# of the forecast. The two cases are separate branches of the UNION ALL
+# so that each can use its own index.
 OBSERVED_EVENTS = """
-SELECT eventobservation.*
-FROM eventobservation
-JOIN seismicityobservation
-    ON eventobservation.seismicityobservation_oid = seismicityobservation.oid
-WHERE seismicityobservation.forecast_oid = :forecast_id
-AND eventobservation.time_value >= :start_time
-AND eventobservation.time_value <= :end_time
-AND eventobservation.magnitude_value >= :min_mag
+SELECT events.*
+FROM (
+    SELECT eventobservation.*
+    FROM eventobservation
+    JOIN seismicityobservation
+        ON eventobservation.seismicityobservation_oid
+            = seismicityobservation.oid
+    WHERE seismicityobservation.forecast_oid = :forecast_id
+    UNION ALL
+    SELECT eventobservation.*
+    FROM eventobservation
+    JOIN seismicityobservation
+        ON eventobservation.forecastseries_oid
+            = seismicityobservation.forecastseries_oid
+        AND eventobservation.time_value >= seismicityobservation.starttime
+        AND eventobservation.time_value <= seismicityobservation.endtime
+        AND eventobservation.valid_from <= seismicityobservation.snapshot_time
+        AND (eventobservation.valid_to IS NULL
+             OR eventobservation.valid_to
+                > seismicityobservation.snapshot_time)
+    WHERE seismicityobservation.forecast_oid = :forecast_id
+) AS events
+WHERE events.time_value >= :start_time
+AND events.time_value <= :end_time
+AND events.magnitude_value >= :min_mag
 AND ST_Within(
-    eventobservation.coordinates,
+    events.coordinates,
     ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326)
 );
 """
@@ -10,7 +10,16 @@ EVENT_COUNT_SERIES = """
     AND mr.modelconfig_oid = :modelconfig_oid
     JOIN modelresult res
     ON mr.oid = res.modelrun_oid
-    JOIN eventforecast s
+    AND res.forecastseries_oid = :forecastseries_oid
+    JOIN (SELECT modelresult_oid, coordinates
+            FROM eventforecast
+            WHERE forecastseries_oid = :forecastseries_oid
+          UNION ALL
+          SELECT modelresult_oid,
+                 ST_SetSRID(ST_MakePoint(longitude_value, latitude_value),
+                            4326)
+            FROM eventforecastcompact
+            WHERE forecastseries_oid = :forecastseries_oid) s
     ON res.oid = s.modelresult_oid
     AND ST_Within(
             s.coordinates,
@@ -13,6 +13,15 @@ WITH grid_cells AS (
                 JOIN eventforecast
                     ON modelresult.oid = eventforecast.modelresult_oid
             WHERE modelresult.modelrun_oid = :modelrun_oid
+        UNION ALL
+        SELECT modelresult.realization_id,
+               ST_SetSRID(ST_MakePoint(eventforecastcompact.longitude_value,
+                                       eventforecastcompact.latitude_value),
+                          4326)
+            FROM modelresult
+                JOIN eventforecastcompact
+                    ON modelresult.oid = eventforecastcompact.modelresult_oid
+            WHERE modelresult.modelrun_oid = :modelrun_oid
         ) as events
     WHERE ST_Within(
             events.coordinates,
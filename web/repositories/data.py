@@ -4,13 +4,48 @@ from uuid import UUID
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from hermes.datamodel.blobs import BlobTable
 from hermes.datamodel.data_tables import (InjectionObservationTable,
                                           InjectionPlanTable,
                                           SeismicityObservationTable)
 from hermes.datamodel.result_tables import ModelRunTable
-from hermes.schemas.data_schemas import (InjectionObservation, InjectionPlan,
-                                         SeismicityObservation)
+from hermes.io.serialize import deserialize_seismostats_observations
+from hermes.repositories.data import snapshot_events
+from hermes.schemas.data_schemas import (Blob, InjectionObservation,
+                                         InjectionPlan, SeismicityObservation)
 from web.repositories.base import async_repository_factory
+from web.repositories.database import pandas_read_sql_async
+
+
+class AsyncBlobRepository(async_repository_factory(Blob, BlobTable)):
+
+    @classmethod
+    async def get_by_injectionobservation(
+            cls,
+            session: Session,
+            injectionobservation_oid: UUID) -> Blob:
+
+        q = select(BlobTable).join(
+            InjectionObservationTable,
+            InjectionObservationTable.data_hash == BlobTable.hash) \
+            .where(InjectionObservationTable.oid == injectionobservation_oid)
+        result = await session.execute(q)
+        result = result.scalar()
+        return cls.model.model_validate(result) if result else None
+
+    @classmethod
+    async def get_injectionobservation_by_forecast(
+            cls,
+            session: Session,
+            forecast_oid: UUID) -> Blob:
+
+        q = select(BlobTable).join(
+            InjectionObservationTable,
+            InjectionObservationTable.data_hash == BlobTable.hash) \
+            .where(InjectionObservationTable.forecast_oid == forecast_oid)
+        result = await session.execute(q)
+        result = result.scalar()
+        return cls.model.model_validate(result) if result else None
 
 
 class AsyncSeismicityObservationRepository(async_repository_factory(
@@ -28,6 +63,23 @@ class AsyncSeismicityObservationRepository(async_repository_factory(
         result = result.scalar()
         return cls.model.model_validate(result) if result else None
 
+    @classmethod
+    async def get_quakeml(
+            cls,
+            session: Session,
+            observation: SeismicityObservation) -> bytes:
+        """
+        Get the QuakeML of a seismicity observation, generated from the
+        observation store for snapshots.
+        """
+        if observation.data is not None:
+            return observation.data
+
+        events = await pandas_read_sql_async(
+            snapshot_events(observation), session)
+        catalog = deserialize_seismostats_observations(events)
+        return catalog.to_quakeml().encode()
+
 
 class AsyncInjectionObservationRepository(async_repository_factory(
         InjectionObservation, InjectionObservationTable)):
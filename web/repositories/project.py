@@ -66,11 +66,12 @@ class AsyncForecastSeriesRepository(async_repository_factory(
 class AsyncForecastRepository(async_repository_factory(Forecast,
                                                        ForecastTable)):
 
+    # noload('*') keeps the payload blobs from being joined in
     joined_load_query = (
         joinedload(ForecastTable.injectionobservation)
-        .load_only(InjectionObservationTable.oid),
+        .load_only(InjectionObservationTable.oid).noload('*'),
         joinedload(ForecastTable.seismicityobservation)
-        .load_only(SeismicityObservationTable.oid),
+        .load_only(SeismicityObservationTable.oid).noload('*'),
         joinedload(ForecastTable.modelruns)
         .options(
             joinedload(ModelRunTable.modelconfig)
@@ -79,7 +80,7 @@ class AsyncForecastRepository(async_repository_factory(Forecast,
                        ModelConfigTable.name),
             joinedload(ModelRunTable.injectionplan)
             .load_only(InjectionPlanTable.name,
-                       InjectionPlanTable.oid)
+                       InjectionPlanTable.oid).noload('*')
         ).load_only(ModelRunTable.oid,
                     ModelRunTable.status))
 
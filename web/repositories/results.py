@@ -1,17 +1,23 @@
+import asyncio
 from uuid import UUID
 
+import numpy as np
+import pandas as pd
 from seismostats import Catalog, ForecastGRRateGrid
-from sqlalchemy import func, join, select
+from sqlalchemy import Select, func, join, select
 from sqlalchemy.orm import Session, joinedload
 
 from hermes.datamodel.data_tables import InjectionPlanTable
-from hermes.datamodel.project_tables import ModelConfigTable
-from hermes.datamodel.result_tables import (EventForecastTable, GridCellTable,
-                                            GRParametersTable,
+from hermes.datamodel.project_tables import ForecastTable, ModelConfigTable
+from hermes.datamodel.result_tables import (EventForecastCompactTable,
+                                            EventForecastTable,
+                                            EventForecastUncertaintyTable,
+                                            GridCellTable, GRParametersTable,
                                             ModelResultTable, ModelRunTable,
                                             TimeStepTable)
 from hermes.io.serialize import (deserialize_seismostats_catalog,
                                  deserialize_seismostats_grrategrid)
+from hermes.repositories.storage import bbox_filter, get_result_store
 from hermes.schemas.result_schemas import (EventForecast, GridCell,
                                            GRParameters, ModelResult, ModelRun)
 from web.repositories.base import async_repository_factory
@@ -182,6 +188,43 @@ class AsyncEventForecastRepository(
 
         result = await pandas_read_sql_async(q, session)
 
+        # events of models using the compact layout
+        q = select(ModelResultTable.realization_id,
+                   *EventForecastCompactTable.__table__.c,
+                   *[c for c in EventForecastUncertaintyTable.__table__.c
+                     if c.name not in ('oid', 'forecastseries_oid')],
+                   GridCellTable.depth_min,
+                   GridCellTable.depth_max,
+                   GridCellTable.geom,
+                   TimeStepTable.starttime,
+                   TimeStepTable.endtime)\
+            .select_from(ModelResultTable) \
+            .where(*filter) \
+            .join(EventForecastCompactTable,
+                  (EventForecastCompactTable.modelresult_oid
+                   == ModelResultTable.oid)
+                  & (EventForecastCompactTable.forecastseries_oid
+                     == ModelResultTable.forecastseries_oid)) \
+            .outerjoin(EventForecastUncertaintyTable,
+                       (EventForecastUncertaintyTable.oid
+                        == EventForecastCompactTable.oid)
+                       & (EventForecastUncertaintyTable.forecastseries_oid
+                          == EventForecastCompactTable.forecastseries_oid)) \
+            .join(GridCellTable,
+                  GridCellTable.oid == ModelResultTable.gridcell_oid) \
+            .join(TimeStepTable,
+                  TimeStepTable.oid == ModelResultTable.timestep_oid)
+
+        compact = await pandas_read_sql_async(q, session)
+
+        stored = await cls._get_stored_events(session, filter)
+
+        frames = [f for f in (result, compact, stored) if not f.empty]
+        if len(frames) > 1:
+            result = pd.concat(frames, ignore_index=True)
+        elif frames:
+            result = frames[0]
+
         catalog = deserialize_seismostats_catalog(
             result,
             gridcell=gridcell_oid is not None,
@@ -189,6 +232,122 @@ class AsyncEventForecastRepository(
 
         return catalog
 
+    @classmethod
+    async def _get_stored_events(cls,
+                                 session: Session,
+                                 filter: list) -> pd.DataFrame:
+        """
+        Read the events of the ModelResults matching `filter` which are
+        kept in the result store, in the same format as the events
+        read from the database.
+        """
+        q = select(ModelResultTable.realization_id,
+                   ModelResultTable.oid.label('modelresult_oid'),
+                   ModelResultTable.storage_uri,
+                   GridCellTable.depth_min,
+                   GridCellTable.depth_max,
+                   GridCellTable.geom,
+                   TimeStepTable.starttime,
+                   TimeStepTable.endtime) \
+            .where(*filter, ModelResultTable.storage_uri.isnot(None)) \
+            .join(GridCellTable) \
+            .join(TimeStepTable)
+
+        results = await pandas_read_sql_async(q, session)
+        if results.empty:
+            return results
+
+        results['modelresult_oid'] = results['modelresult_oid'].astype(str)
+
+        events = await asyncio.to_thread(
+            get_result_store().read_events,
+            results['storage_uri'].unique().tolist(),
+            results['modelresult_oid'])
+
+        events = events.drop(columns=['realization_id']).merge(
+            results.drop(columns=['storage_uri']), on='modelresult_oid')
+
+        # columns of the eventforecast table which aren't stored
+        return events.assign(oid=None, coordinates=None)
+
+    @classmethod
+    async def _get_storage_uris(cls, session: Session, q: Select) \
+            -> list[str]:
+        q = q.with_only_columns(ModelResultTable.storage_uri) \
+            .where(ModelResultTable.storage_uri.isnot(None)) \
+            .distinct()
+        result = await session.execute(q)
+        return result.scalars().all()
+
+    @classmethod
+    async def get_stored_eventcounts(cls,
+                                     session: Session,
+                                     modelrun_oid: UUID,
+                                     min_lon: float,
+                                     min_lat: float,
+                                     max_lon: float,
+                                     max_lat: float,
+                                     res_lon: float,
+                                     res_lat: float) -> pd.DataFrame:
+        """
+        Count the events of a model run kept in the result store per
+        grid point, the same way as the EVENTCOUNTS query does for the
+        events in the database.
+        """
+        uris = await cls._get_storage_uris(
+            session,
+            select(ModelResultTable).where(
+                ModelResultTable.modelrun_oid == modelrun_oid))
+
+        events = await asyncio.to_thread(
+            get_result_store().read_events,
+            uris,
+            columns=['longitude_value', 'latitude_value'],
+            filter=bbox_filter(min_lon, min_lat, max_lon, max_lat))
+
+        # snap the events to the grid like ST_SnapToGrid
+        grid = pd.DataFrame({
+            'grid_lon': np.rint((events['longitude_value'] - min_lon)
+                                / res_lon) * res_lon + min_lon,
+            'grid_lat': np.rint((events['latitude_value'] - min_lat)
+                                / res_lat) * res_lat + min_lat})
+
+        return grid.groupby(['grid_lon', 'grid_lat'], as_index=False) \
+            .size().rename(columns={'size': 'event_count'})
+
+    @classmethod
+    async def get_stored_eventcounts_series(
+            cls,
+            session: Session,
+            forecastseries_oid: UUID,
+            modelconfig_oid: UUID,
+            min_lon: float,
+            min_lat: float,
+            max_lon: float,
+            max_lat: float) -> pd.DataFrame:
+        """
+        Count the events kept in the result store per forecast and
+        realization, the same way as the EVENT_COUNT_SERIES query does
+        for the events in the database.
+        """
+        uris = await cls._get_storage_uris(
+            session,
+            select(ModelResultTable)
+            .join(ModelRunTable)
+            .join(ForecastTable)
+            .where(ForecastTable.forecastseries_oid == forecastseries_oid,
+                   ModelRunTable.modelconfig_oid == modelconfig_oid))
+
+        events = await asyncio.to_thread(
+            get_result_store().read_events,
+            uris,
+            columns=['forecast_oid', 'realization_id'],
+            filter=bbox_filter(min_lon, min_lat, max_lon, max_lat))
+
+        return events.groupby(['forecast_oid', 'realization_id'],
+                              as_index=False) \
+            .size().rename(columns={'size': 'event_count'})
+
 
 class AsyncModelRunRepository(async_repository_factory(
         ModelRun, ModelRunTable)):
@@ -1,5 +1,54 @@
-from fastapi import Response
+import asyncio
+
+from fastapi import Request, Response
+
+from hermes.io.injectionplans import injectionplan_hydjson
+from hermes.schemas.data_schemas import Blob, InjectionPlan
+from hermes.utils.compression import decompress
 
 
 class XMLResponse(Response):
     media_type = "application/xml"
+
+
+def accepted_encodings(request: Request) -> set[str]:
+    """
+    Content encodings accepted by the client, without the ones
+    explicitly refused with `q=0`.
+    """
+    encodings = set()
+    for part in request.headers.get('accept-encoding', '').split(','):
+        encoding, *params = [p.strip() for p in part.split(';')]
+        if encoding and not any(p.replace(' ', '') in ('q=0', 'q=0.0')
+                                for p in params):
+            encodings.add(encoding.lower())
+    return encodings
+
+
+def blob_response(request: Request, blob: Blob, media_type: str) -> Response:
+    """
+    Respond with the content of a blob, passing the compressed content
+    straight through if the client accepts its encoding.
+    """
+    headers = {'Vary': 'Accept-Encoding'}
+    if blob.encoding != 'identity' \
+            and blob.encoding in accepted_encodings(request):
+        headers['Content-Encoding'] = blob.encoding
+        return Response(blob.data, media_type=media_type, headers=headers)
+    return Response(decompress(blob.data, blob.encoding),
+                    media_type=media_type, headers=headers)
+
+
+async def injectionplan_response(plan: InjectionPlan,
+                                 compact: bool) -> Response:
+    """
+    Respond with the hydJSON of the borehole of an injection plan, or
+    with its compact representation if requested and the plan has one.
+    """
+    if compact and plan.steps is not None:
+        data = plan.steps
+    else:
+        # expanding the steps takes long for long plans
+        data = await asyncio.to_thread(injectionplan_hydjson, plan)
+    return Response(data[1:-1],  # remove start and end []
+                    media_type='application/json')
@@ -1,16 +1,17 @@
 from datetime import datetime
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, HTTPException, Request, Response
 from seismostats import Catalog
 from sqlalchemy import text
 
 from hermes.schemas.result_schemas import ModelRun
 from web.queries.forecasts import OBSERVED_EVENTS
-from web.repositories.data import AsyncInjectionObservationRepository
+from web.repositories.data import AsyncBlobRepository
 from web.repositories.database import DBSessionDep, pandas_read_sql_async
 from web.repositories.project import AsyncForecastRepository
 from web.repositories.results import AsyncModelRunRepository
+from web.routers import blob_response
 from web.schemas import ForecastJSON
 
 router = APIRouter(prefix="/forecasts", tags=['forecast'])
@@ -37,9 +38,9 @@ async def get_forecast(db: DBSessionDep,
 @router.get("/{forecast_oid}/injectionobservations",
             response_class=Response)
 async def get_injectionobservation_hydjson(
-        db: DBSessionDep, forecast_oid: UUID):
+        request: Request, db: DBSessionDep, forecast_oid: UUID):
 
-    db_result = await AsyncInjectionObservationRepository.get_by_forecast(
+    db_result = await AsyncBlobRepository.get_injectionobservation_by_forecast(
         db, forecast_oid)
 
     if not db_result:
@@ -47,8 +48,7 @@ async def get_injectionobservation_hydjson(
             status_code=404,
             detail="No Forecast or injectionobservation found.")
 
-    return Response(content=db_result.data,
-                    media_type='application/json')
+    return blob_response(request, db_result, 'application/json')
 
 
 @router.get("/{forecast_id}/seismicityobservation",
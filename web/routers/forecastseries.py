@@ -13,6 +13,7 @@ from web.repositories.database import DBSessionDep
 from web.repositories.project import (AsyncForecastRepository,
                                       AsyncForecastSeriesRepository,
                                       AsyncModelConfigRepository)
+from web.repositories.results import AsyncEventForecastRepository
 from web.schemas import ForecastJSON, ForecastSeriesJSON, InjectionPlanJSON
 
 router = APIRouter(prefix='/forecastseries', tags=['forecastseries'])
@@ -127,6 +128,16 @@ async def get_gridded_evencounts(
 
     df = pd.DataFrame(rows, columns=columns)
 
+    # events which are kept in the result store instead of the database
+    stored = await AsyncEventForecastRepository.get_stored_eventcounts_series(
+        db, forecastseries_oid, modelconfig_oid,
+        min_lon, min_lat, max_lon, max_lat)
+    if not stored.empty:
+        df['forecast_oid'] = df['forecast_oid'].astype(str)
+        df = pd.concat([df, stored], ignore_index=True).groupby(
+            ['forecast_oid', 'realization_id'],
+            as_index=False)['event_count'].sum()
+
     # return a csv
     csv_buffer = io.StringIO()
     df.to_csv(csv_buffer, index=False)
@@ -1,10 +1,11 @@
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, HTTPException, Request, Response
 
-from web.repositories.data import (AsyncInjectionObservationRepository,
+from web.repositories.data import (AsyncBlobRepository,
                                    AsyncInjectionPlanRepository)
 from web.repositories.database import DBSessionDep
+from web.routers import blob_response, injectionplan_response
 from web.schemas import InjectionPlanJSON
 
 router = APIRouter(tags=['injections'])
@@ -13,9 +14,11 @@ router = APIRouter(tags=['injections'])
 @router.get("/injectionplans/{injectionplan_oid}",
             response_class=Response)
 async def get_modelconfig(db: DBSessionDep,
-                          injectionplan_oid: UUID):
+                          injectionplan_oid: UUID,
+                          compact: bool = False):
     """
-    Returns a ModelConfig
+    Returns a InjectionPlan, compact returns piecewise constant or
+    linear plans as their breakpoints instead of every sample.
     """
 
     db_result = await AsyncInjectionPlanRepository.get_by_id(db,
@@ -25,12 +28,11 @@ async def get_modelconfig(db: DBSessionDep,
         raise HTTPException(status_code=404,
                             detail="InjectionPlan not found.")
 
-    if db_result.data is None:
+    if db_result.data is None and db_result.steps is None:
         raise HTTPException(status_code=404,
                             detail="InjectionPlan data not found.")
 
-    return Response(db_result.data[1:-1],  # remove start and end []
-                    media_type='application/json')
+    return await injectionplan_response(db_result, compact)
 
 
 @router.get("/injectionplantemplates/{injectionplan_oid}",
@@ -51,12 +53,13 @@ async def get_injectionplan_template(db: DBSessionDep,
 
 @router.get("/injectionobservations/{injectionobservation_oid}",
             response_class=Response)
-async def get_injection_observations(db: DBSessionDep,
+async def get_injection_observations(request: Request,
+                                     db: DBSessionDep,
                                      injectionobservation_oid: UUID):
     """
     Returns a InjectionObservation
     """
-    db_result = await AsyncInjectionObservationRepository.get_by_id(
+    db_result = await AsyncBlobRepository.get_by_injectionobservation(
         db,
         injectionobservation_oid)
 
@@ -64,5 +67,4 @@ async def get_injection_observations(db: DBSessionDep,
         raise HTTPException(status_code=404,
                             detail="InjectionObservation not found.")
 
-    return Response(db_result.data,
-                    media_type='application/json')
+    return blob_response(request, db_result, 'application/json')
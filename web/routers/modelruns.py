@@ -1,3 +1,4 @@
+import asyncio
 import io
 import itertools
 import zipfile
@@ -12,6 +13,7 @@ from hermes_model import ModelInput
 from jinja2 import Template
 from sqlalchemy import text
 
+from hermes.io.injectionplans import injectionplan_hydjson
 from hermes.schemas.base import EInput, EResultType
 from hermes.schemas.model_schemas import ModelConfig
 from web.queries.modelruns import EVENTCOUNTS
@@ -26,6 +28,7 @@ from web.repositories.results import (AsyncEventForecastRepository,
                                       AsyncGRParametersRepository,
                                       AsyncModelResultRepository,
                                       AsyncModelRunRepository)
+from web.routers import injectionplan_response
 from web.schemas import ForecastJSON, ModelRunJSON
 
 router = APIRouter(prefix="/modelruns", tags=['modelruns'])
@@ -100,23 +103,35 @@ async def get_gridded_eventcounts(db: DBSessionDep,
 
     # TODO: Automatic grid bounds if not provided
 
+    grid = {'min_lon': min_lon + (res_lon / 2),
+            'min_lat': min_lat + (res_lat / 2),
+            'max_lon': max_lon,
+            'max_lat': max_lat,
+            'res_lon': res_lon,
+            'res_lat': res_lat}
+
     # Execute the query
-    stmt = text(EVENTCOUNTS).bindparams(modelrun_oid=modelrun_id,
-                                        min_lon=min_lon + (res_lon / 2),
-                                        min_lat=min_lat + (res_lat / 2),
-                                        max_lon=max_lon,
-                                        max_lat=max_lat,
-                                        res_lon=res_lon,
-                                        res_lat=res_lat)
+    stmt = text(EVENTCOUNTS).bindparams(modelrun_oid=modelrun_id, **grid)
     result = await db.execute(stmt)
     rows = result.fetchall()  # Fetch all results
     columns = result.keys()   # Get column names
 
     # Convert to Pandas DataFrame
     df = pd.DataFrame(rows, columns=columns)
+
+    # events which are kept in the result store instead of the database
+    stored = await AsyncEventForecastRepository.get_stored_eventcounts(
+        db, modelrun_id, **grid)
+    if not stored.empty:
+        df = pd.concat([df, stored], ignore_index=True)
+
     df['grid_lat'] = np.round(df['grid_lat'], 6)
     df['grid_lon'] = np.round(df['grid_lon'], 6)
 
+    if not stored.empty:
+        df = df.groupby(['grid_lon', 'grid_lat'],
+                        as_index=False)['event_count'].sum()
+
     # make sure that all the lon and lat values are at least
     # once in the df so that the grid is complete
     bg_lons = np.round(np.arange(min_lon + (res_lon / 2),
@@ -177,7 +192,9 @@ async def get_modelrun_input_files(db: DBSessionDep, modelrun_id: UUID):
         seismicityobservation = \
             await AsyncSeismicityObservationRepository.get_by_forecast(
                 db, forecast.oid)
-        seismicityobservation = io.BytesIO(seismicityobservation.data)
+        seismicityobservation = io.BytesIO(
+            await AsyncSeismicityObservationRepository.get_quakeml(
+                db, seismicityobservation))
         seismicityobservation.name = "seismicityobservation.xml"
 
     injectionobservation = None
@@ -192,7 +209,8 @@ async def get_modelrun_input_files(db: DBSessionDep, modelrun_id: UUID):
     if forecastseries.injectionplan_required != EInput.NOT_ALLOWED:
         injectionplan = await AsyncInjectionPlanRepository.get_by_modelrun(
             db, modelrun_id)
-        injectionplan = injectionplan.data
+        injectionplan = await asyncio.to_thread(injectionplan_hydjson,
+                                                injectionplan)
         injectionplan = io.BytesIO(injectionplan)
         injectionplan.name = "injectionplan.json"
 
@@ -333,9 +351,12 @@ async def get_modelrun_results_by_id(db: DBSessionDep,
 @router.get("/{modelrun_oid}/injectionplan",
             response_class=Response)
 async def get_injectionplan(db: DBSessionDep,
-                            modelrun_oid: UUID):
+                            modelrun_oid: UUID,
+                            compact: bool = False):
     """
-    Returns the injection plan for a modelrun.
+    Returns the injection plan for a modelrun, compact returns piecewise
+    constant or linear plans as their breakpoints instead of every
+    sample.
     """
 
     db_result = await AsyncInjectionPlanRepository.get_by_modelrun(
@@ -350,5 +371,4 @@ async def get_injectionplan(db: DBSessionDep,
         return Response('{}',
                         media_type='application/json')
 
-    return Response(db_result.data[1:-1],  # remove start and end []
-                    media_type='application/json')
+    return await injectionplan_response(db_result, compact)